@@ -0,0 +1,88 @@
+"""
+FastAPI dependencies for the service layer.
+
+Endpoints receive services through these instead of importing module-level
+instances, so nothing is built until the first request that needs it and
+tests can swap implementations with `app.dependency_overrides`.
+"""
+import math
+import secrets
+from typing import Annotated
+
+from fastapi import Depends, Header, HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.container import container
+from app.core.metrics import metrics
+from app.core.rate_limit import client_ip, client_key, rate_limits
+from app.llm.scheduler import current_client
+from app.services.ingest_jobs import IngestJobManager
+from app.services.ingest_service import IngestService
+from app.services.rag_service import RAGService
+
+
+def get_rag_service() -> RAGService:
+    return container.rag
+
+
+def get_ingest_service() -> IngestService:
+    return container.ingest
+
+
+def get_ingest_job_manager() -> IngestJobManager:
+    return container.ingest_jobs
+
+
+RAGServiceDep = Annotated[RAGService, Depends(get_rag_service)]
+IngestServiceDep = Annotated[IngestService, Depends(get_ingest_service)]
+IngestJobManagerDep = Annotated[IngestJobManager, Depends(get_ingest_job_manager)]
+
+
+def require_admin(x_admin_token: Annotated[str | None, Header()] = None) -> None:
+    """Admin endpoints: 404 unless ADMIN_TOKEN is set, 403 without a matching X-Admin-Token."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+class RateLimit:
+    """
+    Per-client token bucket for an endpoint group ("ask", "stream", "documents").
+
+    Also records the client for the fair generation scheduler, so use it on
+    every endpoint that generates, even with RATE_LIMIT_ENABLED=false.
+    With `cost=0` the dependency only records the client; the endpoint then
+    charges what the request is worth with `charge()` once the body is parsed.
+    """
+
+    def __init__(self, group: str, cost: float = 1.0):
+        self.group = group
+        self.cost = cost
+
+    async def __call__(self, request: Request) -> None:
+        # Async so the context variable is set in the request's own context
+        current_client.set(client_key(request))
+        if self.cost:
+            self.charge(request, self.cost)
+
+    def charge(self, request: Request, cost: float) -> None:
+        """Take `cost` tokens from the client (and its IP ceiling), or raise 429."""
+        if not settings.rate_limit_enabled:
+            return
+        key = client_key(request)
+        retry_after = rate_limits.check(self.group, key, cost)
+        ip = client_ip(request)
+        if retry_after == 0 and key != ip:
+            # Per-IP ceiling: new session IDs from one address share it. A
+            # request it rejects gets the client's tokens back.
+            retry_after = rate_limits.check(f"{self.group}:ip", ip, cost)
+            if retry_after > 0:
+                rate_limits.refund(self.group, key, cost)
+        if retry_after > 0:
+            metrics.inc("http_rate_limited_total")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many requests, retry in {math.ceil(retry_after)}s",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
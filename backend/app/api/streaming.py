@@ -0,0 +1,191 @@
+"""
+Streaming response helpers.
+SSE frame encoding, token coalescing and content-encoding negotiation,
+shared by the chat stream and the document endpoints.
+"""
+import asyncio
+import json
+import zlib
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+try:
+    import brotli
+except ImportError:  # Optional: fall back to gzip only
+    brotli = None
+
+# Token events are built from pre-encoded pieces: only the text is escaped
+_TOKEN_PREFIX = b'event: token\ndata: {"token": '
+_TOKEN_SUFFIX = b"}\n\n"
+_END = object()
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+def sse_token(text: str) -> bytes:
+    """Encode a `token` event; same bytes as sse_event("token", {"token": text})."""
+    return _TOKEN_PREFIX + json.dumps(text).encode() + _TOKEN_SUFFIX
+
+
+DONE_EVENT = sse_event("done", {"status": "complete"})
+
+
+async def aclose(iterator: AsyncIterator[Any]) -> None:
+    """Close an async generator now (runs its finally blocks)."""
+    close = getattr(iterator, "aclose", None)
+    if close is not None:
+        await close()
+
+
+async def coalesce(
+    tokens: AsyncIterator[str], window_ms: float, max_chars: int
+) -> AsyncIterator[str]:
+    """
+    Merge upstream tokens into larger pieces.
+
+    The first token is passed through at once (time to first token is
+    unchanged). After that, tokens are buffered until `max_chars` are
+    pending or `window_ms` has passed since the oldest pending token, so no
+    token waits longer than the window. `window_ms <= 0` disables merging.
+
+    The upstream iterator is consumed by a separate task, so a flush is not
+    held back by a slow token. When the consumer stops early the upstream
+    iterator is closed before this generator finishes closing.
+    """
+    if window_ms <= 0:
+        try:
+            async for token in tokens:
+                yield token
+        finally:
+            await aclose(tokens)
+        return
+
+    loop = asyncio.get_running_loop()
+    window = window_ms / 1000
+    queue: asyncio.Queue[Any] = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            async for token in tokens:
+                queue.put_nowait(token)
+            queue.put_nowait(_END)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    producer = asyncio.create_task(produce())
+    parts: list[str] = []
+    pending = 0
+    deadline: float | None = None
+    first = True
+    try:
+        while True:
+            if deadline is None:
+                item = await queue.get()
+            elif not queue.empty():
+                item = queue.get_nowait()
+            else:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    item = None
+
+            if item is None or (deadline is not None and loop.time() >= deadline):
+                # Window elapsed: flush what is pending before going on
+                yield "".join(parts)
+                parts.clear()
+                pending = 0
+                deadline = None
+            if item is None:
+                continue
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            parts.append(item)
+            pending += len(item)
+            if first or pending >= max_chars:
+                first = False
+                yield "".join(parts)
+                parts.clear()
+                pending = 0
+                deadline = None
+            elif deadline is None:
+                deadline = loop.time() + window
+
+        if parts:
+            yield "".join(parts)
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+        await aclose(tokens)
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that closes its body iterator when the response ends.
+
+    On a client disconnect Starlette stops iterating the body but may leave
+    the generator suspended until it is garbage collected, and whatever it
+    is consuming (an LLM stream) keeps running. Closing it at once runs its
+    finally blocks, which cancel the upstream generation.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await aclose(self.body_iterator)
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Pick br, gzip or identity from an Accept-Encoding header."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(coding.strip().lower())
+
+    if "br" in accepted and brotli is not None:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+class StreamCompressor:
+    """
+    Incremental br/gzip encoder for a streamed body.
+
+    Every `compress()` call flushes, so each chunk can be decoded by the
+    client as soon as it arrives; the compressor keeps its window across
+    chunks, so repeated JSON framing still compresses well.
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=4)
+        elif encoding == "gzip":
+            self._zlib = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container
+        elif encoding != "identity":
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        if self.encoding == "gzip":
+            return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+        return data
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        if self.encoding == "gzip":
+            return self._zlib.flush()
+        return b""
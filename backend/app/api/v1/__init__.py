@@ -1,9 +1,10 @@
 """
 API v1 router - combines all endpoint routers.
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from app.api.v1 import asignaturas, chat, health
+from app.api.deps import require_admin
+from app.api.v1 import admin, asignaturas, chat, health, ingest
 
 api_router = APIRouter()
 
@@ -11,3 +12,9 @@ api_router = APIRouter()
 api_router.include_router(health.router, tags=["Health"])
 api_router.include_router(asignaturas.router, prefix="/asignaturas", tags=["Asignaturas"])
 api_router.include_router(chat.router, prefix="/chat", tags=["Chat"])
+api_router.include_router(
+    ingest.router, prefix="/ingest", tags=["Ingest"], dependencies=[Depends(require_admin)]
+)
+api_router.include_router(
+    admin.router, prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)]
+)
@@ -0,0 +1,47 @@
+"""
+Admin endpoints (X-Admin-Token, only enabled when ADMIN_TOKEN is set).
+Profile the worker process that receives the request.
+"""
+import asyncio
+import os
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Response, status
+
+from app.core.profiling import ProfilerBusy, profile_loop, sample_stacks
+
+router = APIRouter()
+
+
+@router.post("/profile")
+async def capture_profile(
+    seconds: float = Query(10.0, gt=0, le=120),
+    format: Literal["folded", "pstats"] = "folded",
+    interval_ms: float = Query(5.0, ge=1, le=100),
+):
+    """
+    Profile this worker for `seconds` and return the result as a file.
+
+    - `folded`: statistical sampling of every thread every `interval_ms`,
+      as folded stacks (`flamegraph.pl`, speedscope, inferno).
+    - `pstats`: cProfile of the event-loop thread (`snakeviz`, `flameprof`,
+      `python -m pstats`); only sees code running on the loop.
+
+    With several workers, each request profiles whichever worker got it.
+    """
+    try:
+        if format == "folded":
+            content = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+            media_type, suffix = "text/plain", "folded"
+        else:
+            content = await profile_loop(seconds)
+            media_type, suffix = "application/octet-stream", "pstats"
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+
+    filename = f"profile-{os.getpid()}.{suffix}"
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
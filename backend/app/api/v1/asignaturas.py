@@ -3,11 +3,15 @@ Asignaturas (subjects/books) endpoints.
 Public access - no authentication required.
 Subjects are auto-detected from docs/ folder structure.
 """
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
 
+from app.api.deps import IngestServiceDep, RateLimit
+from app.api.streaming import negotiate_encoding
 from app.core.config import settings
-from app.services.ingest_service import ingest_service
+from app.services.document_cache import CachedDocument, document_cache
 
 router = APIRouter()
 
@@ -24,6 +28,30 @@ class AsignaturaDetail(AsignaturaResponse):
     documents: list[str]
 
 
+class TocEntryResponse(BaseModel):
+    anchor: str
+    title: str
+    level: int
+    start: int
+    end: int
+
+
+class DocumentToc(BaseModel):
+    slug: str
+    filename: str
+    title: str
+    entries: list[TocEntryResponse]
+
+
+class DocumentSection(BaseModel):
+    slug: str
+    filename: str
+    anchor: str
+    title: str
+    level: int
+    content: str
+
+
 def _get_docs_for_asignatura(slug: str) -> list[str]:
     """Get list of markdown files for an asignatura."""
     docs_dir = settings.docs_path / slug
@@ -32,6 +60,34 @@ def _get_docs_for_asignatura(slug: str) -> list[str]:
     return sorted([f.name for f in docs_dir.glob("*.md")])
 
 
+def _etag_matches(if_none_match: str | None, etags: list[str]) -> bool:
+    """Weak comparison of If-None-Match against the given ETags."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(etag in candidates for etag in etags)
+
+
+async def _get_cached_document(slug: str, filename: str) -> CachedDocument:
+    """Get a document from the cache or raise 404."""
+    # Ensure filename ends with .md
+    if not filename.endswith(".md"):
+        filename = f"{filename}.md"
+
+    # A miss reads (and hashes) the file: keep it off the event loop
+    document = document_cache.cached(slug, filename) or await asyncio.to_thread(
+        document_cache.get, slug, filename
+    )
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document '{filename}' not found in asignatura '{slug}'",
+        )
+    return document
+
+
 def _generate_icon(slug: str) -> str:
     """Generate an icon based on the subject slug."""
     icons = {
@@ -56,7 +112,7 @@ def _generate_icon(slug: str) -> str:
 
 
 @router.get("", response_model=list[AsignaturaResponse])
-async def list_asignaturas():
+async def list_asignaturas(ingest_service: IngestServiceDep):
     """List all available asignaturas."""
     result = []
     for slug in ingest_service.list_books():
@@ -74,7 +130,7 @@ async def list_asignaturas():
 
 
 @router.get("/{slug}", response_model=AsignaturaDetail)
-async def get_asignatura(slug: str):
+async def get_asignatura(slug: str, ingest_service: IngestServiceDep):
     """Get details of a specific asignatura."""
     if not ingest_service.qdrant.collection_exists(slug):
         raise HTTPException(
@@ -95,33 +151,116 @@ async def get_asignatura(slug: str):
     )
 
 
-@router.get("/{slug}/documents/{filename}")
-async def get_document_content(slug: str, filename: str):
+@router.get("/{slug}/documents/{filename}", dependencies=[Depends(RateLimit("documents"))])
+async def get_document_content(slug: str, filename: str, request: Request):
     """
     Get the content of a specific markdown document.
+
+    Served from an in-memory cache with a strong ETag; clients sending a
+    matching `If-None-Match` get 304. Large bodies are brotli/gzip-encoded
+    when the client accepts it.
     """
-    # Ensure filename ends with .md
-    if not filename.endswith(".md"):
-        filename = f"{filename}.md"
+    document = await _get_cached_document(slug, filename)
 
-    file_path = settings.docs_path / slug / filename
+    encoding = "identity"
+    if len(document.body) >= settings.docs_compress_min_bytes:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
 
-    if not file_path.exists():
+    etag = document.etag_for(encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+    # Only the negotiated representation: a cached gzip body is no use to
+    # a client that now only accepts identity
+    if _etag_matches(request.headers.get("if-none-match"), [etag]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    body = document.cached_body(encoding) or await asyncio.to_thread(
+        document_cache.encoded_body, document, encoding
+    )
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+@router.get(
+    "/{slug}/documents/{filename}/toc",
+    response_model=DocumentToc,
+    dependencies=[Depends(RateLimit("documents"))],
+)
+async def get_document_toc(slug: str, filename: str, request: Request, response: Response):
+    """
+    Get the table of contents (#, ##, ### headings) of a document.
+
+    Each entry carries an `anchor` usable with the section endpoint and the
+    byte range of the section within the file.
+    """
+    document = await _get_cached_document(slug, filename)
+
+    etag = f'"{document.etag}-toc"'
+    if _etag_matches(request.headers.get("if-none-match"), [etag]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+    return DocumentToc(
+        slug=slug,
+        filename=document.filename,
+        title=document.title,
+        entries=[
+            TocEntryResponse(
+                anchor=e.anchor,
+                title=e.title,
+                level=e.level,
+                start=e.start,
+                end=e.end,
+            )
+            for e in document.toc
+        ],
+    )
+
+
+@router.get(
+    "/{slug}/documents/{filename}/sections/{section_id}",
+    response_model=DocumentSection,
+    dependencies=[Depends(RateLimit("documents"))],
+)
+async def get_document_section(
+    slug: str, filename: str, section_id: str, request: Request, response: Response
+):
+    """
+    Get a single section of a document (heading plus its subsections).
+
+    `section_id` is a TOC anchor or the heading text itself, so citations
+    with `titulo`/`seccion` can link straight to their section.
+    """
+    document = await _get_cached_document(slug, filename)
+
+    entry = document.find_section(section_id)
+    if entry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Document '{filename}' not found in asignatura '{slug}'",
+            detail=f"Section '{section_id}' not found in '{document.filename}'",
         )
 
-    content = file_path.read_text(encoding="utf-8")
-
-    # Extract title from first line
-    lines = content.split("\n")
-    first_line = lines[0] if lines else ""
-    title = first_line.lstrip("# ").strip() if first_line.startswith("#") else filename.replace(".md", "")
+    etag = f'"{document.etag}-{entry.anchor}"'
+    if _etag_matches(request.headers.get("if-none-match"), [etag]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
 
-    return {
-        "content": content,
-        "title": title,
-        "filename": filename,
-        "slug": slug,
-    }
+    return DocumentSection(
+        slug=slug,
+        filename=document.filename,
+        anchor=entry.anchor,
+        title=entry.title,
+        level=entry.level,
+        content=document.section_text(entry),
+    )
@@ -2,14 +2,26 @@
 Chat endpoints for RAG-based Q&A.
 Public access - no authentication required.
 """
-import json
-from typing import AsyncGenerator
+from typing import Annotated, AsyncGenerator, AsyncIterator, Awaitable, Callable
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
-from app.services.rag_service import rag_service
+from app.api.deps import RAGServiceDep, RateLimit
+from app.api.streaming import (
+    DONE_EVENT,
+    ClosingStreamingResponse,
+    StreamCompressor,
+    aclose,
+    coalesce,
+    negotiate_encoding,
+    sse_event,
+    sse_token,
+)
+from app.core.config import settings
+from app.llm.circuit import CircuitOpenError
+from app.services.rag_service import RAGResponse, Source
 
 router = APIRouter()
 
@@ -18,8 +30,25 @@ class ChatRequest(BaseModel):
     question: str = Field(..., min_length=3, max_length=2000)
 
 
+class ChatBatchRequest(BaseModel):
+    questions: list[Annotated[str, Field(min_length=3, max_length=2000)]] = Field(
+        ..., min_length=1, max_length=settings.batch_max_questions
+    )
+
+
+class MultiChatRequest(BaseModel):
+    subjects: list[str] = Field(..., min_length=1, max_length=settings.multi_max_subjects)
+    question: str = Field(..., min_length=3, max_length=2000)
+
+    @field_validator("subjects")
+    @classmethod
+    def dedupe_subjects(cls, subjects: list[str]) -> list[str]:
+        return list(dict.fromkeys(subjects))
+
+
 class SourceResponse(BaseModel):
     source_file: str
+    book_id: str | None = None
     titulo: str | None
     seccion: str | None
     subseccion: str | None
@@ -34,8 +63,132 @@ class ChatResponse(BaseModel):
     model_used: str
 
 
-@router.post("/{slug}/ask", response_model=ChatResponse)
-async def ask_question(slug: str, request: ChatRequest):
+class MultiChatResponse(BaseModel):
+    answer: str
+    sources: list[SourceResponse]
+    book_ids: list[str]
+    model_used: str
+
+
+class BatchAnswer(BaseModel):
+    """One NDJSON line of an /ask-batch response."""
+    index: int
+    question: str
+    response: ChatResponse | None = None
+    error: str | None = None
+
+
+def _to_chat_response(response: RAGResponse) -> ChatResponse:
+    return ChatResponse(
+        answer=response.answer,
+        sources=[
+            SourceResponse(
+                source_file=s.source_file,
+                book_id=s.book_id,
+                titulo=s.titulo,
+                seccion=s.seccion,
+                subseccion=s.subseccion,
+                content=s.content,
+                score=s.score,
+            )
+            for s in response.sources
+        ],
+        book_id=response.book_id,
+        model_used=response.model_used,
+    )
+
+
+def _unavailable(error: CircuitOpenError) -> HTTPException:
+    """503 while the LLM backend's circuit is open, instead of a slow timeout."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(max(1, round(error.retry_after)))},
+    )
+
+
+def _sse_response(
+    start: Callable[[], Awaitable[tuple[AsyncIterator[str], list[Source]]]],
+    request: Request,
+) -> StreamingResponse:
+    """
+    Run a RAG stream and send it as SSE: sources, tokens, done (or error).
+
+    Tokens are coalesced per STREAM_COALESCE_MS / STREAM_COALESCE_CHARS, so
+    a `token` event may carry several upstream tokens. With
+    STREAM_COMPRESSION the stream is br/gzip-encoded when accepted.
+    """
+    encoding = "identity"
+    if settings.stream_compression:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    compressor = StreamCompressor(encoding)
+
+    async def events() -> AsyncGenerator[bytes, None]:
+        stream = None
+        try:
+            stream, sources = await start()
+
+            # Send sources first
+            sources_data = [
+                {
+                    "source_file": s.source_file,
+                    "book_id": s.book_id,
+                    "titulo": s.titulo,
+                    "seccion": s.seccion,
+                    "content": s.content[:200] + "..." if len(s.content) > 200 else s.content,
+                    "score": s.score,
+                }
+                for s in sources
+            ]
+            yield sse_event("sources", sources_data)
+
+            # Stream tokens
+            async for text in coalesce(
+                stream, settings.stream_coalesce_ms, settings.stream_coalesce_chars
+            ):
+                yield sse_token(text)
+
+            # Done
+            yield DONE_EVENT
+
+        except ValueError as e:
+            yield sse_event("error", {"error": str(e)})
+        except Exception as e:
+            yield sse_event("error", {"error": f"Stream error: {str(e)}"})
+        finally:
+            # Client gone (or stream over): stop the upstream generation now
+            if stream is not None:
+                await aclose(stream)
+
+    async def generate() -> AsyncGenerator[bytes, None]:
+        frames = events()
+        try:
+            async for frame in frames:
+                yield compressor.compress(frame)
+        finally:
+            await aclose(frames)
+        tail = compressor.finish()
+        if tail:
+            yield tail
+
+    headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "X-Accel-Buffering": "no",
+    }
+    if settings.stream_compression:
+        headers["Vary"] = "Accept-Encoding"
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    body = generate() if encoding != "identity" else events()
+    return ClosingStreamingResponse(body, media_type="text/event-stream", headers=headers)
+
+
+@router.post(
+    "/{slug}/ask", response_model=ChatResponse, dependencies=[Depends(RateLimit("ask"))]
+)
+async def ask_question(slug: str, request: ChatRequest, rag_service: RAGServiceDep):
     """
     Ask a question about an asignatura's content.
 
@@ -46,82 +199,133 @@ async def ask_question(slug: str, request: ChatRequest):
     """
     try:
         response = await rag_service.aask(slug, request.question)
+        return _to_chat_response(response)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except CircuitOpenError as e:
+        raise _unavailable(e) from e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"RAG error: {str(e)}",
+        ) from e
+
+
+BATCH_RATE_LIMIT = RateLimit("ask", cost=0)
 
-        return ChatResponse(
-            answer=response.answer,
-            sources=[
-                SourceResponse(
-                    source_file=s.source_file,
-                    titulo=s.titulo,
-                    seccion=s.seccion,
-                    subseccion=s.subseccion,
-                    content=s.content,
-                    score=s.score,
-                )
-                for s in response.sources
-            ],
-            book_id=response.book_id,
-            model_used=response.model_used,
-        )
 
+@router.post("/{slug}/ask-batch", dependencies=[Depends(BATCH_RATE_LIMIT)])
+async def ask_batch(
+    slug: str, request: ChatBatchRequest, http_request: Request, rag_service: RAGServiceDep
+):
+    """
+    Ask several questions about an asignatura in one request.
+
+    Questions are embedded in a single batched call, retrieved concurrently
+    and answered with bounded concurrency. Returns NDJSON: one `BatchAnswer`
+    line per question, in completion order (use `index` to reorder). Each
+    question costs one /ask request of the client's rate limit.
+    """
+    BATCH_RATE_LIMIT.charge(http_request, len(request.questions))
+    try:
+        results = await rag_service.aask_batch(slug, request.questions)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
-        )
+        ) from e
+    except CircuitOpenError as e:
+        raise _unavailable(e) from e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"RAG error: {str(e)}",
-        )
+        ) from e
 
+    async def generate() -> AsyncGenerator[str, None]:
+        try:
+            async for index, result in results:
+                line = BatchAnswer(index=index, question=request.questions[index])
+                if isinstance(result, Exception):
+                    line.error = f"RAG error: {str(result)}"
+                else:
+                    line.response = _to_chat_response(result)
+                yield line.model_dump_json() + "\n"
+        finally:
+            # Client gone: cancel the generations still in flight
+            await aclose(results)
+
+    return ClosingStreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
 
-@router.post("/{slug}/stream")
-async def stream_answer(slug: str, request: ChatRequest):
+
+@router.post("/{slug}/stream", dependencies=[Depends(RateLimit("stream"))])
+async def stream_answer(
+    slug: str, request: ChatRequest, http_request: Request, rag_service: RAGServiceDep
+):
     """
     Stream answer tokens for a question.
 
     Returns Server-Sent Events (SSE) with:
-    - `token` events: incremental answer tokens
+    - `token` events: incremental answer text (one or more tokens each)
     - `sources` event: source references (sent first)
     - `done` event: completion signal
     """
+    return _sse_response(lambda: rag_service.astream(slug, request.question), http_request)
 
-    async def generate() -> AsyncGenerator[str, None]:
-        try:
-            stream, sources = await rag_service.astream(slug, request.question)
 
-            # Send sources first
-            sources_data = [
-                {
-                    "source_file": s.source_file,
-                    "titulo": s.titulo,
-                    "seccion": s.seccion,
-                    "content": s.content[:200] + "..." if len(s.content) > 200 else s.content,
-                    "score": s.score,
-                }
-                for s in sources
-            ]
-            yield f"event: sources\ndata: {json.dumps(sources_data)}\n\n"
+@router.post(
+    "/ask", response_model=MultiChatResponse, dependencies=[Depends(RateLimit("ask"))]
+)
+async def ask_question_multi(request: MultiChatRequest, rag_service: RAGServiceDep):
+    """
+    Ask a question across several asignaturas.
 
-            # Stream tokens
-            async for token in stream:
-                yield f"event: token\ndata: {json.dumps({'token': token})}\n\n"
+    All subjects are searched concurrently with one query embedding and the
+    best chunks overall are used as context. Each source carries its `book_id`.
+    """
+    try:
+        response = await rag_service.aask_multi(request.subjects, request.question)
+        chat_response = _to_chat_response(response)
 
-            # Done
-            yield f"event: done\ndata: {json.dumps({'status': 'complete'})}\n\n"
+        return MultiChatResponse(
+            answer=chat_response.answer,
+            sources=chat_response.sources,
+            book_ids=request.subjects,
+            model_used=chat_response.model_used,
+        )
 
-        except ValueError as e:
-            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
-        except Exception as e:
-            yield f"event: error\ndata: {json.dumps({'error': f'Stream error: {str(e)}'})}\n\n"
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except CircuitOpenError as e:
+        raise _unavailable(e) from e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"RAG error: {str(e)}",
+        ) from e
 
-    return StreamingResponse(
-        generate(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
+
+@router.post("/stream", dependencies=[Depends(RateLimit("stream"))])
+async def stream_answer_multi(
+    request: MultiChatRequest, http_request: Request, rag_service: RAGServiceDep
+):
+    """
+    Stream answer tokens for a question across several asignaturas.
+
+    Same SSE events as `/{slug}/stream`; each source includes its `book_id`.
+    """
+    return _sse_response(
+        lambda: rag_service.astream_multi(request.subjects, request.question), http_request
     )
+
@@ -1,22 +1,46 @@
 """
 Health check endpoints.
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
+from fastapi.responses import PlainTextResponse
 
 from app.core.config import settings
-from app.llm.ollama import OllamaProvider
+from app.core.container import container
+from app.core.metrics import metrics
 
 router = APIRouter()
 
 
 @router.get("/health")
 async def health_check():
-    """Check system health: API status, Ollama availability, loaded models."""
-    ollama = OllamaProvider()
-    ollama_status = await ollama.health_check()
+    """Check system health: API status, Ollama availability, loaded models.
+
+    Ollama's status comes from the background prober (at most
+    LLM_HEALTH_INTERVAL_SECONDS old), not from a call per request.
+    """
+    prober = container.health
+    scheduler = getattr(container.llm, "scheduler", None)
 
     return {
         "status": "ok",
         "environment": settings.environment.value,
-        "ollama": ollama_status,
+        "ollama": await prober.status(),
+        "llm_circuit": prober.circuit(),
+        "llm_queue": scheduler.snapshot() if scheduler is not None else None,
     }
+
+
+@router.get("/health/ready")
+async def readiness(response: Response):
+    """Readiness probe: 503 while the LLM backend is down or its circuit is open."""
+    prober = container.health
+    ready = prober.is_ready()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"ready": ready, "llm_circuit": prober.circuit()}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Counters of this worker process, in Prometheus text format."""
+    return metrics.render()
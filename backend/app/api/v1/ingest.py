@@ -0,0 +1,113 @@
+"""
+Ingest job endpoints.
+Submit background (re-)ingestions of a subject and follow their progress.
+Mounted behind require_admin: a forced job rebuilds a subject's index.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel, Field
+
+from app.api.deps import IngestJobManagerDep
+from app.db.job_store import IngestJob
+from app.services.ingest_service import IngestStatus
+
+router = APIRouter()
+
+
+class IngestJobRequest(BaseModel):
+    book_id: str = Field(..., min_length=1, pattern=r"^[^/\\.][^/\\]*$")
+    force: bool = False
+
+
+class IngestJobResponse(BaseModel):
+    id: str
+    book_id: str
+    status: IngestStatus
+    force: bool
+    total_chunks: int
+    embedded_chunks: int
+    upserted_chunks: int
+    progress: float
+    throughput: float | None  # chunks/s in the current run
+    eta_seconds: float | None
+    attempts: int
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    updated_at: datetime
+    finished_at: datetime | None
+
+
+def _timestamp(value: float | None) -> datetime | None:
+    return datetime.fromtimestamp(value, timezone.utc) if value is not None else None
+
+
+def _to_response(job: IngestJob) -> IngestJobResponse:
+    return IngestJobResponse(
+        id=job.id,
+        book_id=job.book_id,
+        status=IngestStatus(job.status),
+        force=job.force,
+        total_chunks=job.total_chunks,
+        embedded_chunks=job.embedded_chunks,
+        upserted_chunks=job.upserted_chunks,
+        progress=round(job.upserted_chunks / job.total_chunks, 4) if job.total_chunks else 0.0,
+        throughput=round(job.throughput, 2) if job.throughput is not None else None,
+        eta_seconds=round(job.eta_seconds, 1) if job.eta_seconds is not None else None,
+        attempts=job.attempts,
+        error=job.error,
+        created_at=_timestamp(job.created_at),
+        started_at=_timestamp(job.started_at),
+        updated_at=_timestamp(job.updated_at),
+        finished_at=_timestamp(job.finished_at),
+    )
+
+
+@router.post("/jobs", response_model=IngestJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(request: IngestJobRequest, ingest_job_manager: IngestJobManagerDep):
+    """
+    Queue an ingestion of `docs/{book_id}`.
+
+    Jobs run one at a time in the background and checkpoint after every
+    upsert batch. If the subject already has a pending or running job,
+    that job is returned.
+    """
+    try:
+        job = await asyncio.to_thread(
+            ingest_job_manager.submit, request.book_id, force=request.force
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    return _to_response(job)
+
+
+@router.get("/jobs", response_model=list[IngestJobResponse])
+async def list_jobs(
+    ingest_job_manager: IngestJobManagerDep,
+    status_filter: Annotated[IngestStatus | None, Query(alias="status")] = None,
+    book_id: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+):
+    """List ingest jobs, newest first."""
+    jobs = await asyncio.to_thread(
+        ingest_job_manager.list, status=status_filter, book_id=book_id, limit=limit
+    )
+    return [_to_response(job) for job in jobs]
+
+
+@router.get("/jobs/{job_id}", response_model=IngestJobResponse)
+async def get_job(job_id: str, ingest_job_manager: IngestJobManagerDep):
+    """Get an ingest job with its progress, throughput and ETA."""
+    job = await asyncio.to_thread(ingest_job_manager.get, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Ingest job '{job_id}' not found",
+        )
+    return _to_response(job)
@@ -0,0 +1,51 @@
+"""
+Live traffic signal shared by the workers of a host.
+Every worker touches ANSWER_WARMUP_ACTIVITY_FILE (at most once per interval)
+while it serves live questions; background jobs read the file's mtime to know
+how long the whole host has been quiet, not just their own process. Hosts
+only see each other if the file sits on a shared volume.
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class LiveActivity:
+    """Throttled mtime marker; a missing or unwritable file means 'never busy'."""
+
+    def __init__(self, path: str | Path | None, min_interval: float = 1.0):
+        self.path = Path(path) if path else None
+        self.min_interval = min_interval
+        self._last_touch = 0.0
+        self._lock = threading.Lock()
+
+    def touch(self) -> None:
+        if self.path is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_touch < self.min_interval:
+                return
+            self._last_touch = now
+        try:
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.touch()
+        except OSError as e:
+            logger.debug(f"Could not mark live activity in {self.path}: {e}")
+
+    def idle_seconds(self) -> float:
+        """Seconds since any worker last marked activity (inf if never)."""
+        if self.path is None:
+            return float("inf")
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return float("inf")
+        return max(0.0, time.time() - mtime)
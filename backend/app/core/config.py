@@ -33,6 +33,21 @@ class Settings(BaseSettings):
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_prefix: str = "/api/v1"
+    admin_token: str | None = None  # Cabecera X-Admin-Token de /admin/*; sin valor no hay endpoints de admin
+
+    # Límite de peticiones por cliente (token bucket en memoria, por worker)
+    rate_limit_enabled: bool = False
+    rate_limit_session_header: str | None = None  # p.ej. X-Session-Id: alumnos tras la misma IP (NAT)
+    rate_limit_ip_factor: float = 10.0  # Con cabecera de sesión, cada IP admite N veces el límite de un cliente
+    rate_limit_ask_per_minute: float = 20.0  # /ask, /ask-batch
+    rate_limit_ask_burst: int = 5
+    rate_limit_stream_per_minute: float = 20.0  # /stream
+    rate_limit_stream_burst: int = 5
+    rate_limit_documents_per_minute: float = 240.0  # Lectura de documentos
+    rate_limit_documents_burst: int = 60
+
+    # Diagnóstico
+    loop_stall_threshold_ms: float = 250.0  # Avisa (con la pila) si el event loop se bloquea más; 0 = desactivado
 
     # CORS
     cors_origins: list[str] = [
@@ -41,9 +56,18 @@ class Settings(BaseSettings):
     ]
 
     # Qdrant
-    qdrant_url: str = "http://localhost:6333"
+    qdrant_url: str = "http://localhost:6333"  # local:///ruta = Qdrant embebido, sin servidor
+    qdrant_local_refresh_seconds: float = 2.0  # Réplicas de solo lectura: cada cuánto miran si hay cambios
     qdrant_api_key: str | None = None
     qdrant_collection_prefix: str = "book_"
+    qdrant_storage_mode: Literal["per_subject", "shared"] = "per_subject"
+    qdrant_shared_collection: str = "books"  # Solo con qdrant_storage_mode=shared
+    # slim: las búsquedas no traen el texto; solo se lee el de los top-k finales
+    qdrant_search_payload: Literal["full", "slim"] = "full"
+    chunk_text_store: Literal["retrieve", "local"] = "retrieve"  # De dónde sale el texto en modo slim
+    chunk_store_dir: str = "./data/chunks"  # Copia local (mmap) del texto de cada chunk
+    chunk_store_compact_ratio: float = 0.5  # Reescribe el fichero de una asignatura si más de esta fracción son textos obsoletos
+    chunk_store_compact_min_bytes: int = 1_048_576  # ...y ocupa al menos esto
 
     # Ollama (dev)
     ollama_base_url: str = "http://localhost:11434"
@@ -57,20 +81,78 @@ class Settings(BaseSettings):
     llm_temperature: float = 0.2
     llm_max_tokens: int = 2048  # Reducido para menor coste
     llm_timeout: int = 120  # Timeout agresivo
+    llm_connect_timeout: float = 5.0  # Un Ollama caído falla en segundos, no en llm_timeout
+    # Circuit breaker: tras N fallos seguidos se rechaza al instante durante N s (luego 1 llamada de prueba)
+    llm_circuit_failure_threshold: int = 5
+    llm_circuit_reset_seconds: float = 30.0
+    llm_health_interval_seconds: float = 10.0  # Sondeo en segundo plano que cachea /health
+    # Generaciones simultáneas por worker; el resto espera en colas por cliente atendidas por turnos (0 = sin límite)
+    llm_max_concurrent_generations: int = 4
+    llm_num_ctx: int = 8192  # Fijo: cambiarlo recarga el modelo y vacía la KV cache
+    ollama_keep_alive: str = "30m"  # Mantiene el modelo (y su prefijo cacheado) en memoria
 
     # Embeddings
     embedding_model: str = "bge-m3"
     embedding_dimensions: int = 1024
+    embedding_batch_size: int = 32  # Textos por llamada a /api/embed
+    ingest_batch_size: int = 128  # Chunks por lote embed+upsert (y por checkpoint)
+    # Reducción de dimensiones: índice más pequeño y búsquedas más rápidas (ver benchmarks.embedding_reduction)
+    embedding_reduction: Literal["none", "truncate", "pca"] = "none"
+    embedding_reduced_dimensions: int = 512
+    embedding_pca_samples: int = 4096  # Chunks usados para ajustar la PCA de cada asignatura
+    embedding_projections_dir: str = "./data/projections"  # Proyección guardada junto a cada colección
 
     # RAG Settings (optimizado)
     chunk_size: int = 1000  # Chunks más pequeños = menos tokens
     chunk_overlap: int = 100
+    chunk_size_unit: Literal["chars", "tokens"] = "chars"  # Unidad de chunk_size/chunk_overlap
     retriever_k: int = 4  # Menos chunks = menor coste
     min_relevance_score: float = 0.3  # Más estricto = mejores resultados
+    # Profundidad adaptativa: entre retriever_min_k y retriever_k chunks según la curva de scores
+    retriever_adaptive: bool = False
+    retriever_min_k: int = 1
+    retriever_relative_score: float = 0.8  # Descarta chunks con score < top * N
+    retriever_min_gap: float = 0.05  # Corta en el mayor salto entre scores consecutivos si lo supera...
+    retriever_gap_share: float = 0.5  # ...y es >= N * top * (1 - relative_score) y el doble que los demás saltos
+    # Búsqueda jerárquica: primero las secciones (titulo/seccion) más cercanas, luego sus chunks
+    retriever_hierarchical: bool = False  # También crea los vectores de sección al ingestar
+    retriever_sections_k: int = 8  # Secciones candidatas de la primera etapa
+    batch_max_questions: int = 50  # Preguntas por petición a /ask-batch
+    batch_max_concurrency: int = 2  # Generaciones simultáneas por lote
+    multi_max_subjects: int = 10  # Asignaturas por pregunta en /chat/ask y /chat/stream
+    # Respuestas precalculadas para preguntas previsibles (títulos de sección de cada asignatura)
+    answer_cache_enabled: bool = False  # Consultar el almacén antes de generar
+    answer_cache_db: str = "./data/answers.sqlite3"
+    answer_cache_min_similarity: float = 0.92  # Coseno mínimo con la pregunta precalculada
+    answer_warmup_enabled: bool = False  # Precalcular en segundo plano (solo el líder)
+    answer_warmup_hours: str = ""  # Franja valle en hora local, p. ej. "1-7" (vacío = a cualquier hora)
+    answer_warmup_idle_seconds: float = 30.0  # Sin preguntas en vivo durante N s antes de generar
+    answer_warmup_activity_file: str = "./data/live-activity"  # Marca compartida por los workers del host
+    answer_warmup_interval_seconds: float = 5.0  # Pausa entre generaciones
+    answer_warmup_max_questions: int = 100  # Preguntas por asignatura
+    answer_warmup_poll_seconds: float = 300.0  # Cada cuánto se buscan asignaturas por precalcular
+    stream_coalesce_ms: float = 25.0  # Agrupa tokens SSE durante como máximo N ms (0 = un evento por token)
+    stream_coalesce_chars: int = 64  # ...o hasta acumular N caracteres
+    stream_compression: bool = False  # br/gzip en /stream si el cliente lo acepta (el proxy no debe bufferizar)
 
     # Storage
     docs_dir: str = "./docs"
     upload_dir: str = "./uploads"
+    docs_watch_enabled: bool = False  # Re-ingesta en caliente al editar docs/
+    docs_watch_debounce_seconds: float = 2.0  # Espera tras el último cambio de una asignatura
+    docs_watch_poll_interval: float = 5.0  # Solo si watchfiles no está instalado
+    docs_cache_max_entries: int = 256  # Documentos en la caché del lector
+    docs_cache_max_mb: float = 128.0  # Memoria máxima de la caché (texto y cuerpos comprimidos)
+    docs_cache_revalidate_seconds: float = 2.0  # Cada cuánto se comprueba mtime/tamaño
+    docs_compress_min_bytes: int = 1024  # Comprimir respuestas a partir de este tamaño
+    ingest_jobs_db: str = "./data/ingest_jobs.sqlite3"  # Cola persistente de /ingest/jobs
+    index_snapshot_dir: str = "./data/snapshots"  # Índices exportados con scripts.index_snapshot
+    index_snapshot_restore: bool = True  # Al arrancar, cargar el snapshot de los mismos docs en vez de re-embeber
+    # Con varios workers/nodos solo el líder ingesta al arrancar (file: mismo host, qdrant: varios nodos)
+    ingest_leader_election: Literal["file", "qdrant", "none"] = "file"
+    ingest_leader_lock_file: str = "./data/ingest-leader.lock"
+    ingest_leader_lease_seconds: float = 30.0  # Solo qdrant: caduca si el líder muere
+    ingest_follower_wait_seconds: float = 0  # 0 = los seguidores sirven ya lo que haya indexado
 
     @computed_field
     @property
@@ -82,6 +164,14 @@ class Settings(BaseSettings):
     def upload_path(self) -> Path:
         return Path(self.upload_dir)
 
+    @computed_field
+    @property
+    def qdrant_local_path(self) -> Path | None:
+        """Storage dir of the embedded Qdrant (qdrant_url=local:///path), else None."""
+        if self.qdrant_url.startswith("local://"):
+            return Path(self.qdrant_url.removeprefix("local://"))
+        return None
+
     @computed_field
     @property
     def is_production(self) -> bool:
@@ -0,0 +1,151 @@
+"""
+Lazy service container.
+
+Services are built on first access instead of at import time, so importing
+the app (tests, CLI tools, every uvicorn worker) does not pay for the Qdrant
+client import, connection setup or LLM provider construction until a
+request or the startup ingestion actually needs them. Modules that provide
+a service are imported inside its factory for the same reason.
+"""
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+
+    from app.db.answer_store import AnswerStore
+    from app.db.chunk_store import ChunkTextStore
+    from app.db.qdrant import QdrantService
+    from app.llm.base import LLMProvider
+    from app.services.embedding_reduction import ReducerStore
+    from app.services.health_prober import HealthProber
+    from app.services.ingest_jobs import IngestJobManager
+    from app.services.ingest_service import IngestService
+    from app.services.rag_service import RAGService
+
+
+# Services built (directly or not) on container.qdrant_client
+QDRANT_DEPENDENTS = ("qdrant", "ingest", "rag", "ingest_jobs")
+
+
+class Container:
+    """
+    Holds one instance of each service, created on first use.
+
+    `override()` swaps in instances (e.g. an in-memory Qdrant client for
+    benchmarks) before anything is built; `reset()` drops built instances.
+    """
+
+    def __init__(self):
+        self._instances: dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = factory()
+        return instance
+
+    def override(self, **instances: Any) -> None:
+        """Use the given instances instead of building them."""
+        with self._lock:
+            self._instances.update(instances)
+
+    def reset(self) -> None:
+        """Forget all instances; they are rebuilt on next access."""
+        with self._lock:
+            self._instances.clear()
+
+    def replace_qdrant_client(self, factory: Callable[[], QdrantClient]) -> None:
+        """
+        Close the Qdrant client built so far (if any) and build a new one.
+
+        Services holding the old client are dropped and rebuilt on next
+        access. The old client is closed first: an embedded one holds the
+        storage lock the new one may need.
+        """
+        with self._lock:
+            old = self._instances.pop("qdrant_client", None)
+            for name in QDRANT_DEPENDENTS:
+                self._instances.pop(name, None)
+            if old is not None:
+                old.close()
+            self._instances["qdrant_client"] = factory()
+
+    @property
+    def qdrant_client(self) -> QdrantClient:
+        def build():
+            from app.db.qdrant import get_qdrant_client
+            return get_qdrant_client()
+        return self._get("qdrant_client", build)
+
+    @property
+    def qdrant(self) -> QdrantService:
+        def build():
+            from app.db.qdrant import QdrantService
+            return QdrantService(client=self.qdrant_client)
+        return self._get("qdrant", build)
+
+    @property
+    def chunk_texts(self) -> ChunkTextStore:
+        def build():
+            from app.db.chunk_store import ChunkTextStore
+            return ChunkTextStore()
+        return self._get("chunk_texts", build)
+
+    @property
+    def answers(self) -> AnswerStore:
+        def build():
+            from app.db.answer_store import AnswerStore
+            return AnswerStore()
+        return self._get("answers", build)
+
+    @property
+    def llm(self) -> LLMProvider:
+        def build():
+            from app.llm.base import get_llm_provider
+            return get_llm_provider()
+        return self._get("llm", build)
+
+    @property
+    def health(self) -> HealthProber:
+        def build():
+            from app.services.health_prober import HealthProber
+            return HealthProber(llm=self.llm)
+        return self._get("health", build)
+
+    @property
+    def reducers(self) -> ReducerStore:
+        def build():
+            from app.services.embedding_reduction import ReducerStore
+            return ReducerStore()
+        return self._get("reducers", build)
+
+    @property
+    def ingest(self) -> IngestService:
+        def build():
+            from app.services.ingest_service import IngestService
+            return IngestService(qdrant=self.qdrant, llm=self.llm)
+        return self._get("ingest", build)
+
+    @property
+    def rag(self) -> RAGService:
+        def build():
+            from app.services.rag_service import RAGService
+            return RAGService(qdrant=self.qdrant, llm=self.llm)
+        return self._get("rag", build)
+
+    @property
+    def ingest_jobs(self) -> IngestJobManager:
+        def build():
+            from app.services.ingest_jobs import IngestJobManager
+            return IngestJobManager()
+        return self._get("ingest_jobs", build)
+
+
+container = Container()
@@ -0,0 +1,75 @@
+"""
+Event-loop stall detector.
+A heartbeat task on the loop and a watchdog thread beside it: when the
+heartbeat is late by more than the threshold, the watchdog logs what the
+loop thread is running at that moment (the blocking call), and the
+heartbeat logs how long the stall lasted once the loop is back.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Reports event-loop stalls longer than `threshold` seconds."""
+
+    def __init__(self, threshold: float | None = None, interval: float | None = None):
+        self.threshold = (
+            settings.loop_stall_threshold_ms / 1000 if threshold is None else threshold
+        )
+        # Check often enough to catch a stall while it is still happening
+        self.interval = interval or max(min(self.threshold / 2, 0.25), 0.01)
+        self._beat = time.monotonic()
+        self._reported_beat: float | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    async def start(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            late = time.monotonic() - self._beat - self.interval
+            if late > self.threshold:
+                metrics.inc("event_loop_stalls_total")
+                metrics.inc("event_loop_blocked_seconds_total", late)
+                logger.warning(f"Event loop was blocked for {late * 1000:.0f} ms")
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            late = time.monotonic() - beat - self.interval
+            if late > self.threshold and self._reported_beat != beat:
+                self._reported_beat = beat  # One stack per stall
+                frame = sys._current_frames().get(self._loop_thread)
+                stack = "".join(traceback.format_stack(frame)) if frame else "(unavailable)\n"
+                logger.warning(
+                    f"Event loop blocked for over {late * 1000:.0f} ms, currently in:\n{stack}"
+                )
@@ -0,0 +1,51 @@
+"""
+Process-local metrics.
+Counters kept in memory and exposed in the Prometheus text format at
+/api/v1/metrics. Each worker process has its own values.
+"""
+import threading
+
+COUNTERS = {
+    "llm_streams_cancelled_total": "Answer streams cancelled before the model finished",
+    "llm_stream_tokens_before_cancel_total": "Tokens generated by streams that were then cancelled",
+    "llm_stream_tokens_saved_total": (
+        "Token budget (num_predict) left unused by cancelled streams; an upper bound"
+    ),
+    "llm_generations_queued_total": "Generations that waited for a free slot (LLM_MAX_CONCURRENT_GENERATIONS)",
+    "llm_generation_queue_seconds_total": "Time generations spent waiting for a slot",
+    "http_rate_limited_total": "Requests rejected with 429 by the per-client rate limit",
+    "event_loop_stalls_total": "Times the event loop was blocked longer than LOOP_STALL_THRESHOLD_MS",
+    "event_loop_blocked_seconds_total": "Time the event loop spent in those stalls",
+}
+
+
+class Metrics:
+    """Named counters; unknown names are registered on first use."""
+
+    def __init__(self, counters: dict[str, str] | None = None):
+        self._help = dict(counters or {})
+        self._values = {name: 0.0 for name in self._help}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0.0) + value
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._values.get(name, 0.0)
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        with self._lock:
+            values = dict(self._values)
+        lines = []
+        for name, value in sorted(values.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(COUNTERS)
@@ -0,0 +1,77 @@
+"""
+On-demand profiling of a running worker.
+Two captures: a statistical sampler over every thread, written as folded
+stacks (flamegraph.pl, speedscope, inferno), and cProfile on the event-loop
+thread, written as a pstats dump (snakeviz, flameprof, `python -m pstats`).
+"""
+import asyncio
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+_busy = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another profile of this worker is still running."""
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _folded(frame: FrameType | None, thread_name: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """
+    Sample every thread's stack for `seconds`; blocks the calling thread.
+
+    Returns one "frame;frame;... count" line per distinct stack, root
+    first, with the thread name as the root frame.
+    """
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+    try:
+        own = threading.get_ident()
+        counts: Counter[str] = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    counts[_folded(frame, names.get(ident, f"thread-{ident}"))] += 1
+            time.sleep(interval)
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+    finally:
+        _busy.release()
+
+
+async def profile_loop(seconds: float) -> bytes:
+    """cProfile everything the event-loop thread runs for `seconds`; pstats bytes."""
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+    try:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        profiler.create_stats()
+        return marshal.dumps(profiler.stats)  # Same format as Profile.dump_stats
+    finally:
+        _busy.release()
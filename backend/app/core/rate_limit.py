@@ -0,0 +1,148 @@
+"""
+Per-client rate limiting.
+In-memory token buckets, one per client and endpoint group, in each worker
+process. Clients are identified by IP (use uvicorn --proxy-headers behind a
+reverse proxy) or, when RATE_LIMIT_SESSION_HEADER is configured, by IP and
+session; each IP then also gets a bucket RATE_LIMIT_IP_FACTOR times larger,
+so minting new session IDs does not lift the limit.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+
+from app.core.config import settings
+
+
+class TokenBucket:
+    """
+    `burst` tokens, refilled at `rate` per second.
+
+    A cost above `burst` (a large batch) goes through on a full bucket and
+    leaves it in debt, so the client then waits as if it had sent that many
+    single requests.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float, cost: float = 1.0) -> float:
+        """Take `cost` tokens; 0 if allowed, else seconds until they are there."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        needed = min(cost, self.burst)
+        if self.tokens >= needed:
+            self.tokens -= cost
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def refund(self, cost: float = 1.0) -> None:
+        self.tokens = min(self.burst, self.tokens + cost)
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by client.
+
+    Keeps the `max_clients` most recently seen clients; a client evicted
+    for being idle comes back with a full bucket, which it would have had
+    anyway after `burst / rate` seconds.
+    """
+
+    def __init__(self, per_minute: float, burst: int, max_clients: int = 10_000):
+        self.rate = per_minute / 60
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, key: str, cost: float = 1.0) -> float:
+        """0 if the request may go ahead, else the seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take(now, cost)
+
+    def refund(self, key: str, cost: float = 1.0) -> None:
+        """Give back tokens taken by a request that was rejected elsewhere."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.refund(cost)
+
+
+# Endpoint group -> (requests per minute, burst); "<group>:ip" is the per-IP ceiling
+def _group_limits() -> dict[str, tuple[float, int]]:
+    return {
+        "ask": (settings.rate_limit_ask_per_minute, settings.rate_limit_ask_burst),
+        "stream": (settings.rate_limit_stream_per_minute, settings.rate_limit_stream_burst),
+        "documents": (
+            settings.rate_limit_documents_per_minute,
+            settings.rate_limit_documents_burst,
+        ),
+    }
+
+
+class RateLimits:
+    """One RateLimiter per endpoint group, built on first use."""
+
+    def __init__(self):
+        self._limiters: dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, group: str) -> RateLimiter:
+        with self._lock:
+            if group not in self._limiters:
+                name, _, scope = group.partition(":")
+                per_minute, burst = _group_limits()[name]
+                if scope == "ip":
+                    factor = settings.rate_limit_ip_factor
+                    per_minute, burst = per_minute * factor, math.ceil(burst * factor)
+                self._limiters[group] = RateLimiter(per_minute, burst)
+            return self._limiters[group]
+
+    def check(self, group: str, key: str, cost: float = 1.0) -> float:
+        return self.limiter(group).check(key, cost)
+
+    def refund(self, group: str, key: str, cost: float = 1.0) -> None:
+        self.limiter(group).refund(key, cost)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._limiters.clear()
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def client_key(request: Request) -> str:
+    """
+    The client IP, plus the session header if configured and sent.
+
+    Sessions are scoped to their IP: a session ID sent from another address
+    is another client, so it cannot drain someone else's bucket.
+    """
+    ip = client_ip(request)
+    header = settings.rate_limit_session_header
+    if header:
+        session = request.headers.get(header)
+        if session:
+            return f"{ip}|session:{session[:128]}"
+    return ip
+
+
+rate_limits = RateLimits()
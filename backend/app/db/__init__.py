@@ -1,4 +1,12 @@
 # Database module - Qdrant, PostgreSQL connections
-from app.db.qdrant import qdrant_client, QdrantService
+# Submodules are imported on first use: qdrant_client is slow to import.
+from typing import Any
 
 __all__ = ["qdrant_client", "QdrantService"]
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        from app.db import qdrant
+        return getattr(qdrant, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,179 @@
+"""
+SQLite store for precomputed answers.
+Answers generated off-peak for anticipated questions, looked up by the
+similarity of a live question's embedding before generating.
+"""
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    book_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    question TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    answer TEXT NOT NULL,
+    sources TEXT NOT NULL,
+    model TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (book_id, question)
+);
+CREATE INDEX IF NOT EXISTS ix_answers_book ON answers (book_id);
+"""
+
+
+@dataclass
+class PrecomputedAnswer:
+    """A stored answer; `sources` are Source fields as dicts."""
+    book_id: str
+    question: str
+    answer: str
+    sources: list[dict[str, Any]]
+    model: str
+    similarity: float = 1.0
+
+
+class AnswerStore:
+    """
+    Precomputed answers in a local SQLite file, matched by cosine similarity.
+
+    Each book's question embeddings are kept in memory as one matrix and
+    reloaded when the book's rows change (checked with a cheap aggregate
+    query per lookup, so other workers see new or deleted answers).
+    `fingerprint` ties answers to the docs they were generated from.
+    """
+
+    def __init__(self, path: Path | str | None = None):
+        self.path = Path(path or settings.answer_cache_db)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        # book_id -> (version, ids, normalized embeddings)
+        self._matrices: dict[str, tuple[tuple[int, int], list[int], "np.ndarray"]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if str(self.path) != ":memory:":
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def add(
+        self,
+        book_id: str,
+        fingerprint: str,
+        question: str,
+        embedding: list[float],
+        answer: str,
+        sources: list[dict[str, Any]],
+        model: str,
+    ) -> None:
+        """Store (or replace) the answer to a question."""
+        import numpy as np
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (book_id, fingerprint, question, embedding,"
+                " answer, sources, model, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    book_id,
+                    fingerprint,
+                    question,
+                    np.asarray(embedding, dtype=np.float32).tobytes(),
+                    answer,
+                    json.dumps(sources),
+                    model,
+                    time.time(),
+                ),
+            )
+            conn.commit()
+
+    def questions(self, book_id: str, fingerprint: str) -> set[str]:
+        """Questions already answered for these sources."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT question FROM answers WHERE book_id = ? AND fingerprint = ?",
+                (book_id, fingerprint),
+            ).fetchall()
+        return {row["question"] for row in rows}
+
+    def delete(self, book_id: str, keep_fingerprint: str | None = None) -> int:
+        """Delete a book's answers (except those for `keep_fingerprint`)."""
+        with self._lock:
+            cursor = self._connect().execute(
+                "DELETE FROM answers WHERE book_id = ? AND fingerprint != ?",
+                (book_id, keep_fingerprint or ""),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def lookup(
+        self, book_id: str, embedding: list[float], min_similarity: float
+    ) -> PrecomputedAnswer | None:
+        """The stored answer whose question is most similar, if close enough."""
+        import numpy as np
+
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS last"
+                " FROM answers WHERE book_id = ?",
+                (book_id,),
+            ).fetchone()
+            version = (row["n"], row["last"])
+            if not row["n"]:
+                return None
+
+            cached = self._matrices.get(book_id)
+            if cached is None or cached[0] != version:
+                rows = conn.execute(
+                    "SELECT id, embedding FROM answers WHERE book_id = ? ORDER BY id", (book_id,)
+                ).fetchall()
+                matrix = np.stack([np.frombuffer(r["embedding"], dtype=np.float32) for r in rows])
+                matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+                cached = self._matrices[book_id] = (version, [r["id"] for r in rows], matrix)
+            _, ids, matrix = cached
+
+        query = np.asarray(embedding, dtype=np.float32)
+        if query.shape[0] != matrix.shape[1]:
+            return None  # Stored with another embedding model
+        similarities = matrix @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        best = int(np.argmax(similarities))
+        if similarities[best] < min_similarity:
+            return None
+
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT * FROM answers WHERE id = ?", (ids[best],)
+            ).fetchone()
+        if row is None:
+            return None
+        return PrecomputedAnswer(
+            book_id=row["book_id"],
+            question=row["question"],
+            answer=row["answer"],
+            sources=json.loads(row["sources"]),
+            model=row["model"],
+            similarity=float(similarities[best]),
+        )
@@ -0,0 +1,164 @@
+"""
+Local chunk-text store.
+Keeps a copy of every chunk's text in an append-only file per subject, read
+through mmap, so searches can skip the `content` payload in Qdrant.
+"""
+import logging
+import mmap
+import shutil
+import threading
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkTextStore:
+    """
+    Append-only UTF-8 text files under `chunk_store_dir/{book_id}/`.
+
+    `append` returns a reference (file, offset, length) per text that goes
+    into the point's payload as `text_ref`. Each subject's files get a random
+    name, so a reference never resolves to another generation's text (or to
+    another node's copy): `read` returns None and the caller falls back to
+    Qdrant. Texts of deleted or replaced points stay in the file until the
+    subject is re-ingested, deleted or compacted (`rewrite` then `prune`).
+    """
+
+    def __init__(self, directory: Path | str | None = None):
+        self.directory = Path(directory or settings.chunk_store_dir)
+        self._writers: dict[str, Any] = {}  # book_id -> open append file
+        self._maps: dict[tuple[str, str], mmap.mmap] = {}
+        self._lock = threading.Lock()
+
+    def append(self, book_id: str, texts: list[str]) -> list[dict[str, Any]]:
+        """Append texts and return their references, flushed to the OS."""
+        with self._lock:
+            writer = self._writers.pop(book_id, None)
+            # If writing fails the file is closed and dropped, so the next
+            # append starts a new one instead of continuing after a gap
+            with ExitStack() as stack:
+                if writer is None:
+                    book_dir = self.directory / book_id
+                    book_dir.mkdir(parents=True, exist_ok=True)
+                    writer = stack.enter_context(open(book_dir / f"{uuid4().hex}.txt", "ab"))
+                else:
+                    stack.enter_context(writer)
+
+                refs = []
+                offset = writer.tell()
+                for text in texts:
+                    data = text.encode("utf-8")
+                    writer.write(data)
+                    refs.append(
+                        {"file": Path(writer.name).name, "offset": offset, "length": len(data)}
+                    )
+                    offset += len(data)
+                # Readers (other workers too) must see the bytes before Qdrant
+                # points at them
+                writer.flush()
+                stack.pop_all()  # Kept open for the next append; see close()
+
+            self._writers[book_id] = writer
+            return refs
+
+    def read(self, book_id: str, ref: dict[str, Any]) -> str | None:
+        """The referenced text, or None if this store does not have it."""
+        key = (book_id, ref["file"])
+        end = ref["offset"] + ref["length"]
+        with self._lock:
+            view = self._maps.get(key)
+            if view is None or len(view) < end:
+                # Missing, or the file grew since it was mapped
+                if view is not None:
+                    view.close()
+                    del self._maps[key]
+                view = self._map(book_id, ref["file"])
+                if view is None:
+                    return None
+                self._maps[key] = view
+            if len(view) < end:
+                return None
+            return view[ref["offset"]:end].decode("utf-8")
+
+    def _map(self, book_id: str, filename: str) -> mmap.mmap | None:
+        try:
+            with open(self.directory / book_id / filename, "rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None  # ValueError: empty file
+
+    def size(self, book_id: str) -> int:
+        """Bytes on disk for a subject's texts, live and superseded."""
+        book_dir = self.directory / book_id
+        if not book_dir.is_dir():
+            return 0
+        return sum(path.stat().st_size for path in book_dir.glob("*.txt"))
+
+    def rewrite(
+        self, book_id: str, refs: dict[str, dict[str, Any]], batch_size: int = 1024
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Copy the referenced texts into a new file and return their new refs.
+
+        The old files stay readable until `prune`, so callers can repoint
+        the payloads first. Refs this store cannot read are left out.
+        """
+        with self._lock:
+            writer = self._writers.pop(book_id, None)
+            if writer is not None:
+                writer.close()  # The next append starts the new file
+
+        new_refs: dict[str, dict[str, Any]] = {}
+        items = list(refs.items())
+        for start in range(0, len(items), batch_size):
+            batch = [
+                (key, text)
+                for key, ref in items[start:start + batch_size]
+                if (text := self.read(book_id, ref)) is not None
+            ]
+            if batch:
+                appended = self.append(book_id, [text for _, text in batch])
+                new_refs.update(zip((key for key, _ in batch), appended))
+        return new_refs
+
+    def prune(self, book_id: str, keep: set[str]) -> int:
+        """Delete the subject's files not named in `keep`; returns bytes freed."""
+        freed = 0
+        with self._lock:
+            writer = self._writers.get(book_id)
+            if writer is not None:
+                keep = keep | {Path(writer.name).name}
+            for key in [k for k in self._maps if k[0] == book_id and k[1] not in keep]:
+                self._maps.pop(key).close()
+            book_dir = self.directory / book_id
+            for path in book_dir.glob("*.txt") if book_dir.is_dir() else []:
+                if path.name not in keep:
+                    freed += path.stat().st_size
+                    path.unlink(missing_ok=True)
+        return freed
+
+    def delete(self, book_id: str) -> None:
+        """Drop a subject's texts (its collection is gone or being rebuilt)."""
+        with self._lock:
+            writer = self._writers.pop(book_id, None)
+            if writer is not None:
+                writer.close()
+            for key in [k for k in self._maps if k[0] == book_id]:
+                self._maps.pop(key).close()
+            shutil.rmtree(self.directory / book_id, ignore_errors=True)
+        logger.info(f"Deleted chunk texts of {book_id}")
+
+    def close(self) -> None:
+        """Close open files and maps; the store reopens them on next use."""
+        with self._lock:
+            for writer in self._writers.values():
+                writer.close()
+            self._writers.clear()
+            for view in self._maps.values():
+                view.close()
+            self._maps.clear()
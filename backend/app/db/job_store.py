@@ -0,0 +1,198 @@
+"""
+SQLite store for ingest jobs.
+Keeps job state and checkpoints on local disk so they survive restarts.
+"""
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from app.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id TEXT PRIMARY KEY,
+    book_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    force INTEGER NOT NULL DEFAULT 0,
+    fingerprint TEXT,
+    total_chunks INTEGER NOT NULL DEFAULT 0,
+    embedded_chunks INTEGER NOT NULL DEFAULT 0,
+    upserted_chunks INTEGER NOT NULL DEFAULT 0,
+    resumed_from INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    run_started_at REAL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_ingest_jobs_status ON ingest_jobs (status);
+CREATE INDEX IF NOT EXISTS ix_ingest_jobs_created ON ingest_jobs (created_at);
+"""
+
+
+@dataclass
+class IngestJob:
+    """
+    A persisted ingest job.
+
+    `upserted_chunks` is the checkpoint: chunks [0, upserted_chunks) of the
+    book are already in Qdrant. Timestamps are Unix seconds.
+    """
+    id: str
+    book_id: str
+    status: str
+    force: bool
+    fingerprint: str | None
+    total_chunks: int
+    embedded_chunks: int
+    upserted_chunks: int
+    resumed_from: int
+    attempts: int
+    error: str | None
+    created_at: float
+    started_at: float | None
+    run_started_at: float | None
+    updated_at: float
+    finished_at: float | None
+
+    @property
+    def throughput(self) -> float | None:
+        """Chunks upserted per second in the current (or last) run."""
+        if self.run_started_at is None:
+            return None
+        end = self.finished_at or self.updated_at
+        done = self.upserted_chunks - self.resumed_from
+        elapsed = end - self.run_started_at
+        if done <= 0 or elapsed <= 0:
+            return None
+        return done / elapsed
+
+    @property
+    def eta_seconds(self) -> float | None:
+        """Estimated seconds left, from the current run's throughput."""
+        if self.finished_at is not None:
+            return 0.0
+        rate = self.throughput
+        if rate is None or not self.total_chunks:
+            return None
+        return max(self.total_chunks - self.upserted_chunks, 0) / rate
+
+
+_COLUMNS = [f.name for f in fields(IngestJob)]
+
+
+class JobStore:
+    """
+    Ingest job table in a local SQLite file.
+
+    The connection is shared between the event loop and the ingestion
+    worker thread, so every statement runs under a lock.
+    """
+
+    def __init__(self, path: Path | str | None = None):
+        self.path = Path(path or settings.ingest_jobs_db)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if str(self.path) != ":memory:":
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _to_job(self, row: sqlite3.Row) -> IngestJob:
+        values = dict(row)
+        values["force"] = bool(values["force"])
+        return IngestJob(**values)
+
+    def create(self, book_id: str, status: str, force: bool = False) -> IngestJob:
+        """Insert a new job and return it."""
+        now = time.time()
+        job = IngestJob(
+            id=uuid4().hex,
+            book_id=book_id,
+            status=status,
+            force=force,
+            fingerprint=None,
+            total_chunks=0,
+            embedded_chunks=0,
+            upserted_chunks=0,
+            resumed_from=0,
+            attempts=0,
+            error=None,
+            created_at=now,
+            started_at=None,
+            run_started_at=None,
+            updated_at=now,
+            finished_at=None,
+        )
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"INSERT INTO ingest_jobs ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                [getattr(job, c) for c in _COLUMNS],
+            )
+            conn.commit()
+        return job
+
+    def update(self, job_id: str, **values: Any) -> None:
+        """Update some columns of a job (updated_at is set automatically)."""
+        unknown = set(values) - set(_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        values["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"UPDATE ingest_jobs SET {assignments} WHERE id = ?",
+                [*values.values(), job_id],
+            )
+            conn.commit()
+
+    def get(self, job_id: str) -> IngestJob | None:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT * FROM ingest_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def list(
+        self,
+        statuses: list[str] | None = None,
+        book_id: str | None = None,
+        limit: int = 100,
+    ) -> list[IngestJob]:
+        """Jobs matching the filters, newest first."""
+        clauses, params = [], []
+        if statuses:
+            clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if book_id:
+            clauses.append("book_id = ?")
+            params.append(book_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT * FROM ingest_jobs {where} ORDER BY created_at DESC LIMIT ?",
+                [*params, limit],
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
@@ -0,0 +1,196 @@
+"""
+Embedded Qdrant for single-node deployments (qdrant_url=local:///path).
+
+qdrant-client's local mode keeps the vectors in process memory and persists
+them under a directory that only one client may open (it takes a file
+lock). With several uvicorn workers the leader opens it as the single
+writer; the other workers serve searches from read-only in-memory replicas
+loaded from the same files and reloaded when the writer changes them.
+
+The replicas rely on qdrant-client internals (QdrantLocal.collections,
+LocalCollection and the pickled rows of its SQLite storage), so only the
+versions in SUPPORTED_CLIENT_VERSIONS are accepted; keep it in step with the
+qdrant-client pin in requirements.txt.
+"""
+import importlib.metadata
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+STORAGE_FILE = "storage.sqlite"  # Per collection, written by qdrant-client
+
+# QdrantClient methods that change data; a replica refuses them
+WRITE_METHODS = frozenset({
+    "upsert", "upload_points", "upload_records", "upload_collection", "delete",
+    "set_payload", "overwrite_payload", "delete_payload", "clear_payload",
+    "update_vectors", "delete_vectors", "batch_update_points",
+    "create_collection", "recreate_collection", "delete_collection", "update_collection",
+    "create_payload_index", "delete_payload_index", "update_collection_aliases",
+})
+
+
+class ReadOnlyReplicaError(RuntimeError):
+    """A write reached a worker that only holds a read-only replica."""
+
+
+# [min, max) qdrant-client versions whose local-mode internals ReplicaClient uses
+SUPPORTED_CLIENT_VERSIONS = ((1, 7), (1, 8))
+
+
+def check_client_version(version: str | None = None) -> None:
+    """Raise RuntimeError unless the installed qdrant-client is a supported one."""
+    version = version or importlib.metadata.version("qdrant-client")
+    release = tuple(int(part) for part in version.split(".")[:2] if part.isdigit())
+    low, high = SUPPORTED_CLIENT_VERSIONS
+    if not low <= release < high:
+        raise RuntimeError(
+            f"Embedded Qdrant replicas need qdrant-client"
+            f" >={'.'.join(map(str, low))},<{'.'.join(map(str, high))}; {version} is installed."
+            " Pin it in requirements.txt or use a Qdrant server (QDRANT_URL=http://...)"
+        )
+
+
+def open_local_client(path: Path | str, writer: bool | None = None) -> Any:
+    """
+    Open the embedded storage at `path`.
+
+    Args:
+        writer: True to open it for writing (fails if another process has
+            it), False for a read-only replica, None to try writing and
+            fall back to a replica when the storage is taken.
+    """
+    check_client_version()
+    path = Path(path)
+    if writer is not False:
+        try:
+            client = QdrantClient(path=str(path), force_disable_check_same_thread=True)
+            logger.info(f"Opened embedded Qdrant at {path} (writer)")
+            return client
+        except RuntimeError:
+            if writer:
+                raise
+            logger.info(f"Embedded Qdrant at {path} is open in another process")
+    logger.info(f"Serving embedded Qdrant at {path} from a read-only replica")
+    return ReplicaClient(path)
+
+
+def _signature(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ReplicaClient:
+    """
+    Read-only, in-memory copy of an embedded Qdrant storage directory.
+
+    Stands in for a QdrantClient: reads are served by an in-memory client,
+    writes raise ReadOnlyReplicaError. At most every
+    `qdrant_local_refresh_seconds` a read checks the storage files' mtimes
+    and reloads the collections that changed; a reload builds the new
+    collection aside and swaps it in, so concurrent searches never see a
+    half-loaded collection.
+    """
+
+    def __init__(self, path: Path | str, refresh_seconds: float | None = None):
+        self.path = Path(path)
+        self.refresh_seconds = (
+            settings.qdrant_local_refresh_seconds if refresh_seconds is None else refresh_seconds
+        )
+        self._memory = QdrantClient(location=":memory:")
+        self._signatures: dict[str, tuple[int, int] | None] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def __getattr__(self, name: str) -> Any:
+        if name in WRITE_METHODS:
+            def refuse(*args: Any, **kwargs: Any) -> None:
+                raise ReadOnlyReplicaError(
+                    f"{name}() on a read-only replica of {self.path}; only the leader writes"
+                )
+            return refuse
+        self._maybe_refresh()
+        return getattr(self._memory, name)
+
+    def _maybe_refresh(self) -> None:
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        # Another thread already reloading: keep serving the current data
+        if self._lock.acquire(blocking=False):
+            try:
+                self._refresh_locked()
+            finally:
+                self._lock.release()
+
+    def refresh(self) -> None:
+        """Reload the collections whose files changed."""
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        import json
+
+        self._checked_at = time.monotonic()
+        meta_path = self.path / META_FILE
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            meta = {"collections": {}}  # Not created yet, or being rewritten
+        configs = meta["collections"]
+        local = self._memory._client  # QdrantLocal (qdrant-client <1.8)
+
+        for name in list(local.collections):
+            if name not in configs:
+                local.collections.pop(name, None)
+                self._signatures.pop(name, None)
+                logger.info(f"Replica: dropped collection {name}")
+
+        for name, config in configs.items():
+            storage = self.path / "collection" / name / STORAGE_FILE
+            signature = _signature(storage)
+            if name in local.collections and self._signatures.get(name) == signature:
+                continue
+            start = time.perf_counter()
+            collection, points = self._load_collection(config, storage)
+            local.collections[name] = collection
+            self._signatures[name] = signature
+            logger.info(
+                f"Replica: loaded {name} ({points} points) in {time.perf_counter() - start:.2f}s"
+            )
+
+    def _load_collection(self, config: dict[str, Any], storage: Path) -> tuple[Any, int]:
+        from qdrant_client.local.local_collection import LocalCollection
+
+        collection = LocalCollection(models.CreateCollection(**config), None)
+        if not storage.exists():
+            return collection, 0
+        # Read-only connection: never blocks or changes the writer's database
+        conn = sqlite3.connect(f"file:{storage}?mode=ro", uri=True)
+        try:
+            rows = conn.execute("SELECT point FROM points").fetchall()
+        except sqlite3.OperationalError:
+            rows = []  # Table not created yet
+        finally:
+            conn.close()
+        points = [pickle.loads(row[0]) for row in rows]
+        for start in range(0, len(points), 1024):
+            collection.upsert(points[start:start + 1024])
+        return collection, len(points)
+
+    def close(self) -> None:
+        self._memory.close()
@@ -3,21 +3,53 @@ Qdrant vector database client with CRUD operations.
 Replaces ChromaDB for production-ready vector storage.
 """
 import logging
+from collections.abc import Iterator
 from datetime import datetime, timezone
-from typing import Any
-from uuid import uuid4
+from typing import TYPE_CHECKING, Any, Literal
+from uuid import NAMESPACE_URL, uuid5
 
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.exceptions import UnexpectedResponse
 
 from app.core.config import settings
+from app.core.container import container
+
+if TYPE_CHECKING:
+    from app.db.chunk_store import ChunkTextStore
 
 logger = logging.getLogger(__name__)
 
+# Missing collections raise UnexpectedResponse (404) from a Qdrant server
+# and ValueError from the local/in-memory client; both mean "not there".
+MISSING_COLLECTION = (UnexpectedResponse, ValueError)
+
+# "per_subject": one collection per book (book_<slug>)
+# "shared": a single collection partitioned by the book_id payload field
+StorageMode = Literal["per_subject", "shared"]
+
+# Payload fields returned by searches in slim mode: everything but the
+# chunk text (loaded for the final top-k only) and created_at
+SLIM_PAYLOAD = [
+    "book_id", "chunk_index", "source_file", "titulo", "seccion", "subseccion", "text_ref",
+]
+
+# Section-level vectors (mean of each section's chunk vectors) live in a
+# companion collection: <chunk collection><SECTIONS_SUFFIX>
+SECTIONS_SUFFIX = "__sections"
+
+
+def section_id(source_file: str, titulo: str | None, seccion: str | None) -> str:
+    """Stable ID of the titulo/seccion grouping a chunk belongs to."""
+    return str(uuid5(NAMESPACE_URL, f"booktutor:{source_file}#{titulo or ''}#{seccion or ''}"))
+
 
 def get_qdrant_client() -> QdrantClient:
-    """Create Qdrant client with optional API key for cloud."""
+    """Create Qdrant client with optional API key for cloud, or the embedded one."""
+    if settings.qdrant_local_path is not None:
+        from app.db.local_qdrant import open_local_client
+
+        return open_local_client(settings.qdrant_local_path)
     return QdrantClient(
         url=settings.qdrant_url,
         api_key=settings.qdrant_api_key,
@@ -25,52 +57,175 @@ def get_qdrant_client() -> QdrantClient:
     )
 
 
-# Singleton client
-qdrant_client = get_qdrant_client()
-
-
 class QdrantService:
     """Service class for Qdrant operations."""
 
-    def __init__(self, client: QdrantClient | None = None):
-        self.client = client or qdrant_client
+    def __init__(
+        self,
+        client: QdrantClient | None = None,
+        storage_mode: StorageMode | None = None,
+        text_store: "ChunkTextStore | None" = None,
+    ):
+        self.client = client or container.qdrant_client
         self.collection_prefix = settings.qdrant_collection_prefix
         self.vector_size = settings.embedding_dimensions
+        self.storage_mode = storage_mode or settings.qdrant_storage_mode
+        self.shared_collection = settings.qdrant_shared_collection
+        self.search_payload = settings.qdrant_search_payload
+        if text_store is None and settings.chunk_text_store == "local":
+            text_store = container.chunk_texts
+        self.text_store = text_store
+
+    @property
+    def is_shared(self) -> bool:
+        return self.storage_mode == "shared"
 
     def _collection_name(self, book_id: str) -> str:
-        """Get full collection name with prefix."""
+        """Get the collection holding a book's chunks."""
+        if self.is_shared:
+            return self.shared_collection
         return f"{self.collection_prefix}{book_id}"
 
+    def _book_filter(self, book_id: str) -> models.Filter:
+        """Filter selecting one book's points in the shared collection."""
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="book_id",
+                    match=models.MatchValue(value=book_id),
+                )
+            ]
+        )
+
+    def _shared_collection_exists(self) -> bool:
+        try:
+            self.client.get_collection(self.shared_collection)
+            return True
+        except MISSING_COLLECTION:
+            return False
+
     def collection_exists(self, book_id: str) -> bool:
-        """Check if a collection exists."""
+        """Check if a book's collection (or partition) exists."""
+        if self.is_shared:
+            return self.count_chunks(book_id) > 0
         try:
             self.client.get_collection(self._collection_name(book_id))
             return True
-        except UnexpectedResponse:
+        except MISSING_COLLECTION:
             return False
 
     def list_collections(self) -> list[str]:
         """List all book collections (without prefix)."""
+        if self.is_shared:
+            return self._list_shared_books()
+
         collections = self.client.get_collections().collections
         prefix = self.collection_prefix
         return [
             c.name[len(prefix):]
             for c in collections
             if c.name.startswith(prefix)
+            and c.name != self.shared_collection
+            and not c.name.endswith(SECTIONS_SUFFIX)
         ]
 
-    def create_collection(self, book_id: str) -> bool:
-        """Create a new collection for a book."""
+    def _list_shared_books(self) -> list[str]:
+        """List books in the shared collection.
+
+        One single-point scroll per book, each excluding the books already
+        found (indexed field), so it touches one point per book whichever
+        files or chunk indexes the book still has.
+        """
+        if not self._shared_collection_exists():
+            return []
+
+        books: list[str] = []
+        while True:
+            records, _ = self.client.scroll(
+                collection_name=self.shared_collection,
+                scroll_filter=models.Filter(
+                    must_not=[
+                        models.FieldCondition(key="book_id", match=models.MatchAny(any=books))
+                    ]
+                ) if books else None,
+                limit=1,
+                with_payload=["book_id"],
+                with_vectors=False,
+            )
+            if not records or not records[0].payload:
+                break
+            books.append(records[0].payload["book_id"])
+        return sorted(books)
+
+    def _create_shared_collection(self, vector_size: int) -> None:
+        """Create the shared multi-tenant collection."""
+        self.client.create_collection(
+            collection_name=self.shared_collection,
+            vectors_config=models.VectorParams(
+                size=vector_size,
+                distance=models.Distance.COSINE,
+            ),
+            # Tenant-style layout: no global HNSW graph (m=0), one graph per
+            # book_id value (payload_m) since every search filters by book.
+            hnsw_config=models.HnswConfigDiff(payload_m=16, m=0),
+            optimizers_config=models.OptimizersConfigDiff(
+                indexing_threshold=10000,
+            ),
+        )
+        for field_name, schema in (
+            ("book_id", models.PayloadSchemaType.KEYWORD),
+            ("source_file", models.PayloadSchemaType.KEYWORD),
+            ("chunk_index", models.PayloadSchemaType.INTEGER),
+            ("section_id", models.PayloadSchemaType.KEYWORD),
+        ):
+            self.client.create_payload_index(
+                collection_name=self.shared_collection,
+                field_name=field_name,
+                field_schema=schema,
+            )
+        logger.info(f"Created shared collection: {self.shared_collection}")
+
+    def get_vector_size(self, book_id: str) -> int | None:
+        """Vector size of the collection holding a book, if it exists."""
+        try:
+            info = self.client.get_collection(self._collection_name(book_id))
+        except MISSING_COLLECTION:
+            return None
+        return info.config.params.vectors.size
+
+    def create_collection(self, book_id: str, vector_size: int | None = None) -> bool:
+        """Create a new collection for a book.
+
+        Args:
+            book_id: Book identifier
+            vector_size: Stored vector size (defaults to embedding_dimensions;
+                smaller when the book's embeddings are reduced)
+        """
         collection_name = self._collection_name(book_id)
+        vector_size = vector_size or self.vector_size
 
         if self.collection_exists(book_id):
-            logger.warning(f"Collection {collection_name} already exists")
+            logger.warning(f"Collection for {book_id} already exists in {collection_name}")
             return False
 
+        if self.is_shared:
+            # Books are partitions of the shared collection; nothing to create
+            # per book beyond the collection itself.
+            if not self._shared_collection_exists():
+                self._create_shared_collection(vector_size)
+            else:
+                existing_size = self.get_vector_size(book_id)
+                if existing_size != vector_size:
+                    raise ValueError(
+                        f"Shared collection {self.shared_collection} stores "
+                        f"{existing_size}-dim vectors, not {vector_size}"
+                    )
+            return True
+
         self.client.create_collection(
             collection_name=collection_name,
             vectors_config=models.VectorParams(
-                size=self.vector_size,
+                size=vector_size,
                 distance=models.Distance.COSINE,
             ),
             # Optimized for search
@@ -90,6 +245,12 @@ class QdrantService:
             field_name="source_file",
             field_schema=models.PayloadSchemaType.KEYWORD,
         )
+        # Second stage of hierarchical search filters chunks by section
+        self.client.create_payload_index(
+            collection_name=collection_name,
+            field_name="section_id",
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
 
         logger.info(f"Created collection: {collection_name}")
         return True
@@ -99,26 +260,77 @@ class QdrantService:
         collection_name = self._collection_name(book_id)
 
         if not self.collection_exists(book_id):
-            logger.warning(f"Collection {collection_name} does not exist")
+            logger.warning(f"Collection for {book_id} does not exist")
             return False
 
+        self.delete_sections(book_id)
+        if self.is_shared:
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(filter=self._book_filter(book_id)),
+                wait=True,
+            )
+            logger.info(f"Deleted {book_id} points from {collection_name}")
+            return True
+
         self.client.delete_collection(collection_name)
         logger.info(f"Deleted collection: {collection_name}")
         return True
 
+    def delete_source_file(
+        self, book_id: str, source_file: str, keep: range | None = None
+    ) -> None:
+        """
+        Delete the chunks of one source file from a book.
+
+        With `keep`, chunks whose chunk_index is in that range (the ones
+        just upserted by a re-sync) stay, and so do the file's sections.
+        """
+        conditions = [
+            models.FieldCondition(
+                key="source_file",
+                match=models.MatchValue(value=source_file),
+            )
+        ]
+        if self.is_shared:
+            conditions.extend(self._book_filter(book_id).must)
+        outside = None
+        if keep is not None:
+            outside = [
+                models.FieldCondition(key="chunk_index", range=models.Range(lt=keep.start)),
+                models.FieldCondition(key="chunk_index", range=models.Range(gte=keep.stop)),
+            ]
+
+        self.client.delete(
+            collection_name=self._collection_name(book_id),
+            points_selector=models.FilterSelector(
+                filter=models.Filter(must=conditions, should=outside)
+            ),
+            wait=True,
+        )
+        if keep is None:
+            self.delete_sections(book_id, source_file)
+            logger.info(f"Deleted chunks of {source_file} from {book_id}")
+
     def insert_chunks(
         self,
         book_id: str,
         chunks: list[dict[str, Any]],
         embeddings: list[list[float]],
+        start_index: int = 0,
     ) -> int:
         """
         Insert document chunks with their embeddings.
 
+        Point IDs derive from (book_id, source_file, chunk_index), so
+        re-inserting the same batch (e.g. a resumed ingestion) overwrites it.
+
         Args:
             book_id: The book identifier
-            chunks: List of dicts with keys: content, source_file, titulo, seccion, subseccion
+            chunks: List of dicts with keys: content, source_file, titulo, seccion,
+                subseccion and optionally text_ref (see ChunkTextStore)
             embeddings: Corresponding embedding vectors
+            start_index: chunk_index of the first chunk (for batched inserts)
 
         Returns:
             Number of points inserted
@@ -130,18 +342,22 @@ class QdrantService:
         now = datetime.now(timezone.utc).isoformat()
 
         points = []
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            point_id = str(uuid4())
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings), start_index):
+            source_file = chunk.get("source_file", "unknown")
+            point_id = str(uuid5(NAMESPACE_URL, f"booktutor:{book_id}/{source_file}#{i}"))
             payload = {
                 "book_id": book_id,
                 "chunk_index": i,
                 "content": chunk["content"],
-                "source_file": chunk.get("source_file", "unknown"),
+                "source_file": source_file,
                 "titulo": chunk.get("titulo"),
                 "seccion": chunk.get("seccion"),
                 "subseccion": chunk.get("subseccion"),
+                "section_id": section_id(source_file, chunk.get("titulo"), chunk.get("seccion")),
                 "created_at": now,
             }
+            if chunk.get("text_ref"):
+                payload["text_ref"] = chunk["text_ref"]
             points.append(
                 models.PointStruct(
                     id=point_id,
@@ -166,6 +382,7 @@ class QdrantService:
         query_vector: list[float],
         limit: int = 6,
         score_threshold: float | None = None,
+        section_ids: list[str] | None = None,
     ) -> list[dict[str, Any]]:
         """
         Search for similar chunks.
@@ -175,36 +392,356 @@ class QdrantService:
             query_vector: The query embedding
             limit: Maximum results to return
             score_threshold: Minimum similarity score (0-1)
+            section_ids: Only search chunks of these sections (see search_sections)
 
         Returns:
-            List of results with score and payload
+            List of results with score and payload; in slim payload mode
+            `content` is None until load_content() fills it
         """
         collection_name = self._collection_name(book_id)
 
+        conditions = list(self._book_filter(book_id).must) if self.is_shared else []
+        if section_ids is not None:
+            conditions.append(
+                models.FieldCondition(key="section_id", match=models.MatchAny(any=section_ids))
+            )
+
         results = self.client.search(
             collection_name=collection_name,
             query_vector=query_vector,
             limit=limit,
+            query_filter=models.Filter(must=conditions) if conditions else None,
             score_threshold=score_threshold,
-            with_payload=True,
+            with_payload=self._search_payload_selector(),
         )
 
-        return [
-            {
-                "id": str(r.id),
-                "score": r.score,
-                "content": r.payload.get("content", ""),
-                "source_file": r.payload.get("source_file"),
-                "titulo": r.payload.get("titulo"),
-                "seccion": r.payload.get("seccion"),
-                "subseccion": r.payload.get("subseccion"),
-                "chunk_index": r.payload.get("chunk_index"),
-            }
-            for r in results
+        return [self._to_result(r) for r in results]
+
+    def _sections_collection_name(self, book_id: str) -> str:
+        return f"{self._collection_name(book_id)}{SECTIONS_SUFFIX}"
+
+    def _sections_filter(self, book_id: str, source_file: str | None = None) -> models.Filter:
+        conditions = list(self._book_filter(book_id).must)
+        if source_file is not None:
+            conditions.append(
+                models.FieldCondition(key="source_file", match=models.MatchValue(value=source_file))
+            )
+        return models.Filter(must=conditions)
+
+    def has_sections(self, book_id: str) -> bool:
+        """Whether the book has a section index (built by build_sections)."""
+        try:
+            return self.client.count(
+                collection_name=self._sections_collection_name(book_id),
+                count_filter=self._book_filter(book_id),
+                exact=False,
+            ).count > 0
+        except MISSING_COLLECTION:
+            return False
+
+    def build_sections(self, book_id: str, source_file: str | None = None) -> int:
+        """
+        (Re)build the section vectors of a book, or of one of its files.
+
+        Chunks are grouped by titulo/seccion and each group's vector is the
+        normalized mean of its chunk vectors, so sections live in the same
+        space as the (possibly reduced) chunk vectors. Chunks stored before
+        chunks carried `section_id` get it added. A file-level rebuild of a
+        book without a section index builds the whole book.
+
+        Returns:
+            Number of sections stored
+        """
+        import numpy as np
+
+        vector_size = self.get_vector_size(book_id)
+        if vector_size is None:
+            return 0
+        sections_collection = self._sections_collection_name(book_id)
+        if not self.has_sections(book_id):
+            source_file = None
+            try:
+                self.client.get_collection(sections_collection)
+            except MISSING_COLLECTION:
+                self.client.create_collection(
+                    collection_name=sections_collection,
+                    vectors_config=models.VectorParams(
+                        size=vector_size, distance=models.Distance.COSINE
+                    ),
+                )
+                for field_name in ("book_id", "source_file"):
+                    self.client.create_payload_index(
+                        collection_name=sections_collection,
+                        field_name=field_name,
+                        field_schema=models.PayloadSchemaType.KEYWORD,
+                    )
+            self.client.create_payload_index(
+                collection_name=self._collection_name(book_id),
+                field_name="section_id",
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+
+        groups: dict[str, dict[str, Any]] = {}
+        untagged: dict[str, list[Any]] = {}
+        for records in self.iter_points(book_id, source_file=source_file):
+            for record in records:
+                payload = record.payload
+                sid = payload.get("section_id")
+                if sid is None:
+                    sid = section_id(
+                        payload["source_file"], payload.get("titulo"), payload.get("seccion")
+                    )
+                    untagged.setdefault(sid, []).append(record.id)
+                group = groups.get(sid)
+                if group is None:
+                    group = groups[sid] = {
+                        "sum": np.zeros(vector_size, dtype=np.float64),
+                        "chunks": 0,
+                        "source_file": payload["source_file"],
+                        "titulo": payload.get("titulo"),
+                        "seccion": payload.get("seccion"),
+                    }
+                group["sum"] += np.asarray(record.vector, dtype=np.float64)
+                group["chunks"] += 1
+
+        for sid, ids in untagged.items():
+            self.client.set_payload(
+                collection_name=self._collection_name(book_id),
+                payload={"section_id": sid},
+                points=ids,
+                wait=True,
+            )
+
+        self._delete_section_points(book_id, source_file)
+        points = []
+        for sid, group in groups.items():
+            vector = group.pop("sum")
+            vector /= max(float(np.linalg.norm(vector)), 1e-12)
+            points.append(
+                models.PointStruct(
+                    id=str(uuid5(NAMESPACE_URL, f"booktutor:{book_id}/section/{sid}")),
+                    vector=vector.tolist(),
+                    payload={"book_id": book_id, "section_id": sid, **group},
+                )
+            )
+        for start in range(0, len(points), 256):
+            self.client.upsert(
+                collection_name=sections_collection,
+                points=points[start:start + 256],
+                wait=True,
+            )
+        logger.info(f"Built {len(points)} section vectors for {book_id}")
+        return len(points)
+
+    def delete_sections(self, book_id: str, source_file: str | None = None) -> None:
+        """Delete a book's section vectors (or one file's)."""
+        if source_file is None and not self.is_shared:
+            try:
+                self.client.delete_collection(self._sections_collection_name(book_id))
+            except MISSING_COLLECTION:
+                pass  # No section index
+            return
+        self._delete_section_points(book_id, source_file)
+
+    def _delete_section_points(self, book_id: str, source_file: str | None) -> None:
+        try:
+            self.client.delete(
+                collection_name=self._sections_collection_name(book_id),
+                points_selector=models.FilterSelector(
+                    filter=self._sections_filter(book_id, source_file)
+                ),
+                wait=True,
+            )
+        except MISSING_COLLECTION:
+            pass  # No section index
+
+    def search_sections(
+        self, book_id: str, query_vector: list[float], limit: int
+    ) -> list[str] | None:
+        """
+        IDs of the sections closest to the query (first hierarchical stage).
+
+        Returns:
+            Section IDs, best first; None if the book has no section index
+        """
+        try:
+            results = self.client.search(
+                collection_name=self._sections_collection_name(book_id),
+                query_vector=query_vector,
+                limit=limit,
+                query_filter=self._book_filter(book_id) if self.is_shared else None,
+                with_payload=["section_id"],
+            )
+        except MISSING_COLLECTION:
+            return None
+        return [r.payload["section_id"] for r in results] or None
+
+    def search_many(
+        self,
+        book_ids: list[str],
+        query_vector: list[float],
+        limit: int = 6,
+        score_threshold: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Search several books with a single query (shared storage mode only).
+
+        Returns:
+            Global top results across the books, best first
+        """
+        if not self.is_shared:
+            raise ValueError("search_many requires the shared storage mode")
+
+        results = self.client.search(
+            collection_name=self.shared_collection,
+            query_vector=query_vector,
+            limit=limit,
+            query_filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="book_id",
+                        match=models.MatchAny(any=book_ids),
+                    )
+                ]
+            ),
+            score_threshold=score_threshold,
+            with_payload=self._search_payload_selector(),
+        )
+        return [self._to_result(r) for r in results]
+
+    def _search_payload_selector(self) -> bool | list[str]:
+        return SLIM_PAYLOAD if self.search_payload == "slim" else True
+
+    def load_content(self, results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Fill in the text of search results returned without it (slim mode).
+
+        Texts come from the local chunk store when it has them, otherwise
+        from one `retrieve` per collection for the remaining points.
+        Results are updated in place and returned.
+        """
+        missing = [r for r in results if r["content"] is None]
+        if self.text_store is not None:
+            for result in missing:
+                if result.get("text_ref"):
+                    result["content"] = self.text_store.read(result["book_id"], result["text_ref"])
+            missing = [r for r in missing if r["content"] is None]
+
+        by_collection: dict[str, list[dict[str, Any]]] = {}
+        for result in missing:
+            by_collection.setdefault(self._collection_name(result["book_id"]), []).append(result)
+        for collection_name, pending in by_collection.items():
+            records = self.client.retrieve(
+                collection_name=collection_name,
+                ids=[r["id"] for r in pending],
+                with_payload=["content"],
+            )
+            contents = {str(r.id): r.payload.get("content", "") for r in records}
+            for result in pending:
+                result["content"] = contents.get(result["id"], "")
+        return results
+
+    def _to_result(self, point: models.ScoredPoint) -> dict[str, Any]:
+        """Flatten a scored point into a search result dict."""
+        return {
+            "id": str(point.id),
+            "score": point.score,
+            "book_id": point.payload.get("book_id"),
+            # None in slim mode: filled in by load_content()
+            "content": point.payload.get("content", None if self.search_payload == "slim" else ""),
+            "source_file": point.payload.get("source_file"),
+            "titulo": point.payload.get("titulo"),
+            "seccion": point.payload.get("seccion"),
+            "subseccion": point.payload.get("subseccion"),
+            "chunk_index": point.payload.get("chunk_index"),
+            "text_ref": point.payload.get("text_ref"),
+        }
+
+    def iter_points(
+        self,
+        book_id: str,
+        batch_size: int = 256,
+        with_vectors: bool = True,
+        source_file: str | None = None,
+        with_payload: bool | list[str] = True,
+    ) -> Iterator[list[models.Record]]:
+        """Scroll through all points of a book (or of one of its files) in batches."""
+        conditions = list(self._book_filter(book_id).must) if self.is_shared else []
+        if source_file is not None:
+            conditions.append(
+                models.FieldCondition(key="source_file", match=models.MatchValue(value=source_file))
+            )
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self._collection_name(book_id),
+                scroll_filter=models.Filter(must=conditions) if conditions else None,
+                limit=batch_size,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=with_vectors,
+            )
+            if records:
+                yield records
+            if offset is None:
+                break
+
+    def text_refs(self, book_id: str) -> dict[str, dict[str, Any]]:
+        """`text_ref` payload of each of a book's chunks that has one, by point ID."""
+        return {
+            str(record.id): record.payload["text_ref"]
+            for records in self.iter_points(
+                book_id, batch_size=1024, with_vectors=False, with_payload=["text_ref"]
+            )
+            for record in records
+            if record.payload.get("text_ref")
+        }
+
+    def set_text_refs(
+        self, book_id: str, refs: dict[str, dict[str, Any]], batch_size: int = 256
+    ) -> None:
+        """Point chunks at new `text_ref`s (see ChunkTextStore.rewrite)."""
+        items = list(refs.items())
+        for start in range(0, len(items), batch_size):
+            self.client.batch_update_points(
+                collection_name=self._collection_name(book_id),
+                update_operations=[
+                    models.SetPayloadOperation(
+                        set_payload=models.SetPayload(payload={"text_ref": ref}, points=[point_id])
+                    )
+                    for point_id, ref in items[start:start + batch_size]
+                ],
+                wait=True,
+            )
+
+    def chunk_index_range(self, book_id: str, source_file: str | None = None) -> range | None:
+        """chunk_index range spanned by a book's (or one file's) chunks, if any."""
+        indexes = [
+            record.payload["chunk_index"]
+            for records in self.iter_points(
+                book_id,
+                batch_size=1024,
+                with_vectors=False,
+                source_file=source_file,
+                with_payload=["chunk_index"],
+            )
+            for record in records
         ]
+        return range(min(indexes), max(indexes) + 1) if indexes else None
 
     def get_collection_info(self, book_id: str) -> dict[str, Any] | None:
         """Get collection statistics."""
+        if self.is_shared:
+            points = self._count_shared(book_id)
+            if not points:
+                return None
+            return {
+                "book_id": book_id,
+                "points_count": points,
+                "vectors_count": points,
+                "status": self.client.get_collection(self.shared_collection).status.value,
+            }
+
         if not self.collection_exists(book_id):
             return None
 
@@ -218,11 +755,29 @@ class QdrantService:
             "status": info.status.value,
         }
 
+    def _count_shared(self, book_id: str) -> int:
+        """Count a book's points in the shared collection."""
+        try:
+            return self.client.count(
+                collection_name=self.shared_collection,
+                count_filter=self._book_filter(book_id),
+                exact=True,
+            ).count
+        except MISSING_COLLECTION:
+            return 0
+
     def count_chunks(self, book_id: str) -> int:
         """Get the number of chunks in a collection."""
+        if self.is_shared:
+            return self._count_shared(book_id)
         info = self.get_collection_info(book_id)
         return info["points_count"] if info else 0
 
 
-# Default service instance
-qdrant_service = QdrantService()
+def __getattr__(name: str) -> Any:
+    # Former module-level singletons, now built lazily by the container
+    if name == "qdrant_client":
+        return container.qdrant_client
+    if name == "qdrant_service":
+        return container.qdrant
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
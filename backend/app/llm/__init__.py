@@ -1,5 +1,14 @@
 # LLM module - provider abstraction
+from typing import Any
+
 from app.llm.base import LLMProvider, get_llm_provider
-from app.llm.ollama import OllamaProvider
 
 __all__ = ["LLMProvider", "get_llm_provider", "OllamaProvider"]
+
+
+def __getattr__(name: str) -> Any:
+    # Imported on first use (pulls in httpx)
+    if name == "OllamaProvider":
+        from app.llm.ollama import OllamaProvider
+        return OllamaProvider
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -80,13 +80,7 @@ def get_llm_provider(provider: str | None = None) -> LLMProvider:
         raise ValueError(f"Unknown LLM provider: {provider}")
 
 
-# Default provider instance
-_default_provider: LLMProvider | None = None
-
-
 def get_default_provider() -> LLMProvider:
-    """Get or create the default LLM provider."""
-    global _default_provider
-    if _default_provider is None:
-        _default_provider = get_llm_provider()
-    return _default_provider
+    """Get or create the default LLM provider (shared via the container)."""
+    from app.core.container import container
+    return container.llm
@@ -0,0 +1,156 @@
+"""
+Circuit breaker for LLM backends.
+Fails calls fast while the backend is down instead of letting each one wait
+for its HTTP timeout, and lets a single trial call through to detect recovery.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """The backend failed repeatedly; calls are rejected until it recovers."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures.
+
+    While open every call raises CircuitOpenError at once. After
+    `reset_seconds` the breaker half-opens: one trial call goes through
+    (the others still fail fast) and closes it again on success or reopens
+    it on failure. Only errors for which `is_failure` returns True count;
+    any other outcome means the backend answered. Thread-safe, so sync
+    calls from worker threads and async calls can share one breaker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_seconds: float,
+        is_failure: Callable[[BaseException], bool] = lambda e: True,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.is_failure = is_failure
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state == CircuitState.OPEN and self._retry_after() <= 0:
+                return CircuitState.HALF_OPEN
+            return self._state
+
+    def _retry_after(self) -> float:
+        return self._opened_at + self.reset_seconds - time.monotonic()
+
+    def before_call(self) -> bool:
+        """Raise if the call must not go through; True if it is the trial call."""
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return False
+            if self._state == CircuitState.OPEN:
+                retry_after = self._retry_after()
+                if retry_after > 0:
+                    raise CircuitOpenError(self.name, retry_after)
+                self._state = CircuitState.HALF_OPEN
+                logger.info(f"{self.name} circuit half-open, sending a trial call")
+            if self._trial_in_flight:
+                raise CircuitOpenError(self.name, self.reset_seconds)
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CircuitState.CLOSED:
+                logger.info(f"{self.name} circuit closed")
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == CircuitState.HALF_OPEN or (
+                self._state == CircuitState.CLOSED and self._failures >= self.failure_threshold
+            ):
+                logger.warning(
+                    f"{self.name} circuit open after {self._failures} failures,"
+                    f" failing fast for {self.reset_seconds:.0f}s"
+                )
+                self._state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+
+    def mark_unhealthy(self) -> None:
+        """
+        Open now (e.g. a health probe failed), or restart the open period.
+
+        Unlike record_failure this is not a call outcome: it leaves the
+        failure count and any trial call in flight alone.
+        """
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                logger.warning(
+                    f"{self.name} health check failed,"
+                    f" failing fast for {self.reset_seconds:.0f}s"
+                )
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+    def mark_healthy(self) -> None:
+        """Forget earlier failures and, if open, half-open now instead of waiting."""
+        with self._lock:
+            self._failures = 0
+            if self._state == CircuitState.OPEN:
+                self._opened_at = time.monotonic() - self.reset_seconds
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Run a block as one call through the breaker."""
+        trial = self.before_call()
+        try:
+            yield
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            # Cancelled or closed early: no verdict, free the trial slot
+            if trial:
+                with self._lock:
+                    self._trial_in_flight = False
+            raise
+        else:
+            self.record_success()
+
+    def snapshot(self) -> dict:
+        state = self.state
+        with self._lock:
+            retry_after = max(0.0, self._retry_after()) if state == CircuitState.OPEN else 0.0
+            failures = self._failures
+        return {"state": state.value, "failures": failures, "retry_after": round(retry_after, 1)}
@@ -2,13 +2,26 @@
 Ollama LLM provider for local development.
 Uses Ollama API for both chat and embeddings.
 """
+import asyncio
 import re
 from typing import AsyncIterator, Iterator
 
 import httpx
 
 from app.core.config import settings
+from app.core.metrics import metrics
 from app.llm.base import LLMProvider
+from app.llm.circuit import CircuitBreaker
+from app.llm.scheduler import FairScheduler
+
+NO_THINK = "/no_think"
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Errors that mean Ollama is down or broken (not a bad request)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
 
 
 class OllamaProvider(LLMProvider):
@@ -25,6 +38,20 @@ class OllamaProvider(LLMProvider):
         self.embedding_model = embedding_model or settings.embedding_model
         self.default_temperature = settings.llm_temperature
         self.default_max_tokens = settings.llm_max_tokens
+        self.keep_alive = settings.ollama_keep_alive
+        self.num_ctx = settings.llm_num_ctx
+        self.embedding_batch_size = settings.embedding_batch_size
+        self.timeout = httpx.Timeout(settings.llm_timeout, connect=settings.llm_connect_timeout)
+        self.embed_timeout = httpx.Timeout(60.0, connect=settings.llm_connect_timeout)
+        # Shared by every call (and the health prober) of this provider
+        self.breaker = CircuitBreaker(
+            "Ollama",
+            settings.llm_circuit_failure_threshold,
+            settings.llm_circuit_reset_seconds,
+            is_failure=is_backend_failure,
+        )
+        # Generation slots, shared round-robin by the clients of this worker
+        self.scheduler = FairScheduler(settings.llm_max_concurrent_generations)
 
     def _strip_thinking(self, text: str) -> str:
         """Remove <think>...</think> blocks from Qwen 3 output."""
@@ -34,12 +61,37 @@ class OllamaProvider(LLMProvider):
         self, prompt: str, system_prompt: str | None
     ) -> list[dict[str, str]]:
         """Build message list for chat API."""
-        messages = []
+        # /no_think disables Qwen 3 verbose thinking. It goes at the end of the
+        # (static) system prompt so the message prefix stays byte-identical
+        # across requests and Ollama can reuse its KV cache for it.
         if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        # Add /no_think for Qwen 3 to disable verbose thinking
-        messages.append({"role": "user", "content": f"/no_think\n{prompt}"})
-        return messages
+            return [
+                {"role": "system", "content": f"{system_prompt}\n{NO_THINK}"},
+                {"role": "user", "content": prompt},
+            ]
+        return [{"role": "user", "content": f"{NO_THINK}\n{prompt}"}]
+
+    def _chat_payload(
+        self,
+        messages: list[dict[str, str]],
+        stream: bool,
+        temperature: float | None,
+        max_tokens: int | None,
+    ) -> dict:
+        """Build the /api/chat request body."""
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            # Keep the model (and its prompt KV cache) resident between requests
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": temperature or self.default_temperature,
+                "num_predict": max_tokens or self.default_max_tokens,
+                # A fixed context size avoids runner reloads that drop the cache
+                "num_ctx": self.num_ctx,
+            },
+        }
 
     def generate(
         self,
@@ -51,18 +103,10 @@ class OllamaProvider(LLMProvider):
         """Generate a response synchronously."""
         messages = self._build_messages(prompt, system_prompt)
 
-        with httpx.Client(timeout=120.0) as client:
+        with self.breaker.guard(), httpx.Client(timeout=self.timeout) as client:
             response = client.post(
                 f"{self.base_url}/api/chat",
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "stream": False,
-                    "options": {
-                        "temperature": temperature or self.default_temperature,
-                        "num_predict": max_tokens or self.default_max_tokens,
-                    },
-                },
+                json=self._chat_payload(messages, False, temperature, max_tokens),
             )
             response.raise_for_status()
             content = response.json()["message"]["content"]
@@ -78,22 +122,15 @@ class OllamaProvider(LLMProvider):
         """Generate a response asynchronously."""
         messages = self._build_messages(prompt, system_prompt)
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{self.base_url}/api/chat",
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "stream": False,
-                    "options": {
-                        "temperature": temperature or self.default_temperature,
-                        "num_predict": max_tokens or self.default_max_tokens,
-                    },
-                },
-            )
-            response.raise_for_status()
-            content = response.json()["message"]["content"]
-            return self._strip_thinking(content)
+        with self.breaker.guard():
+            async with self.scheduler.slot(), httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(
+                    f"{self.base_url}/api/chat",
+                    json=self._chat_payload(messages, False, temperature, max_tokens),
+                )
+                response.raise_for_status()
+                content = response.json()["message"]["content"]
+        return self._strip_thinking(content)
 
     def stream(
         self,
@@ -105,19 +142,11 @@ class OllamaProvider(LLMProvider):
         """Stream response tokens synchronously."""
         messages = self._build_messages(prompt, system_prompt)
 
-        with httpx.Client(timeout=120.0) as client:
+        with self.breaker.guard(), httpx.Client(timeout=self.timeout) as client:
             with client.stream(
                 "POST",
                 f"{self.base_url}/api/chat",
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "stream": True,
-                    "options": {
-                        "temperature": temperature or self.default_temperature,
-                        "num_predict": max_tokens or self.default_max_tokens,
-                    },
-                },
+                json=self._chat_payload(messages, True, temperature, max_tokens),
             ) as response:
                 response.raise_for_status()
                 buffer = ""
@@ -155,65 +184,82 @@ class OllamaProvider(LLMProvider):
         temperature: float | None = None,
         max_tokens: int | None = None,
     ) -> AsyncIterator[str]:
-        """Stream response tokens asynchronously."""
+        """Stream response tokens asynchronously.
+
+        Closing the iterator (or cancelling the task consuming it) closes the
+        HTTP stream, and Ollama stops generating when its client goes away.
+        """
         messages = self._build_messages(prompt, system_prompt)
+        payload = self._chat_payload(messages, True, temperature, max_tokens)
+        received = 0
+        done = False
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/api/chat",
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "stream": True,
-                    "options": {
-                        "temperature": temperature or self.default_temperature,
-                        "num_predict": max_tokens or self.default_max_tokens,
-                    },
-                },
-            ) as response:
-                response.raise_for_status()
-                buffer = ""
-                in_thinking = False
+        try:
+            with self.breaker.guard():
+                async with self.scheduler.slot(), httpx.AsyncClient(
+                    timeout=self.timeout
+                ) as client, client.stream(
+                    "POST", f"{self.base_url}/api/chat", json=payload
+                ) as response:
+                    response.raise_for_status()
+                    buffer = ""
+                    in_thinking = False
 
-                async for line in response.aiter_lines():
-                    if line:
-                        import json
-                        data = json.loads(line)
-                        if "message" in data and "content" in data["message"]:
-                            chunk = data["message"]["content"]
-                            buffer += chunk
+                    async for line in response.aiter_lines():
+                        if line:
+                            import json
+                            data = json.loads(line)
+                            done = data.get("done", False)
+                            if "message" in data and "content" in data["message"]:
+                                chunk = data["message"]["content"]
+                                received += 1
+                                buffer += chunk
 
-                            if "<think>" in buffer:
-                                in_thinking = True
-                            if "</think>" in buffer:
-                                in_thinking = False
-                                buffer = re.sub(
-                                    r"<think>.*?</think>",
-                                    "",
-                                    buffer,
-                                    flags=re.DOTALL,
-                                )
+                                if "<think>" in buffer:
+                                    in_thinking = True
+                                if "</think>" in buffer:
+                                    in_thinking = False
+                                    buffer = re.sub(
+                                        r"<think>.*?</think>",
+                                        "",
+                                        buffer,
+                                        flags=re.DOTALL,
+                                    )
 
-                            if not in_thinking and buffer:
-                                yield buffer
-                                buffer = ""
+                                if not in_thinking and buffer:
+                                    yield buffer
+                                    buffer = ""
+        except (GeneratorExit, asyncio.CancelledError):
+            if not done:
+                # The reader went away mid-answer: the rest is never generated
+                metrics.inc("llm_streams_cancelled_total")
+                metrics.inc("llm_stream_tokens_before_cancel_total", received)
+                metrics.inc(
+                    "llm_stream_tokens_saved_total",
+                    max(0, payload["options"]["num_predict"] - received),
+                )
+            raise
+
+    def _embed_batches(self, texts: list[str]) -> Iterator[list[str]]:
+        """Split texts into batches for the /api/embed endpoint."""
+        for start in range(0, len(texts), self.embedding_batch_size):
+            yield texts[start:start + self.embedding_batch_size]
 
     def embed(self, texts: list[str]) -> list[list[float]]:
         """Generate embeddings for texts."""
         embeddings = []
 
-        with httpx.Client(timeout=60.0) as client:
-            for text in texts:
+        with self.breaker.guard(), httpx.Client(timeout=self.embed_timeout) as client:
+            for batch in self._embed_batches(texts):
                 response = client.post(
-                    f"{self.base_url}/api/embeddings",
+                    f"{self.base_url}/api/embed",
                     json={
                         "model": self.embedding_model,
-                        "prompt": text,
+                        "input": batch,
                     },
                 )
                 response.raise_for_status()
-                embeddings.append(response.json()["embedding"])
+                embeddings.extend(response.json()["embeddings"])
 
         return embeddings
 
@@ -221,17 +267,18 @@ class OllamaProvider(LLMProvider):
         """Generate embeddings asynchronously."""
         embeddings = []
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            for text in texts:
-                response = await client.post(
-                    f"{self.base_url}/api/embeddings",
-                    json={
-                        "model": self.embedding_model,
-                        "prompt": text,
-                    },
-                )
-                response.raise_for_status()
-                embeddings.append(response.json()["embedding"])
+        with self.breaker.guard():
+            async with httpx.AsyncClient(timeout=self.embed_timeout) as client:
+                for batch in self._embed_batches(texts):
+                    response = await client.post(
+                        f"{self.base_url}/api/embed",
+                        json={
+                            "model": self.embedding_model,
+                            "input": batch,
+                        },
+                    )
+                    response.raise_for_status()
+                    embeddings.extend(response.json()["embeddings"])
 
         return embeddings
 
@@ -0,0 +1,91 @@
+"""
+Fair scheduling of LLM generations.
+Caps the generations a worker sends to the backend at once and hands free
+slots to waiting clients in turn, so a client with many requests in flight
+slows down without starving the others.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator
+
+from app.core.metrics import metrics
+
+# Who the current request is for; set per request by the RateLimit dependency
+current_client: ContextVar[str] = ContextVar("llm_client", default="anonymous")
+
+
+class FairScheduler:
+    """
+    At most `slots` generations at once, granted round-robin across clients.
+
+    Each client has its own FIFO of waiting generations; when a slot frees
+    up, the client at the front of the rotation gets it and moves to the
+    back. With `slots <= 0` nothing is limited. Not thread-safe: use it from
+    one event loop.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._active = 0
+        self._waiting: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+
+    @asynccontextmanager
+    async def slot(self, client: str | None = None) -> AsyncIterator[None]:
+        """Hold a generation slot for the block."""
+        if self.slots <= 0:
+            yield
+            return
+        await self._acquire(client or current_client.get())
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, client: str) -> None:
+        if self._active < self.slots and not self._waiting:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(client, deque()).append(future)
+        metrics.inc("llm_generations_queued_total")
+        start = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # Granted as we were cancelled: pass it on
+            else:
+                self._forget(client, future)
+            raise
+        finally:
+            metrics.inc("llm_generation_queue_seconds_total", time.monotonic() - start)
+
+    def _forget(self, client: str, future: asyncio.Future) -> None:
+        queue = self._waiting.get(client)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self._waiting[client]
+
+    def _release(self) -> None:
+        self._active -= 1
+        while self._active < self.slots and self._waiting:
+            client, queue = self._waiting.popitem(last=False)
+            future = queue.popleft()
+            if queue:
+                self._waiting[client] = queue  # Back of the rotation
+            if not future.done():
+                self._active += 1
+                future.set_result(None)
+
+    def snapshot(self) -> dict:
+        return {
+            "slots": self.slots,
+            "active": self._active,
+            "waiting": sum(len(q) for q in self._waiting.values()),
+            "waiting_clients": len(self._waiting),
+        }
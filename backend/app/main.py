@@ -2,6 +2,7 @@
 BookTutor Backend - FastAPI Application.
 Educational platform with RAG-based AI tutoring.
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -10,15 +11,17 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.core.container import container
+from app.core.loop_monitor import LoopMonitor
 from app.services.auto_ingest import scan_and_ingest_subjects
+from app.services.docs_watcher import DocsWatcher
+from app.services.leader import get_leader_election
 
 logger = logging.getLogger(__name__)
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan - runs on startup and shutdown."""
-    # Startup: Auto-ingest subjects from docs/
+def auto_ingest() -> None:
+    """Ingest subjects from docs/ that are not in Qdrant yet."""
     logger.info("Starting auto-ingest of subjects...")
     try:
         results = scan_and_ingest_subjects()
@@ -30,10 +33,83 @@ async def lifespan(app: FastAPI):
             logger.info("No subjects found in docs/ directory")
     except Exception as e:
         logger.error(f"Auto-ingest failed: {e}")
-    
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan - runs on startup and shutdown."""
+    # Startup: report event-loop stalls, startup ingestion included
+    loop_monitor = None
+    if settings.loop_stall_threshold_ms > 0:
+        loop_monitor = LoopMonitor()
+        await loop_monitor.start()
+
+    # Cached LLM health (every worker has its own circuit breaker)
+    await container.health.start()
+
+    # With several workers/nodes only the elected leader ingests
+    election = get_leader_election()
+    try:
+        await asyncio.to_thread(election.try_acquire)
+    except Exception as e:
+        logger.error(f"Leader election failed, not ingesting on startup: {e}")
+
+    if not election.is_leader:
+        logger.info("Another worker leads startup ingestion; serving existing collections")
+        wait_seconds = settings.ingest_follower_wait_seconds
+        if wait_seconds > 0 and not await election.wait_ready(wait_seconds):
+            logger.warning(f"Leader not ready after {wait_seconds}s; serving anyway")
+
+    # Embedded Qdrant: the leader is its single writer, the other workers
+    # serve read-only replicas of its files. Replaces any client (and the
+    # services on it) resolved before the election knew the role.
+    local_qdrant = settings.qdrant_local_path is not None
+    if local_qdrant:
+        from app.db.local_qdrant import open_local_client
+        container.replace_qdrant_client(
+            lambda: open_local_client(settings.qdrant_local_path, writer=election.is_leader)
+        )
+
+    # wait_ready() may have taken over from a leader that went away
+    if election.is_leader:
+        auto_ingest()
+        election.mark_ready()
+
+    # Ingest job queue (the leader resumes jobs interrupted by the last shutdown;
+    # with embedded Qdrant only the leader runs jobs, the others just store them)
+    await container.ingest_jobs.start(
+        recover=election.is_leader,
+        run_jobs=election.is_leader or not local_qdrant,
+        poll_seconds=settings.qdrant_local_refresh_seconds if local_qdrant else 0,
+    )
+
+    # Hot re-ingestion of edited docs (optional, leader only)
+    watcher = None
+    if settings.docs_watch_enabled and election.is_leader:
+        watcher = DocsWatcher()
+        await watcher.start()
+
+    # Off-peak precomputed answers (optional, leader only)
+    warmup = None
+    if settings.answer_warmup_enabled and election.is_leader:
+        from app.services.answer_warmup import AnswerWarmup
+        warmup = asyncio.create_task(AnswerWarmup().run())
+
     yield
-    
+
     # Shutdown
+    if warmup is not None:
+        warmup.cancel()
+        await asyncio.gather(warmup, return_exceptions=True)
+    if watcher is not None:
+        await watcher.stop()
+    await container.ingest_jobs.stop()
+    if settings.chunk_text_store == "local":
+        container.chunk_texts.close()
+    election.release()
+    await container.health.stop()
+    if loop_monitor is not None:
+        await loop_monitor.stop()
     logger.info("Shutting down BookTutor API")
 
 
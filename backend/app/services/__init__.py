@@ -1,5 +1,7 @@
 # Services module
-from app.services.rag_service import RAGService, rag_service
-from app.services.ingest_service import IngestService, ingest_service
+# Service instances are built lazily by app.core.container
+from app.services.document_cache import DocumentCache, document_cache
+from app.services.ingest_service import IngestService
+from app.services.rag_service import RAGService
 
-__all__ = ["RAGService", "rag_service", "IngestService", "ingest_service"]
+__all__ = ["DocumentCache", "IngestService", "RAGService", "document_cache"]
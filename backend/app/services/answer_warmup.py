@@ -0,0 +1,161 @@
+"""
+Answer warm-up.
+Generates answers to anticipated questions (one per section heading of each
+subject) off-peak and stores them for RAGService to serve without generating.
+"""
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.container import container
+from app.db.answer_store import AnswerStore
+from app.services.ingest_service import ChunkMetadata, IngestService
+from app.services.rag_service import NO_RESULTS_ANSWER, RAGService
+
+logger = logging.getLogger(__name__)
+
+QUESTION_TEMPLATES = {
+    "seccion": "¿Qué es {tema}?",
+    "subseccion": "Explica {tema}",
+}
+
+
+def anticipated_questions(chunks: Iterable[ChunkMetadata], limit: int) -> list[str]:
+    """One question per distinct section/subsection heading, in document order."""
+    questions: list[str] = []
+    seen: set[str] = set()
+    for chunk in chunks:
+        for level in ("seccion", "subseccion"):
+            heading = getattr(chunk, level)
+            if not heading or heading.lower() in seen:
+                continue
+            seen.add(heading.lower())
+            questions.append(QUESTION_TEMPLATES[level].format(tema=heading.strip()))
+            if len(questions) >= limit:
+                return questions
+    return questions
+
+
+def parse_hours(hours: str) -> tuple[int, int] | None:
+    """'1-7' -> (1, 7); empty means any hour. The window may wrap midnight."""
+    if not hours.strip():
+        return None
+    start, _, end = hours.partition("-")
+    return int(start) % 24, int(end or start) % 24
+
+
+def in_window(window: tuple[int, int] | None, hour: int) -> bool:
+    if window is None:
+        return True
+    start, end = window
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class AnswerWarmup:
+    """
+    Background job that fills the answer store.
+
+    Generates one answer at a time, only inside ANSWER_WARMUP_HOURS and
+    after ANSWER_WARMUP_IDLE_SECONDS without live questions on any worker of
+    this host (ANSWER_WARMUP_ACTIVITY_FILE), pausing
+    ANSWER_WARMUP_INTERVAL_SECONDS between answers. Traffic served by other
+    hosts is only seen if they share that file, so with several replicas on
+    one model server the warm-up can still overlap their live questions.
+    Answers are tied to the source fingerprint of the subject; stale ones are
+    replaced on the next pass.
+    """
+
+    def __init__(
+        self,
+        rag: RAGService | None = None,
+        ingest: IngestService | None = None,
+        store: AnswerStore | None = None,
+        respect_schedule: bool = True,
+    ):
+        self.rag = rag or container.rag
+        self.ingest = ingest or container.ingest
+        self.store = store or container.answers
+        self.respect_schedule = respect_schedule
+        self.window = parse_hours(settings.answer_warmup_hours)
+        self.idle_seconds = settings.answer_warmup_idle_seconds
+        self.interval = settings.answer_warmup_interval_seconds
+        self.max_questions = settings.answer_warmup_max_questions
+
+    def _can_run(self) -> bool:
+        if not self.respect_schedule:
+            return True
+        idle = min(
+            time.monotonic() - self.rag.last_live_request, self.rag.activity.idle_seconds()
+        )
+        return idle >= self.idle_seconds and in_window(self.window, datetime.now().hour)
+
+    async def _wait_until_allowed(self) -> None:
+        while not self._can_run():
+            await asyncio.sleep(min(self.idle_seconds, 60.0) or 1.0)
+
+    def _plan_book(self, book_id: str, book_dir: Path) -> tuple[str, list[str]] | None:
+        """Drop stale answers; return the fingerprint and the questions still to answer."""
+        if not book_dir.is_dir() or not self.ingest.qdrant.collection_exists(book_id):
+            return None
+
+        fingerprint = self.ingest.source_fingerprint(book_dir)
+        removed = self.store.delete(book_id, keep_fingerprint=fingerprint)
+        if removed:
+            logger.info(f"Dropped {removed} stale precomputed answers for {book_id}")
+
+        done = self.store.questions(book_id, fingerprint)
+        questions = anticipated_questions(self.ingest._iter_chunks(book_dir), self.max_questions)
+        return fingerprint, [q for q in questions if q not in done]
+
+    async def warm_book(self, book_id: str) -> int:
+        """Answer the book's anticipated questions that are not stored yet."""
+        book_dir = settings.docs_path / book_id
+        # Chunking the docs, hashing them and the SQLite store all block:
+        # keep them off the event loop that serves live requests
+        plan = await asyncio.to_thread(self._plan_book, book_id, book_dir)
+        if plan is None:
+            return 0
+        fingerprint, pending = plan
+
+        stored = 0
+        for question in pending:
+            await self._wait_until_allowed()
+            embedding = (await self.rag.llm.aembed([question]))[0]
+            response = await self.rag.agenerate_answer(book_id, question)
+            if not response.sources or response.answer == NO_RESULTS_ANSWER:
+                continue  # Nothing in the docs for it; let live questions decide
+            await asyncio.to_thread(
+                self.store.add,
+                book_id,
+                fingerprint,
+                question,
+                embedding,
+                response.answer,
+                [asdict(source) for source in response.sources],
+                response.model_used,
+            )
+            stored += 1
+            await asyncio.sleep(self.interval)
+
+        if pending:
+            logger.info(f"Precomputed {stored}/{len(pending)} answers for {book_id}")
+        return stored
+
+    async def run(self) -> None:
+        """Warm every ingested book, then look for new work every poll interval."""
+        while True:
+            for book_id in await asyncio.to_thread(self.ingest.list_books):
+                try:
+                    await self.warm_book(book_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception(f"Answer warm-up failed for {book_id}")
+            await asyncio.sleep(settings.answer_warmup_poll_seconds)
@@ -3,10 +3,11 @@ Auto-ingest service for automatic RAG initialization.
 Scans docs/ directory and creates RAG collections for each subject folder.
 """
 import logging
-from pathlib import Path
 
 from app.core.config import settings
-from app.services.ingest_service import ingest_service, IngestStatus
+from app.core.container import container
+from app.services.index_snapshot import IndexSnapshots
+from app.services.ingest_service import IngestStatus
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,8 @@ def scan_and_ingest_subjects() -> dict[str, dict]:
         docs_path.mkdir(parents=True, exist_ok=True)
         return results
     
+    ingest_service = container.ingest
+
     # Find all subdirectories with .md files
     for subject_dir in docs_path.iterdir():
         if not subject_dir.is_dir():
@@ -58,9 +61,18 @@ def scan_and_ingest_subjects() -> dict[str, dict]:
             }
             continue
         
+        # Load a prebuilt snapshot of the same docs instead of re-embedding
+        result = None
+        if settings.index_snapshot_restore:
+            try:
+                result = IndexSnapshots(ingest_service).restore(slug, subject_dir)
+            except Exception:
+                logger.exception(f"Restoring a snapshot of {slug} failed, ingesting instead")
+
         # Ingest the subject
-        logger.info(f"Ingesting subject: {slug}")
-        result = ingest_service.ingest_book(slug, subject_dir)
+        if result is None:
+            logger.info(f"Ingesting subject: {slug}")
+            result = ingest_service.ingest_book(slug, subject_dir)
         
         results[slug] = {
             "status": result.status.value,
@@ -0,0 +1,141 @@
+"""
+Watcher for the docs/ directory.
+Picks up added, edited and removed markdown files while the API is running
+and re-ingests only the touched files of each subject.
+"""
+import asyncio
+import logging
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.container import container
+from app.services.document_cache import document_cache
+from app.services.ingest_service import IngestService, IngestStatus
+
+try:
+    from watchfiles import awatch
+except ImportError:  # Optional: fall back to mtime polling
+    awatch = None
+
+logger = logging.getLogger(__name__)
+
+
+class DocsWatcher:
+    """
+    Watches docs/<subject>/*.md and re-ingests changed files.
+
+    File events are grouped per subject and debounced: a subject is synced
+    once no new event has arrived for `debounce_seconds`, so an author
+    copying twenty files triggers one sync, not twenty. Syncs run one at a
+    time in a worker thread.
+    """
+
+    def __init__(
+        self,
+        ingest: IngestService | None = None,
+        docs_path: Path | None = None,
+        debounce_seconds: float | None = None,
+        poll_interval: float | None = None,
+    ):
+        self._ingest = ingest
+        self.docs_path = docs_path or settings.docs_path
+        self.debounce_seconds = debounce_seconds or settings.docs_watch_debounce_seconds
+        self.poll_interval = poll_interval or settings.docs_watch_poll_interval
+        self._pending: dict[str, set[str]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._syncs: set[asyncio.Task] = set()
+        self._sync_lock = asyncio.Lock()
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ingest(self) -> IngestService:
+        return self._ingest or container.ingest
+
+    async def start(self) -> None:
+        """Start watching in the background."""
+        self.docs_path.mkdir(parents=True, exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+        mode = "inotify" if awatch is not None else "polling"
+        logger.info(f"Watching {self.docs_path} for changes ({mode})")
+
+    async def stop(self) -> None:
+        """Stop watching; pending debounced syncs are dropped."""
+        self._stop.set()
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await asyncio.gather(*self._syncs, return_exceptions=True)
+
+    async def _run(self) -> None:
+        if awatch is not None:
+            async for changes in awatch(self.docs_path, stop_event=self._stop):
+                for _, path in changes:
+                    self._on_change(Path(path))
+        else:
+            await self._poll()
+
+    def _snapshot(self) -> dict[Path, tuple[int, int]]:
+        """(mtime, size) of every subject markdown file."""
+        snapshot = {}
+        for path in self.docs_path.glob("*/*.md"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    async def _poll(self) -> None:
+        previous = await asyncio.to_thread(self._snapshot)
+        while not self._stop.is_set():
+            await asyncio.sleep(self.poll_interval)
+            current = await asyncio.to_thread(self._snapshot)
+            for path in previous.keys() | current.keys():
+                if previous.get(path) != current.get(path):
+                    self._on_change(path)
+            previous = current
+
+    def _on_change(self, path: Path) -> None:
+        """Record a changed path and (re)arm its subject's debounce timer."""
+        try:
+            parts = path.relative_to(self.docs_path).parts
+        except ValueError:
+            return
+        if not parts or parts[0].startswith("."):
+            return
+
+        slug = parts[0]
+        pending = self._pending.setdefault(slug, set())
+        if len(parts) == 2 and parts[1].endswith(".md"):
+            pending.add(parts[1])
+        elif len(parts) != 1:
+            return  # Not a subject folder or a markdown file in one
+
+        timer = self._timers.pop(slug, None)
+        if timer is not None:
+            timer.cancel()
+        self._timers[slug] = asyncio.get_running_loop().call_later(
+            self.debounce_seconds, self._flush, slug
+        )
+
+    def _flush(self, slug: str) -> None:
+        self._timers.pop(slug, None)
+        filenames = sorted(self._pending.pop(slug, set()))
+        task = asyncio.create_task(self._sync(slug, filenames))
+        self._syncs.add(task)
+        task.add_done_callback(self._syncs.discard)
+
+    async def _sync(self, slug: str, filenames: list[str]) -> None:
+        async with self._sync_lock:
+            logger.info(f"Docs changed in {slug}: {', '.join(filenames) or '(folder)'}")
+            result = await asyncio.to_thread(self.ingest.sync_files, slug, filenames)
+            document_cache.invalidate(slug)
+
+            if result.status == IngestStatus.ERROR:
+                logger.error(f"Hot re-ingestion of {slug} failed: {result.error}")
+            else:
+                logger.info(f"Hot re-ingestion of {slug}: {result.chunks_count} chunks")
@@ -0,0 +1,330 @@
+"""
+In-memory cache for subject documents served by the reader endpoint.
+Keeps decoded content, title, heading index, ETag and pre-encoded
+(optionally compressed) response bodies, invalidated when the file's
+mtime or size changes. Bounded by entry count and by the bytes held.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: fall back to gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Headings indexed in the table of contents (#, ##, ###)
+TOC_HEADING_RE = re.compile(rb"^(#{1,3})\s+(.+?)\s*#*\s*$")
+FENCE_RE = re.compile(rb"^\s*(```|~~~)")
+
+
+@dataclass
+class TocEntry:
+    """A heading and the byte range of its section (up to the next heading
+    of the same or higher level)."""
+    anchor: str
+    title: str
+    level: int
+    start: int
+    end: int
+
+
+def _anchor(title: str) -> str:
+    """GitHub-style anchor: lowercase ASCII, spaces to dashes."""
+    ascii_title = (
+        unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode("ascii")
+    )
+    ascii_title = re.sub(r"[^\w\s-]", "", ascii_title.lower()).strip()
+    return re.sub(r"[\s_]+", "-", ascii_title)
+
+
+def build_toc(raw: bytes) -> list[TocEntry]:
+    """
+    Index #, ## and ### headings of a markdown document in one pass.
+
+    Lines inside fenced code blocks are skipped (comments in code samples
+    look like headings). Notion-style **bold** markers are stripped.
+    """
+    entries: list[TocEntry] = []
+    seen_anchors: dict[str, int] = {}
+    open_entries: list[TocEntry] = []  # Stack of sections still being extended
+    in_fence = False
+    offset = 0
+
+    for line in raw.splitlines(keepends=True):
+        line_start = offset
+        offset += len(line)
+
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+
+        match = TOC_HEADING_RE.match(line.rstrip(b"\r\n"))
+        if not match:
+            continue
+
+        level = len(match.group(1))
+        title = match.group(2).decode("utf-8").strip()
+        if title.startswith("**") and title.endswith("**") and len(title) > 4:
+            title = title[2:-2].strip()  # Same rule as the chunker's seccion
+
+        # This heading closes every open section of the same or deeper level
+        while open_entries and open_entries[-1].level >= level:
+            open_entries.pop().end = line_start
+
+        anchor = _anchor(title) or "section"
+        count = seen_anchors.get(anchor, 0)
+        seen_anchors[anchor] = count + 1
+        if count:
+            anchor = f"{anchor}-{count}"
+
+        entry = TocEntry(anchor=anchor, title=title, level=level, start=line_start, end=len(raw))
+        entries.append(entry)
+        open_entries.append(entry)
+
+    return entries
+
+
+def _extract_title(content: str, filename: str) -> str:
+    """Title from a leading markdown header, else the filename stem."""
+    first_line = content.split("\n", 1)[0]
+    if first_line.startswith("#"):
+        return first_line.lstrip("# ").strip()
+    return filename.replace(".md", "")
+
+
+@dataclass
+class CachedDocument:
+    """A loaded document and its ready-to-send response bodies."""
+    slug: str
+    filename: str
+    mtime_ns: int
+    size: int
+    raw: bytes
+    content: str
+    title: str
+    toc: list[TocEntry]
+    etag: str
+    checked_at: float
+    _bodies: dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    @property
+    def body(self) -> bytes:
+        """JSON response body (identity encoding)."""
+        if "identity" not in self._bodies:
+            self._bodies["identity"] = json.dumps(
+                {
+                    "content": self.content,
+                    "title": self.title,
+                    "filename": self.filename,
+                    "slug": self.slug,
+                },
+                ensure_ascii=False,
+            ).encode("utf-8")
+        return self._bodies["identity"]
+
+    def cached_body(self, encoding: str) -> bytes | None:
+        """The body in this content-coding if it is already computed."""
+        return self._bodies.get(encoding if encoding in ("br", "gzip") else "identity")
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held: raw file, decoded text and bodies."""
+        return len(self.raw) + sys.getsizeof(self.content) + sum(map(len, self._bodies.values()))
+
+    def compress(self, encoding: str) -> bytes:
+        """The body in the given content-coding, computed without storing it."""
+        if encoding == "br":
+            return brotli.compress(self.body, quality=5)
+        if encoding == "gzip":
+            return gzip.compress(self.body, compresslevel=6)
+        return self.body
+
+    def encoded_body(self, encoding: str) -> bytes:
+        """Response body in the given content-coding (computed once)."""
+        body = self.cached_body(encoding)
+        if body is None:
+            body = self._bodies[encoding] = self.compress(encoding)
+        return body
+
+    def find_section(self, section_id: str) -> TocEntry | None:
+        """Find a TOC entry by anchor, or by heading title (case-insensitive)."""
+        for entry in self.toc:
+            if entry.anchor == section_id:
+                return entry
+        wanted = section_id.strip().casefold()
+        for entry in self.toc:
+            if entry.title.casefold() == wanted:
+                return entry
+        return None
+
+    def section_text(self, entry: TocEntry) -> str:
+        """Slice a section out of the document by its byte offsets."""
+        return self.raw[entry.start:entry.end].decode("utf-8")
+
+    def etag_for(self, encoding: str) -> str:
+        """Strong ETag for a representation (differs per content-coding)."""
+        if encoding == "identity":
+            return f'"{self.etag}"'
+        return f'"{self.etag}-{encoding}"'
+
+
+class DocumentCache:
+    """
+    LRU cache of subject documents keyed by (slug, filename).
+
+    Evicts least recently used documents beyond `max_entries` or once the
+    documents (with their encoded bodies) hold more than `max_bytes`; a
+    document larger than the whole budget is served but not kept. `get()`
+    and `encoded_body()` may read files and compress: async callers run
+    them in a thread, after `cached()` / `CachedDocument.cached_body()`
+    found nothing ready.
+    """
+
+    def __init__(
+        self,
+        docs_path: Path | None = None,
+        max_entries: int | None = None,
+        revalidate_seconds: float | None = None,
+        max_bytes: int | None = None,
+    ):
+        self.docs_path = docs_path or settings.docs_path
+        self.max_entries = max_entries or settings.docs_cache_max_entries
+        self.max_bytes = max_bytes or int(settings.docs_cache_max_mb * 1024 * 1024)
+        self.revalidate_seconds = (
+            settings.docs_cache_revalidate_seconds
+            if revalidate_seconds is None
+            else revalidate_seconds
+        )
+        self._entries: OrderedDict[tuple[str, str], CachedDocument] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _resolve(self, slug: str, filename: str) -> Path | None:
+        """Path of a document, or None if it escapes docs/<slug>/."""
+        subject_dir = (self.docs_path / slug).resolve()
+        path = (subject_dir / filename).resolve()
+        if path.parent != subject_dir or subject_dir.parent != self.docs_path.resolve():
+            return None
+        return path
+
+    def _load(self, slug: str, filename: str, path: Path, stat) -> CachedDocument:
+        raw = path.read_bytes()
+        content = raw.decode("utf-8")
+        document = CachedDocument(
+            slug=slug,
+            filename=filename,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            raw=raw,
+            content=content,
+            title=_extract_title(content, filename),
+            toc=build_toc(raw),
+            etag=hashlib.blake2b(raw, digest_size=16).hexdigest(),
+            checked_at=time.monotonic(),
+        )
+        document.encoded_body("identity")  # Build it now, off the caller's loop
+        return document
+
+    def _drop(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def _trim(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            self._drop(next(iter(self._entries)))
+
+    def cached(self, slug: str, filename: str) -> CachedDocument | None:
+        """The document if its entry is trusted without touching the disk."""
+        key = (slug, filename)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.checked_at >= self.revalidate_seconds:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get(self, slug: str, filename: str) -> CachedDocument | None:
+        """
+        Get a document, loading or reloading it if needed.
+
+        Cached entries are trusted for `revalidate_seconds`; after that a
+        stat() checks mtime/size and the file is re-read only if it changed.
+
+        Returns:
+            The cached document, or None if it does not exist
+        """
+        entry = self.cached(slug, filename)
+        if entry is not None:
+            return entry
+
+        key = (slug, filename)
+        path = self._resolve(slug, filename)
+        if path is None:
+            return None
+        try:
+            stat = path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            with self._lock:
+                self._drop(key)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.mtime_ns, entry.size) == (
+                stat.st_mtime_ns,
+                stat.st_size,
+            ):
+                entry.checked_at = time.monotonic()
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = self._load(slug, filename, path, stat)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            self._trim()
+        return entry
+
+    def encoded_body(self, document: CachedDocument, encoding: str) -> bytes:
+        """`document.encoded_body(encoding)`, counting new bodies against the budget."""
+        body = document.cached_body(encoding)
+        if body is not None:
+            return body
+        body = document.compress(encoding)
+        with self._lock:
+            if document.cached_body(encoding) is None:
+                document._bodies[encoding] = body
+                if self._entries.get((document.slug, document.filename)) is document:
+                    self._bytes += len(body)
+                    self._trim()
+            return document._bodies[encoding]
+
+    def invalidate(self, slug: str | None = None) -> None:
+        """Drop cached documents for a subject (or all subjects)."""
+        with self._lock:
+            for key in [k for k in self._entries if slug is None or k[0] == slug]:
+                self._drop(key)
+
+
+# Default cache instance
+document_cache = DocumentCache()
@@ -0,0 +1,170 @@
+"""
+Embedding dimensionality reduction.
+Shrinks stored and query vectors (smaller index, faster search) with either
+Matryoshka-style truncation or a PCA projection fitted per subject.
+"""
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING, Mapping
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(matrix: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class EmbeddingReducer(ABC):
+    """Maps full embeddings to `dim` dimensions, L2-normalized for cosine."""
+
+    kind: str
+    dim: int
+
+    @abstractmethod
+    def reduce(self, matrix: "np.ndarray") -> "np.ndarray":
+        """Reduce an (n, full_dim) float32 matrix."""
+        ...
+
+    def transform(self, vectors: list[list[float]]) -> list[list[float]]:
+        import numpy as np
+
+        if not vectors:
+            return []
+        return self.reduce(np.asarray(vectors, dtype=np.float32)).tolist()
+
+    @property
+    def signature(self) -> str:
+        """Equal signatures mean query vectors are interchangeable."""
+        return f"{self.kind}:{self.dim}"
+
+
+class Truncation(EmbeddingReducer):
+    """
+    Keep the first `dim` components and renormalize.
+
+    Lossless in ranking terms only for Matryoshka-trained models, which
+    front-load information; run benchmarks.embedding_reduction first.
+    """
+
+    kind = "truncate"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def reduce(self, matrix: "np.ndarray") -> "np.ndarray":
+        return _normalize(matrix[:, : self.dim])
+
+
+class PCAProjection(EmbeddingReducer):
+    """Project onto the top `dim` principal components of a subject's chunks."""
+
+    kind = "pca"
+
+    def __init__(self, mean: "np.ndarray", components: "np.ndarray"):
+        self.mean = mean
+        self.components = components  # (dim, full_dim)
+        self.dim = components.shape[0]
+
+    @classmethod
+    def fit(cls, sample: "np.ndarray", dim: int) -> "PCAProjection":
+        import numpy as np
+
+        mean = sample.mean(axis=0)
+        # Rows of vt are the principal axes, by decreasing variance
+        _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        return cls(mean.astype(np.float32), vt[:dim].astype(np.float32))
+
+    def reduce(self, matrix: "np.ndarray") -> "np.ndarray":
+        return _normalize((matrix - self.mean) @ self.components.T)
+
+    @property
+    def signature(self) -> str:
+        # Each subject has its own basis: never interchangeable
+        return f"pca:{id(self)}"
+
+
+def reducer_arrays(reducer: EmbeddingReducer) -> dict[str, "np.ndarray"]:
+    """Arrays that describe a reducer (the .npz format of ReducerStore)."""
+    import numpy as np
+
+    arrays = {"kind": np.array(reducer.kind), "dim": np.array(reducer.dim)}
+    if isinstance(reducer, PCAProjection):
+        arrays.update(mean=reducer.mean, components=reducer.components)
+    return arrays
+
+
+def reducer_from_arrays(data: "Mapping[str, np.ndarray]") -> EmbeddingReducer:
+    kind = str(data["kind"])
+    if kind == Truncation.kind:
+        return Truncation(int(data["dim"]))
+    if kind == PCAProjection.kind:
+        return PCAProjection(data["mean"], data["components"])
+    raise ValueError(f"Unknown reducer kind: {kind}")
+
+
+class ReducerStore:
+    """
+    Per-subject reducers persisted as .npz files in `embedding_projections_dir`.
+
+    The file is written before the first reduced vector is stored and removed
+    with the collection, so queries always use the collection's projection.
+    Loaded reducers are cached and re-read when the file's mtime changes
+    (e.g. the leader worker re-ingested the subject).
+    """
+
+    def __init__(self, directory: Path | str | None = None):
+        self.directory = Path(directory or settings.embedding_projections_dir)
+        self._cache: dict[str, tuple[int, EmbeddingReducer]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, book_id: str) -> Path:
+        return self.directory / f"{book_id}.npz"
+
+    def save(self, book_id: str, reducer: EmbeddingReducer) -> None:
+        import numpy as np
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(book_id)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(tmp, **reducer_arrays(reducer))
+        tmp.replace(path)
+        with self._lock:
+            self._cache.pop(book_id, None)
+        logger.info(f"Saved {reducer.kind} reducer ({reducer.dim} dims) for {book_id}")
+
+    def load(self, book_id: str) -> EmbeddingReducer | None:
+        """The subject's reducer, or None if its vectors are full size."""
+        path = self._path(book_id)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            cached = self._cache.get(book_id)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        import numpy as np
+
+        with np.load(path) as data:
+            reducer = reducer_from_arrays(data)
+
+        with self._lock:
+            self._cache[book_id] = (mtime, reducer)
+        return reducer
+
+    def delete(self, book_id: str) -> None:
+        self._path(book_id).unlink(missing_ok=True)
+        with self._lock:
+            self._cache.pop(book_id, None)
@@ -0,0 +1,98 @@
+"""
+Background health prober for the LLM backend.
+Probes the provider on an interval and caches the result, so /health and
+readiness checks answer from memory instead of calling Ollama per request.
+"""
+import asyncio
+import logging
+import time
+from typing import Any
+
+from app.core.config import settings
+from app.core.container import container
+from app.llm.base import LLMProvider
+from app.llm.circuit import CircuitBreaker, CircuitState
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProber:
+    """
+    Caches the provider's `health_check()` result.
+
+    A failed probe opens the provider's circuit breaker (so an idle worker
+    notices a dead backend before a user does); a successful probe clears
+    its failure count and, while it is open, lets the next call through as
+    its trial instead of waiting out the reset period.
+    """
+
+    def __init__(self, llm: LLMProvider | None = None, interval: float | None = None):
+        self._llm = llm
+        self.interval = interval or settings.llm_health_interval_seconds
+        self._status: dict[str, Any] | None = None
+        self._checked_at = 0.0
+        self._task: asyncio.Task | None = None
+        self._probe_lock = asyncio.Lock()
+
+    @property
+    def llm(self) -> LLMProvider:
+        return self._llm or container.llm
+
+    @property
+    def breaker(self) -> CircuitBreaker | None:
+        return getattr(self.llm, "breaker", None)
+
+    async def start(self) -> None:
+        """Probe now and then every `interval` seconds, in the background."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe()
+            except Exception:
+                logger.exception("LLM health probe failed")
+            await asyncio.sleep(self.interval)
+
+    async def probe(self) -> dict[str, Any]:
+        """Check the backend now and cache the result."""
+        async with self._probe_lock:
+            health_check = getattr(self.llm, "health_check", None)
+            if health_check is None:
+                status = {"status": "unknown"}
+            else:
+                status = await health_check()
+
+            breaker = self.breaker
+            if breaker is not None:
+                if status.get("status") == "ok":
+                    breaker.mark_healthy()
+                elif status.get("status") in ("error", "unavailable"):
+                    breaker.mark_unhealthy()
+
+            self._status = status
+            self._checked_at = time.time()
+            return status
+
+    async def status(self) -> dict[str, Any]:
+        """The cached result; probes first if there is none or it is stale."""
+        if self._status is None or time.time() - self._checked_at > 2 * self.interval:
+            await self.probe()
+        return {**self._status, "checked_at": self._checked_at}
+
+    def is_ready(self) -> bool:
+        """Whether generation requests are expected to work."""
+        breaker = self.breaker
+        if breaker is not None and breaker.state == CircuitState.OPEN:
+            return False
+        return self._status is None or self._status.get("status") == "ok"
+
+    def circuit(self) -> dict[str, Any] | None:
+        breaker = self.breaker
+        return breaker.snapshot() if breaker is not None else None
@@ -0,0 +1,257 @@
+"""
+Index snapshots.
+Packages a subject's ingested index (vectors, payloads, reducer) into a
+versioned file that another environment loads in bulk instead of embedding
+the same docs again through the LLM.
+"""
+import hashlib
+import io
+import json
+import logging
+import time
+import zipfile
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.core.container import container
+from app.services.embedding_reduction import reducer_arrays, reducer_from_arrays
+from app.services.ingest_service import (
+    ChunkMetadata,
+    IngestResult,
+    IngestService,
+    IngestStatus,
+    book_lock,
+)
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot.zip"
+CHUNK_FIELDS = ("content", "source_file", "titulo", "seccion", "subseccion")
+
+
+class IndexSnapshots:
+    """
+    Export and restore `<book_id>-<fingerprint>.snapshot.zip` files.
+
+    The fingerprint hashes every chunk the current chunker makes of the
+    docs together with the embedding model, its dimensions and reduction
+    and the chunk settings, so a snapshot is only restored where ingesting
+    the docs would produce the same chunks embedded by the same model.
+    Snapshots of other versions of the docs sit side by side.
+    """
+
+    def __init__(self, ingest: IngestService | None = None, directory: Path | str | None = None):
+        self.ingest = ingest or container.ingest
+        self.directory = Path(directory or settings.index_snapshot_dir)
+
+    @property
+    def qdrant(self):
+        return self.ingest.qdrant
+
+    def _settings(self) -> dict[str, Any]:
+        return {
+            "format_version": FORMAT_VERSION,
+            "embedding_model": settings.embedding_model,
+            "embedding_dimensions": settings.embedding_dimensions,
+            "embedding_reduction": settings.embedding_reduction,
+            "embedding_reduced_dimensions": settings.embedding_reduced_dimensions,
+            "chunk_size": self.ingest.chunk_size,
+            "chunk_overlap": self.ingest.chunk_overlap,
+            "chunk_size_unit": settings.chunk_size_unit,
+        }
+
+    def _scan(self, book_dir: Path) -> tuple[str, Counter, dict[str, str]]:
+        """
+        Fingerprint of the docs' fresh chunks, a digest of each chunk's
+        (source_file, content) and the sha256 of each file.
+
+        Streams the files (see IngestService._iter_chunks) instead of
+        keeping their text and chunks.
+        """
+        digest = hashlib.sha256(json.dumps(self._settings(), sort_keys=True).encode())
+        contents: Counter = Counter()
+        hashes: dict[str, str] = {}
+        for md_file in sorted(book_dir.glob("*.md")):
+            with md_file.open("rb") as f:
+                hashes[md_file.name] = hashlib.file_digest(f, "sha256").hexdigest()
+            for chunk in self.ingest._chunk_file(md_file):
+                digest.update(
+                    "\0".join(getattr(chunk, f) or "" for f in CHUNK_FIELDS).encode("utf-8")
+                    + b"\1"
+                )
+                contents[_content_digest(chunk.source_file, chunk.content)] += 1
+        return digest.hexdigest(), contents, hashes
+
+    def path(self, book_id: str, fingerprint: str) -> Path:
+        return self.directory / f"{book_id}-{fingerprint[:16]}{SNAPSHOT_SUFFIX}"
+
+    def has_any(self, book_id: str) -> bool:
+        return any(self.directory.glob(f"{book_id}-*{SNAPSHOT_SUFFIX}"))
+
+    def export(self, book_id: str, book_dir: Path | None = None) -> Path:
+        """
+        Write the book's snapshot and return its path.
+
+        Raises:
+            ValueError: If the book is not ingested, or its index does not
+                hold exactly the chunks of its current docs
+        """
+        import numpy as np
+
+        book_dir = book_dir or settings.docs_path / book_id
+        if not self.qdrant.collection_exists(book_id):
+            raise ValueError(f"{book_id} is not ingested")
+
+        fingerprint, contents, hashes = self._scan(book_dir)
+        records = sorted(
+            (r for batch in self.qdrant.iter_points(book_id) for r in batch),
+            key=lambda r: r.payload["chunk_index"],
+        )
+        stored = Counter(
+            _content_digest(r.payload["source_file"], r.payload["content"]) for r in records
+        )
+        if stored != contents:
+            raise ValueError(
+                f"The index of {book_id} does not match docs/{book_id}; re-ingest it first"
+            )
+
+        vectors = np.asarray([r.vector for r in records], dtype=np.float32)
+        reducer = self.ingest.reducers.load(book_id)
+        manifest = {
+            **self._settings(),
+            "book_id": book_id,
+            "fingerprint": fingerprint,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "points": len(records),
+            "vector_size": int(vectors.shape[1]),
+            "reducer": reducer.kind if reducer else None,
+            "files": hashes,
+        }
+
+        path = self.path(book_id, fingerprint)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2, ensure_ascii=False))
+            archive.writestr(
+                "payloads.jsonl",
+                "".join(
+                    json.dumps(
+                        {"chunk_index": r.payload["chunk_index"]}
+                        | {f: r.payload.get(f) for f in CHUNK_FIELDS},
+                        ensure_ascii=False,
+                    ) + "\n"
+                    for r in records
+                ),
+            )
+            buffer = io.BytesIO()
+            np.save(buffer, vectors)
+            # Float vectors barely compress
+            archive.writestr("vectors.npy", buffer.getvalue(), compress_type=zipfile.ZIP_STORED)
+            if reducer is not None:
+                buffer = io.BytesIO()
+                np.savez(buffer, **reducer_arrays(reducer))
+                archive.writestr("reducer.npz", buffer.getvalue())
+        tmp.replace(path)
+        logger.info(f"Exported {len(records)} chunks of {book_id} to {path}")
+        return path
+
+    def restore(
+        self, book_id: str, book_dir: Path | None = None, force: bool = False
+    ) -> IngestResult | None:
+        """
+        Load the snapshot matching the book's current docs, if there is one.
+
+        Returns None when no snapshot matches (the caller should ingest).
+        An existing index is only replaced with `force`. On failure the
+        partial index is deleted and the error raised.
+        """
+        import numpy as np
+
+        if not self.has_any(book_id):
+            return None
+        book_dir = book_dir or settings.docs_path / book_id
+        fingerprint, contents, hashes = self._scan(book_dir)
+        path = self.path(book_id, fingerprint)
+        if not contents or not path.exists():
+            logger.info(f"No snapshot of {book_id} matches its current docs")
+            return None
+
+        start = time.perf_counter()
+        with zipfile.ZipFile(path) as archive:
+            manifest = json.loads(archive.read("manifest.json"))
+            if manifest.get("fingerprint") != fingerprint:
+                logger.warning(f"Ignoring {path}: it was made from other docs or settings")
+                return None
+            payloads = [json.loads(line) for line in archive.read("payloads.jsonl").splitlines()]
+            vectors = np.load(io.BytesIO(archive.read("vectors.npy")))
+            reducer = None
+            if "reducer.npz" in archive.namelist():
+                with np.load(io.BytesIO(archive.read("reducer.npz"))) as data:
+                    reducer = reducer_from_arrays(data)
+
+        # Not while a job or the watcher writes the same book
+        with book_lock(book_id):
+            if self.qdrant.collection_exists(book_id):
+                if not force:
+                    return IngestResult(
+                        book_id=book_id,
+                        status=IngestStatus.READY,
+                        chunks_count=self.qdrant.count_chunks(book_id),
+                        files_processed=0,
+                        error="Collection already exists. Use force=True to restore.",
+                    )
+                self.ingest._delete_collection(book_id)
+
+            try:
+                if reducer is not None:
+                    self.ingest.reducers.save(book_id, reducer)
+                self.qdrant.create_collection(book_id, vector_size=manifest["vector_size"])
+                inserted = 0
+                batch_size = max(self.ingest.batch_size, 256)
+                for offset in range(0, len(payloads), batch_size):
+                    # Point IDs derive from chunk_index: keep the exported ones
+                    for run_start, run in _contiguous_runs(payloads[offset:offset + batch_size]):
+                        first = offset + run_start
+                        inserted += self.ingest._insert(
+                            book_id,
+                            [ChunkMetadata(**{f: p[f] for f in CHUNK_FIELDS}) for p in run],
+                            vectors[first:first + len(run)].tolist(),
+                            start_index=run[0]["chunk_index"],
+                        )
+                if settings.retriever_hierarchical:
+                    self.ingest._build_sections(book_id)
+            except Exception:
+                if self.qdrant.collection_exists(book_id):
+                    self.ingest._delete_collection(book_id)
+                raise
+
+        logger.info(
+            f"Restored {inserted} chunks of {book_id} from {path.name}"
+            f" in {time.perf_counter() - start:.1f}s"
+        )
+        return IngestResult(
+            book_id=book_id,
+            status=IngestStatus.READY,
+            chunks_count=inserted,
+            files_processed=len(hashes),
+        )
+
+
+def _content_digest(source_file: str, content: str) -> bytes:
+    return hashlib.sha256(f"{source_file}\0{content}".encode("utf-8")).digest()
+
+
+def _contiguous_runs(payloads: list[dict]) -> list[tuple[int, list[dict]]]:
+    """Split payloads into runs of consecutive chunk_index: (offset, run)."""
+    runs: list[tuple[int, list[dict]]] = []
+    for i, payload in enumerate(payloads):
+        if runs and payload["chunk_index"] == runs[-1][1][-1]["chunk_index"] + 1:
+            runs[-1][1].append(payload)
+        else:
+            runs.append((i, [payload]))
+    return runs
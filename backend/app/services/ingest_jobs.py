@@ -0,0 +1,257 @@
+"""
+Background ingest jobs.
+Queues ingestions, runs them one at a time and checkpoints their progress
+so a job interrupted by a crash or restart resumes where it stopped.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any
+
+from app.core.config import settings
+from app.core.container import container
+from app.db.job_store import IngestJob, JobStore
+from app.services.document_cache import document_cache
+from app.services.ingest_service import IngestService, IngestStatus
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED = [IngestStatus.PENDING.value, IngestStatus.PROCESSING.value]
+
+
+class JobInterrupted(Exception):
+    """Raised inside a running ingestion when the manager shuts down."""
+
+
+class IngestJobManager:
+    """
+    Persistent queue of ingest jobs.
+
+    Jobs live in a SQLite `JobStore`. A single worker runs them in a thread
+    through `IngestService.ingest_book`, saving the embedded/upserted counts
+    after every batch; the upserted count is the checkpoint. On start, jobs
+    left PROCESSING by a previous process are resumed from their checkpoint
+    if the book's files and chunk settings are unchanged (same fingerprint),
+    or restarted from scratch otherwise.
+
+    `submit`, `get` and `list` block on SQLite: call them from a thread
+    (the API uses asyncio.to_thread).
+
+    A process started with `run_jobs=False` (a follower over the embedded
+    Qdrant, which cannot write) only records submitted jobs as PENDING; the
+    process that can write picks them up by polling the store.
+    """
+
+    def __init__(
+        self,
+        ingest: IngestService | None = None,
+        store: JobStore | None = None,
+    ):
+        self._ingest = ingest
+        self.store = store or JobStore()
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._queued: set[str] = set()
+        self._run_jobs = True
+        self._stopping = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._poller: asyncio.Task | None = None
+        self._running: asyncio.Future | None = None  # The job thread, if one runs
+
+    @property
+    def ingest(self) -> IngestService:
+        # Resolved on first job, so starting the manager stays cheap
+        return self._ingest or container.ingest
+
+    async def start(
+        self,
+        recover: bool = True,
+        run_jobs: bool = True,
+        poll_seconds: float = 0,
+    ) -> None:
+        """
+        Start the worker.
+
+        With `recover`, unfinished jobs from a previous run are requeued first.
+        Only one process sharing the store should recover (the leader).
+        Without `run_jobs` no worker starts and jobs are only stored. With
+        `poll_seconds`, PENDING jobs stored by other processes are queued
+        every `poll_seconds`.
+        """
+        self._stopping.clear()
+        self._loop = asyncio.get_running_loop()
+        self._run_jobs = run_jobs
+        if not run_jobs:
+            return
+        if recover:
+            unfinished = await asyncio.to_thread(self.store.list, UNFINISHED, None, 10_000)
+            for job in sorted(unfinished, key=lambda j: j.created_at):
+                logger.info(f"Requeuing ingest job {job.id} ({job.book_id}, {job.status})")
+                self._enqueue(job.id)
+        self._task = asyncio.create_task(self._worker())
+        if poll_seconds > 0:
+            self._poller = asyncio.create_task(self._poll(poll_seconds))
+
+    async def stop(self) -> None:
+        """
+        Stop the worker. A running job stops after its current batch; this
+        waits for its thread, so nothing writes to the index afterwards.
+        """
+        self._stopping.set()
+        for task in (self._poller, self._task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        if self._running is not None:
+            await asyncio.gather(self._running, return_exceptions=True)
+        self._task = self._poller = self._running = None
+
+    def _enqueue(self, job_id: str) -> None:
+        if job_id not in self._queued:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _poll(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                pending = await asyncio.to_thread(
+                    self.store.list, [IngestStatus.PENDING.value], None, 1000
+                )
+            except Exception:
+                logger.exception("Failed to poll pending ingest jobs")
+                continue
+            for job in sorted(pending, key=lambda j: j.created_at):
+                if job.id not in self._queued:
+                    logger.info(f"Picked up ingest job {job.id} for {job.book_id}")
+                    self._enqueue(job.id)
+
+    def submit(self, book_id: str, force: bool = False) -> IngestJob:
+        """
+        Queue an ingestion of docs/<book_id>.
+
+        If the book already has a pending or running job, that job is
+        returned instead of queueing a duplicate.
+
+        Raises:
+            ValueError: If the book has no docs folder
+        """
+        if not (settings.docs_path / book_id).is_dir():
+            raise ValueError(f"Directory not found: docs/{book_id}")
+
+        existing = self.store.list(UNFINISHED, book_id, limit=1)
+        if existing:
+            return existing[0]
+
+        job = self.store.create(book_id, IngestStatus.PENDING.value, force=force)
+        if self._run_jobs:
+            if self._loop is not None:
+                # Usually called from a thread; the queue belongs to the loop
+                self._loop.call_soon_threadsafe(self._enqueue, job.id)
+            else:
+                self._enqueue(job.id)
+        logger.info(f"Queued ingest job {job.id} for {book_id}")
+        return job
+
+    def get(self, job_id: str) -> IngestJob | None:
+        return self.store.get(job_id)
+
+    def list(
+        self,
+        status: IngestStatus | None = None,
+        book_id: str | None = None,
+        limit: int = 100,
+    ) -> list[IngestJob]:
+        return self.store.list([status.value] if status else None, book_id, limit)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            # Shielded: cancelling the worker cannot stop the thread, so
+            # stop() waits for it instead
+            running = self._running = asyncio.ensure_future(asyncio.to_thread(self._run, job_id))
+            try:
+                await asyncio.shield(running)
+            except Exception:
+                logger.exception(f"Ingest job {job_id} crashed")
+            finally:
+                if running.done():
+                    self._running = None
+                self._queued.discard(job_id)
+                self._queue.task_done()
+
+    def _run(self, job_id: str) -> None:
+        """Run (or resume) one job in the worker thread."""
+        job = self.store.get(job_id)
+        if job is None or job.status not in UNFINISHED or self._stopping.is_set():
+            return
+
+        book_dir = settings.docs_path / job.book_id
+        fingerprint = self.ingest.source_fingerprint(book_dir) if book_dir.is_dir() else None
+        resume_from = job.upserted_chunks if job.fingerprint == fingerprint else 0
+        # Restarting a job from zero (sources changed, or nothing was
+        # upserted yet) must overwrite what the previous run left behind.
+        force = job.force or (job.started_at is not None and resume_from == 0)
+
+        now = time.time()
+        self.store.update(
+            job.id,
+            status=IngestStatus.PROCESSING.value,
+            fingerprint=fingerprint,
+            embedded_chunks=resume_from,
+            upserted_chunks=resume_from,
+            resumed_from=resume_from,
+            attempts=job.attempts + 1,
+            started_at=job.started_at or now,
+            run_started_at=now,
+            error=None,
+        )
+
+        def on_progress(embedded: int, upserted: int, total: int) -> None:
+            self.store.update(
+                job.id,
+                embedded_chunks=embedded,
+                upserted_chunks=upserted,
+                total_chunks=total,
+            )
+            # Stop at a batch boundary so no embedding work is thrown away
+            if self._stopping.is_set() and upserted == embedded:
+                raise JobInterrupted("Ingest job manager is shutting down")
+
+        if resume_from:
+            logger.info(f"Resuming ingest job {job.id} at chunk {resume_from}")
+        else:
+            logger.info(f"Starting ingest job {job.id} for {job.book_id}")
+
+        result = self.ingest.ingest_book(
+            job.book_id,
+            book_dir=book_dir,
+            force=force,
+            resume_from=resume_from,
+            on_progress=on_progress,
+            cleanup_on_error=False,
+        )
+
+        if self._stopping.is_set() and result.status == IngestStatus.ERROR:
+            # Left PROCESSING with its checkpoint; resumed on next start
+            logger.info(f"Ingest job {job.id} interrupted; will resume on restart")
+            return
+
+        final = {"status": result.status.value, "error": result.error}
+        if result.status == IngestStatus.READY:
+            # Also covers books that were already ingested (no batches ran)
+            final.update(total_chunks=result.chunks_count, upserted_chunks=result.chunks_count)
+        self.store.update(job.id, finished_at=time.time(), **final)
+        document_cache.invalidate(job.book_id)
+        logger.info(
+            f"Ingest job {job.id} finished: {result.status.value} "
+            f"({result.chunks_count} chunks)"
+        )
+
+
+def __getattr__(name: str) -> Any:
+    # Former module-level singleton, now built lazily by the container
+    if name == "ingest_job_manager":
+        return container.ingest_jobs
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,20 +2,89 @@
 Ingest service for processing documents and creating RAG collections.
 Handles markdown parsing, chunking, embedding, and vector storage.
 """
+import hashlib
 import logging
 import re
-from dataclasses import dataclass
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass
 from enum import Enum
+from itertools import islice
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from app.core.config import settings
-from app.db.qdrant import QdrantService, qdrant_service
-from app.llm.base import LLMProvider, get_default_provider
+from app.core.container import container
+from app.llm.base import LLMProvider
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from app.db.answer_store import AnswerStore
+    from app.db.chunk_store import ChunkTextStore
+    from app.db.qdrant import QdrantService  # Imported lazily (slow import)
+    from app.services.embedding_reduction import EmbeddingReducer, ReducerStore
 
 logger = logging.getLogger(__name__)
 
-# Regex to strip bold markers from Notion-exported headers
-BOLD_HEADER_RE = re.compile(r"^(#{1,6})\s+\*\*(.+?)\*\*\s*$", re.MULTILINE)
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*$")
+FENCE_MARKERS = ("```", "~~~")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+")
+WORD_RE = re.compile(r"\S+\s*")
+# Lines of blocks whose line breaks carry meaning (lists, tables)
+LINE_ITEM_RE = re.compile(r"^\s*(?:[-*+]\s|\d+[.)]\s|\|)")
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+# on_progress(embedded, upserted, total) for batched ingestion
+ProgressCallback = Callable[[int, int, int], None]
+
+_book_locks: dict[str, threading.RLock] = {}
+_book_locks_guard = threading.Lock()
+
+
+def book_lock(book_id: str) -> threading.RLock:
+    """
+    Per-book lock serializing writes to a book's index in this process:
+    ingest jobs and auto-ingest (ingest_book), watcher syncs (sync_files)
+    and snapshot restores. Reentrant, since sync_files may ingest_book.
+    """
+    with _book_locks_guard:
+        return _book_locks.setdefault(book_id, threading.RLock())
+
+
+def iter_markdown_sections(path: Path) -> Iterator[list[str]]:
+    """
+    Read a markdown file incrementally, one #/## section at a time.
+
+    Yields the lines (without newlines) of each section, split before every
+    level 1-2 heading outside fenced code, which is where the chunker closes
+    a section anyway. Only the current section is held in memory.
+    """
+    section: list[str] = []
+    in_fence = False
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            line = line.removesuffix("\n")
+            if line.lstrip().startswith(FENCE_MARKERS):
+                in_fence = not in_fence
+            elif not in_fence and section and line.startswith("#"):
+                match = HEADING_RE.match(line)
+                if match and len(match.group(1)) <= 2:
+                    yield section
+                    section = []
+            section.append(line)
+    if section:
+        yield section
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (words and punctuation marks).
+
+    Close enough to subword tokenizers for sizing chunks; pass a real
+    tokenizer's length function to IngestService for exact counts.
+    """
+    return len(TOKEN_RE.findall(text))
 
 
 class IngestStatus(str, Enum):
@@ -50,94 +119,319 @@ class IngestService:
 
     def __init__(
         self,
-        qdrant: QdrantService | None = None,
+        qdrant: "QdrantService | None" = None,
         llm: LLMProvider | None = None,
+        length_function: Callable[[str], int] | None = None,
+        reducers: "ReducerStore | None" = None,
+        text_store: "ChunkTextStore | None" = None,
+        answers: "AnswerStore | None" = None,
     ):
-        self.qdrant = qdrant or qdrant_service
-        self.llm = llm or get_default_provider()
+        self.qdrant = qdrant or container.qdrant
+        self.llm = llm or container.llm
+        self.reducers = reducers or container.reducers
+        if text_store is None and settings.chunk_text_store == "local":
+            text_store = container.chunk_texts
+        self.text_store = text_store
+        if answers is None and (settings.answer_cache_enabled or settings.answer_warmup_enabled):
+            answers = container.answers
+        self.answers = answers
         self.chunk_size = settings.chunk_size
         self.chunk_overlap = settings.chunk_overlap
+        self.batch_size = settings.ingest_batch_size
+        # chunk_size/chunk_overlap are measured with this function
+        self.length_function = length_function or (
+            count_tokens if settings.chunk_size_unit == "tokens" else len
+        )
 
-    def _clean_notion_headers(self, content: str) -> str:
-        """Strip **bold** markers from markdown headers."""
-        return BOLD_HEADER_RE.sub(r"\1 \2", content)
-
-    def _extract_header_metadata(self, text: str) -> dict[str, str | None]:
-        """Extract title, section, subsection from markdown headers."""
-        metadata = {"titulo": None, "seccion": None, "subseccion": None}
+    def _chunk_markdown(self, content: str, source_file: str) -> list[ChunkMetadata]:
+        """Chunk markdown content held in memory (see _chunk_sections)."""
+        return list(self._chunk_sections([content.split("\n")], source_file))
 
-        lines = text.split("\n")
-        for line in lines:
-            line = line.strip()
-            if line.startswith("# ") and not metadata["titulo"]:
-                metadata["titulo"] = line[2:].strip()
-            elif line.startswith("## ") and not metadata["seccion"]:
-                metadata["seccion"] = line[3:].strip()
-            elif line.startswith("### ") and not metadata["subseccion"]:
-                metadata["subseccion"] = line[4:].strip()
+    def _chunk_file(self, path: Path) -> Iterator[ChunkMetadata]:
+        """Chunk a markdown file while reading it, section by section."""
+        return self._chunk_sections(iter_markdown_sections(path), path.name)
 
-        return metadata
+    def _iter_chunks(self, book_dir: Path) -> Iterator[ChunkMetadata]:
+        """All chunks of a book, in order, streamed from its files."""
+        for md_file in sorted(book_dir.glob("*.md")):
+            yield from self._chunk_file(md_file)
 
-    def _chunk_markdown(self, content: str, source_file: str) -> list[ChunkMetadata]:
+    def _chunk_sections(
+        self, sections: Iterable[list[str]], source_file: str
+    ) -> Iterator[ChunkMetadata]:
         """
-        Chunk markdown content into smaller pieces.
+        Chunk markdown, given as groups of lines, into smaller pieces in a
+        single pass, yielding each section's chunks as soon as it closes.
+
+        Heading state carries over between groups, so any split of the
+        lines gives the same chunks; with iter_markdown_sections only one
+        section is in memory at a time.
 
         Strategy:
-        1. Split by headers (semantic boundaries)
-        2. Further split large chunks by paragraphs
-        3. Apply size limits with overlap
+        1. Walk the lines once, tracking the #/##/### heading stack and
+           stripping Notion **bold** header markers
+        2. Group lines into blocks (paragraphs, fenced code kept whole)
+        3. Close a section at every # or ## header (semantic boundary)
+        4. Pack each section's blocks into chunks of at most chunk_size,
+           carrying chunk_overlap from the end of one chunk into the next
+        5. Hard-split blocks larger than chunk_size: code, lists and tables
+           on line boundaries (re-fencing code pieces), prose on sentences
         """
-        content = self._clean_notion_headers(content)
-        chunks = []
+        headings: dict[int, str | None] = {1: None, 2: None, 3: None}
+        blocks: list[tuple[str, str | None]] = []  # (text, subseccion)
+        block_lines: list[str] = []
+        in_fence = False
+
+        def end_block() -> None:
+            if block_lines:
+                text = "\n".join(block_lines).strip()
+                if text:
+                    blocks.append((text, headings[3]))
+                block_lines.clear()
+
+        def end_section() -> list[ChunkMetadata]:
+            end_block()
+            packed = []
+            # Sections with nothing but headings carry no content to retrieve
+            if any(not HEADING_RE.match(text) for text, _ in blocks):
+                packed = self._pack_section(blocks, source_file, headings[1], headings[2])
+            blocks.clear()
+            return packed
+
+        for line in (line for section in sections for line in section):
+            stripped = line.lstrip()
+            if stripped.startswith(FENCE_MARKERS):
+                in_fence = not in_fence
+            elif not in_fence:
+                if not stripped:
+                    end_block()
+                    continue
+
+                match = HEADING_RE.match(line) if line.startswith("#") else None
+                if match:
+                    level = len(match.group(1))
+                    title = match.group(2)
+                    if title.startswith("**") and title.endswith("**") and len(title) > 4:
+                        # Strip **bold** markers from Notion-exported headers
+                        title = title[2:-2]
+                        line = f"{match.group(1)} {title}"
+                    if level <= 2:
+                        yield from end_section()
+                    else:
+                        end_block()
+                    if level <= 3:
+                        headings[level] = title.strip()
+                        for deeper in range(level + 1, 4):
+                            headings[deeper] = None
 
-        # Split by ## headers first (sections)
-        sections = re.split(r"(?=^## )", content, flags=re.MULTILINE)
+            block_lines.append(line)
 
-        for section in sections:
-            if not section.strip():
-                continue
+        yield from end_section()
 
-            metadata = self._extract_header_metadata(section)
+    def _pack_section(
+        self,
+        blocks: list[tuple[str, str | None]],
+        source_file: str,
+        titulo: str | None,
+        seccion: str | None,
+    ) -> list[ChunkMetadata]:
+        """Greedily pack a section's blocks into overlapping chunks."""
+        units: list[tuple[str, int, str | None]] = []
+        for text, subseccion in blocks:
+            length = self.length_function(text)
+            if length <= self.chunk_size:
+                units.append((text, length, subseccion))
+            else:
+                units.extend(
+                    (piece, piece_length, subseccion)
+                    for piece, piece_length in self._split_oversize(text)
+                )
 
-            # If section is small enough, keep as one chunk
-            if len(section) <= self.chunk_size:
-                chunks.append(
-                    ChunkMetadata(
-                        content=section.strip(),
-                        source_file=source_file,
-                        **metadata,
-                    )
+        separator = self.length_function("\n\n")
+        chunks: list[ChunkMetadata] = []
+        parts: list[str] = []
+        size = 0
+        subseccion: str | None = None
+
+        def emit() -> None:
+            chunks.append(
+                ChunkMetadata(
+                    content="\n\n".join(parts),
+                    source_file=source_file,
+                    titulo=titulo,
+                    seccion=seccion,
+                    subseccion=subseccion,
                 )
-            else:
-                # Split large sections by paragraphs
-                paragraphs = section.split("\n\n")
-                current_chunk = ""
+            )
 
-                for para in paragraphs:
-                    if len(current_chunk) + len(para) <= self.chunk_size:
-                        current_chunk += para + "\n\n"
-                    else:
-                        if current_chunk.strip():
-                            chunks.append(
-                                ChunkMetadata(
-                                    content=current_chunk.strip(),
-                                    source_file=source_file,
-                                    **metadata,
-                                )
-                            )
-                        current_chunk = para + "\n\n"
-
-                if current_chunk.strip():
-                    chunks.append(
-                        ChunkMetadata(
-                            content=current_chunk.strip(),
-                            source_file=source_file,
-                            **metadata,
-                        )
-                    )
+        for text, length, unit_subseccion in units:
+            if parts and size + separator + length > self.chunk_size:
+                emit()
+                # Seed the next chunk with the tail of this one, if it fits
+                tail = self._tail(
+                    parts, min(self.chunk_overlap, self.chunk_size - length - separator)
+                )
+                parts = [tail] if tail else []
+                size = self.length_function(tail) if tail else 0
+                subseccion = None
 
+            size += (separator if parts else 0) + length
+            parts.append(text)
+            subseccion = subseccion or unit_subseccion
+
+        if parts:
+            emit()
         return chunks
 
+    def _split_oversize(self, text: str) -> list[tuple[str, int]]:
+        """Split a block larger than chunk_size into pieces that fit.
+
+        Pieces leave room for the overlap carried in from the previous chunk.
+        """
+        limit = max(self.chunk_size - self.chunk_overlap, self.chunk_size // 2)
+        lines = text.split("\n")
+        if any(
+            line.lstrip().startswith(FENCE_MARKERS) or LINE_ITEM_RE.match(line)
+            for line in lines
+        ):
+            return self._split_lines(lines, limit)
+        return self._split_prose(text, limit)
+
+    def _split_prose(self, text: str, limit: int) -> list[tuple[str, int]]:
+        """Pieces of at most `limit`, preferring sentence boundaries, then
+        words, then characters."""
+        space = self.length_function(" ")
+        pieces: list[tuple[str, int]] = []
+        current: list[str] = []
+        size = 0
+
+        def flush() -> None:
+            nonlocal size
+            if current:
+                pieces.append((" ".join(current), size))
+                current.clear()
+                size = 0
+
+        def add(fragment: str, length: int) -> None:
+            nonlocal size
+            if current and size + space + length > limit:
+                flush()
+            size += (space if current else 0) + length
+            current.append(fragment)
+
+        for sentence in SENTENCE_END_RE.split(text):
+            length = self.length_function(sentence)
+            if length <= limit:
+                add(sentence, length)
+                continue
+            for word in sentence.split():
+                word_length = self.length_function(word)
+                if word_length <= limit:
+                    add(word, word_length)
+                    continue
+                for start in range(0, len(word), limit):
+                    piece = word[start:start + limit]
+                    add(piece, self.length_function(piece))
+
+        flush()
+        return pieces
+
+    def _split_lines(self, lines: list[str], limit: int) -> list[tuple[str, int]]:
+        """Pieces of whole lines joined with newlines, for code, lists and
+        tables.
+
+        Indentation is kept; a piece that starts or ends inside a fenced
+        block gets the fence reopened or closed so every piece is valid
+        markdown. Lines too long on their own are split like prose, or by
+        characters inside a fence.
+        """
+        fences = [line for line in lines if line.lstrip().startswith(FENCE_MARKERS)]
+        newline = self.length_function("\n")
+        # Room for a reopened and a closing fence line around each piece
+        reserve = 2 * (max(map(self.length_function, fences)) + newline) if fences else 0
+        budget = max(limit - reserve, limit // 2)
+
+        groups: list[list[str]] = []
+        current: list[str] = []
+        size = 0
+        in_fence = False
+
+        def add(line: str, length: int) -> None:
+            nonlocal size, current
+            if current and size + newline + length > budget:
+                groups.append(current)
+                current, size = [], 0
+            size += (newline if current else 0) + length
+            current.append(line)
+
+        for line in lines:
+            length = self.length_function(line)
+            if line.lstrip().startswith(FENCE_MARKERS):
+                in_fence = not in_fence
+                add(line, length)
+            elif length <= budget:
+                add(line, length)
+            elif in_fence:
+                for start in range(0, len(line), budget):
+                    piece = line[start:start + budget]
+                    add(piece, self.length_function(piece))
+            else:
+                for piece, piece_length in self._split_prose(line, budget):
+                    add(piece, piece_length)
+        if current:
+            groups.append(current)
+
+        pieces: list[tuple[str, int]] = []
+        opening: str | None = None  # Fence line of the block we are inside
+        for group in groups:
+            reopen = opening
+            if reopen is not None and len(group) == 1 and group[0].strip() == reopen.strip()[:3]:
+                opening = None  # Only the closing fence left; the last piece closed it
+                continue
+            for line in group:
+                if line.lstrip().startswith(FENCE_MARKERS):
+                    opening = None if opening is not None else line
+            text_lines = ([reopen] if reopen is not None else []) + group
+            if opening is not None:
+                indent = opening[: len(opening) - len(opening.lstrip())]
+                text_lines.append(indent + opening.lstrip()[:3])
+            text = "\n".join(text_lines)
+            pieces.append((text, self.length_function(text)))
+        return pieces
+
+    def _tail(self, parts: list[str], budget: int) -> str:
+        """Last whole words of the given parts fitting in `budget` units,
+        stopping at fenced code."""
+        if budget <= 0:
+            return ""
+        # Only the end of each part can fit in the budget, so scan a window
+        # instead of the whole part (a character unit is one char; allow a
+        # generous 16 chars per token otherwise)
+        window = budget + 1 if self.length_function is len else budget * 16
+        separator = self.length_function("\n\n")
+        taken: list[str] = []
+        used = 0
+
+        for index, part in enumerate(reversed(parts)):
+            if any(marker in part for marker in FENCE_MARKERS):
+                break  # A cut through fenced code would unbalance the fences
+            if index:
+                used += separator
+                if used > budget:
+                    break
+                taken.append("\n\n")
+            words = WORD_RE.findall(part[-window:])
+            if len(part) > window:
+                words = words[1:]  # First word may be cut in half
+            for word in reversed(words):
+                length = self.length_function(word)
+                if used + length > budget:
+                    return "".join(reversed(taken)).strip()
+                taken.append(word)
+                used += length
+
+        return "".join(reversed(taken)).strip()
+
     def _load_markdown_files(self, book_dir: Path) -> list[tuple[str, str]]:
         """Load all markdown files from a directory."""
         files = []
@@ -146,23 +440,141 @@ class IngestService:
             files.append((md_file.name, content))
         return files
 
+    def source_fingerprint(self, book_dir: Path) -> str:
+        """Hash of a book's files (name, size, mtime) and chunking settings.
+
+        Chunking is deterministic, so an unchanged fingerprint means a
+        checkpoint from an earlier run still lines up with the chunk list.
+        """
+        digest = hashlib.sha256(
+            f"{self.chunk_size}:{self.chunk_overlap}:{settings.chunk_size_unit}".encode()
+        )
+        for md_file in sorted(book_dir.glob("*.md")):
+            stat = md_file.stat()
+            digest.update(f"|{md_file.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+
+    def _fit_reducer(
+        self, book_id: str, chunks: Iterable[ChunkMetadata], total: int
+    ) -> tuple["EmbeddingReducer | None", dict[int, "np.ndarray"]]:
+        """
+        Build and persist the book's reducer per EMBEDDING_REDUCTION.
+
+        PCA is fitted on the embeddings of an evenly spaced sample of the
+        `total` chunks, read from `chunks` in a single pass;
+        those embeddings are returned by chunk index so the batch loop does
+        not embed them twice. Falls back to truncation when the sample has
+        no more points than target dimensions.
+        """
+        from app.services.embedding_reduction import PCAProjection, Truncation
+
+        dim = settings.embedding_reduced_dimensions
+        if settings.embedding_reduction == "none" or dim >= settings.embedding_dimensions:
+            return None, {}
+
+        sampled: dict[int, "np.ndarray"] = {}
+        reducer: EmbeddingReducer = Truncation(dim)
+        if settings.embedding_reduction == "pca":
+            import numpy as np
+
+            samples = min(total, settings.embedding_pca_samples)
+            indexes = [i * total // samples for i in range(samples)]
+            if len(indexes) > dim:
+                wanted = set(indexes)
+                texts = [c.content for i, c in enumerate(chunks) if i in wanted]
+                sample = np.asarray(self.llm.embed(texts), dtype=np.float32)
+                sampled = dict(zip(indexes, sample))
+                reducer = PCAProjection.fit(sample, dim)
+            else:
+                logger.info(
+                    f"{book_id}: {total} chunks are too few for a {dim}-dim PCA, "
+                    "truncating instead"
+                )
+
+        self.reducers.save(book_id, reducer)
+        return reducer, sampled
+
+    def _delete_collection(self, book_id: str) -> bool:
+        """Delete a book's collection together with its reducer, texts and answers."""
+        self.reducers.delete(book_id)
+        if self.text_store is not None:
+            self.text_store.delete(book_id)
+        if self.answers is not None:
+            self.answers.delete(book_id)
+        return self.qdrant.delete_collection(book_id)
+
+    def _build_sections(self, book_id: str, source_file: str | None = None) -> None:
+        """Update the book's section index; without a complete one, search is flat."""
+        try:
+            self.qdrant.build_sections(book_id, source_file=source_file)
+        except Exception:
+            logger.exception(f"Section index failed for {book_id}, using flat search")
+            self.qdrant.delete_sections(book_id)
+
+    def _insert(
+        self,
+        book_id: str,
+        chunks: list[ChunkMetadata],
+        embeddings: list[list[float]],
+        start_index: int = 0,
+    ) -> int:
+        """Upsert chunks, copying their text to the local store first."""
+        payloads = [asdict(c) for c in chunks]
+        if self.text_store is not None:
+            refs = self.text_store.append(book_id, [c.content for c in chunks])
+            for payload, ref in zip(payloads, refs):
+                payload["text_ref"] = ref
+        return self.qdrant.insert_chunks(book_id, payloads, embeddings, start_index=start_index)
+
     def ingest_book(
         self,
         book_id: str,
         book_dir: Path | None = None,
         force: bool = False,
+        resume_from: int = 0,
+        on_progress: ProgressCallback | None = None,
+        cleanup_on_error: bool = True,
     ) -> IngestResult:
         """
         Ingest a book into the RAG system.
 
+        Chunks are embedded and upserted in batches of `ingest_batch_size`.
+        Point IDs are deterministic, so a run resumed from a checkpoint
+        overwrites rather than duplicates anything already upserted.
+
+        The files are streamed section by section (see iter_markdown_sections)
+        rather than loaded: one pass counts the chunks, another feeds the
+        batches, so memory is bounded by the largest section and batch, not
+        by the size of the book.
+
         Args:
             book_id: Unique identifier for the book
             book_dir: Directory containing markdown files (defaults to docs/{book_id})
             force: If True, delete existing collection and re-ingest
+            resume_from: Number of chunks already upserted by an earlier run
+                of the same sources; those are skipped
+            on_progress: Called as (embedded, upserted, total) after each
+                embed and each upsert batch
+            cleanup_on_error: Delete the partial collection on failure
+                (disable to keep it for a later resume)
 
         Returns:
             IngestResult with status and statistics
         """
+        with book_lock(book_id):
+            return self._ingest_book(
+                book_id, book_dir, force, resume_from, on_progress, cleanup_on_error
+            )
+
+    def _ingest_book(
+        self,
+        book_id: str,
+        book_dir: Path | None,
+        force: bool,
+        resume_from: int,
+        on_progress: ProgressCallback | None,
+        cleanup_on_error: bool,
+    ) -> IngestResult:
         if book_dir is None:
             book_dir = settings.docs_path / book_id
 
@@ -178,11 +590,13 @@ class IngestService:
                 error=f"Directory not found: {book_dir}",
             )
 
-        # Handle existing collection
-        if self.qdrant.collection_exists(book_id):
+        # Handle existing collection (a resumed run continues filling it)
+        if resume_from and not self.qdrant.collection_exists(book_id):
+            resume_from = 0
+        if not resume_from and self.qdrant.collection_exists(book_id):
             if force:
                 logger.info(f"Force flag set, deleting existing collection: {book_id}")
-                self.qdrant.delete_collection(book_id)
+                self._delete_collection(book_id)
             else:
                 return IngestResult(
                     book_id=book_id,
@@ -193,8 +607,7 @@ class IngestService:
                 )
 
         try:
-            # Load markdown files
-            files = self._load_markdown_files(book_dir)
+            files = sorted(book_dir.glob("*.md"))
             if not files:
                 return IngestResult(
                     book_id=book_id,
@@ -206,15 +619,12 @@ class IngestService:
 
             logger.info(f"Found {len(files)} markdown files")
 
-            # Chunk all files
-            all_chunks: list[ChunkMetadata] = []
-            for filename, content in files:
-                chunks = self._chunk_markdown(content, filename)
-                all_chunks.extend(chunks)
+            # Count the chunks without keeping them
+            total = sum(1 for _ in self._iter_chunks(book_dir))
 
-            logger.info(f"Generated {len(all_chunks)} chunks")
+            logger.info(f"Generated {total} chunks")
 
-            if not all_chunks:
+            if not total:
                 return IngestResult(
                     book_id=book_id,
                     status=IngestStatus.ERROR,
@@ -223,27 +633,41 @@ class IngestService:
                     error="No chunks generated from files",
                 )
 
-            # Generate embeddings
-            logger.info("Generating embeddings...")
-            texts = [chunk.content for chunk in all_chunks]
-            embeddings = self.llm.embed(texts)
+            # A resumed run keeps the reducer (or full size) its vectors use
+            if resume_from:
+                reducer, sampled = self.reducers.load(book_id), {}
+            else:
+                reducer, sampled = self._fit_reducer(book_id, self._iter_chunks(book_dir), total)
 
-            # Create collection and insert
+            # Create collection, then embed and insert batch by batch
             logger.info("Creating Qdrant collection and inserting chunks...")
-            self.qdrant.create_collection(book_id)
-
-            chunk_dicts = [
-                {
-                    "content": c.content,
-                    "source_file": c.source_file,
-                    "titulo": c.titulo,
-                    "seccion": c.seccion,
-                    "subseccion": c.subseccion,
-                }
-                for c in all_chunks
-            ]
+            if not self.qdrant.collection_exists(book_id):
+                self.qdrant.create_collection(
+                    book_id, vector_size=reducer.dim if reducer else None
+                )
 
-            inserted = self.qdrant.insert_chunks(book_id, chunk_dicts, embeddings)
+            resume_from = min(resume_from, total)
+            inserted = resume_from
+            if resume_from:
+                logger.info(f"Resuming {book_id} at chunk {resume_from}/{total}")
+
+            chunks = islice(self._iter_chunks(book_dir), resume_from, total)
+            for start in range(resume_from, total, self.batch_size):
+                batch = list(islice(chunks, self.batch_size))
+                if not batch:
+                    break  # Docs edited since they were counted; the watcher syncs them
+                embeddings = self._embed_batch(batch, start, sampled)
+                if reducer:
+                    embeddings = reducer.transform(embeddings)
+                if on_progress:
+                    on_progress(start + len(batch), inserted, total)
+
+                inserted += self._insert(book_id, batch, embeddings, start_index=start)
+                if on_progress:
+                    on_progress(start + len(batch), inserted, total)
+
+            if settings.retriever_hierarchical:
+                self._build_sections(book_id)
 
             logger.info(f"Ingestion complete: {inserted} chunks inserted")
 
@@ -257,8 +681,8 @@ class IngestService:
         except Exception as e:
             logger.exception(f"Ingestion failed for {book_id}")
             # Cleanup on failure
-            if self.qdrant.collection_exists(book_id):
-                self.qdrant.delete_collection(book_id)
+            if cleanup_on_error and self.qdrant.collection_exists(book_id):
+                self._delete_collection(book_id)
 
             return IngestResult(
                 book_id=book_id,
@@ -268,9 +692,137 @@ class IngestService:
                 error=str(e),
             )
 
+    def _embed_batch(
+        self, batch: list[ChunkMetadata], start: int, sampled: dict[int, "np.ndarray"]
+    ) -> list[list[float]]:
+        """Embed a batch, reusing embeddings already computed for the PCA fit."""
+        missing = [c.content for i, c in enumerate(batch, start) if i not in sampled]
+        embedded = iter(self.llm.embed(missing) if missing else [])
+        return [
+            sampled[i].tolist() if i in sampled else next(embedded)
+            for i in range(start, start + len(batch))
+        ]
+
+    def sync_files(self, book_id: str, filenames: list[str]) -> IngestResult:
+        """
+        Re-ingest only the given files of a book.
+
+        Each file's new chunks are upserted over its old ones (same IDs,
+        same place in the book's chunk numbering) before the chunks it no
+        longer has are deleted, so searches never see the file missing.
+        Files that no longer exist are removed from the collection. A book
+        without a collection is ingested in full; a book whose folder is
+        gone is deleted. Runs under the book's lock (see book_lock).
+
+        Returns:
+            IngestResult with the book's total chunk count
+        """
+        with book_lock(book_id):
+            return self._sync_files(book_id, filenames)
+
+    def _sync_files(self, book_id: str, filenames: list[str]) -> IngestResult:
+        book_dir = settings.docs_path / book_id
+
+        if not book_dir.is_dir():
+            if self.qdrant.collection_exists(book_id):
+                logger.info(f"Docs folder for {book_id} removed, deleting collection")
+                self._delete_collection(book_id)
+            return IngestResult(
+                book_id=book_id,
+                status=IngestStatus.PENDING,
+                chunks_count=0,
+                files_processed=0,
+                error=f"Directory not found: {book_dir}",
+            )
+
+        if not self.qdrant.collection_exists(book_id):
+            return self.ingest_book(book_id, book_dir)
+
+        if self.answers is not None:
+            # Precomputed answers may quote the old text; the warm-up redoes them
+            self.answers.delete(book_id)
+
+        try:
+            reducer = self.reducers.load(book_id)
+            for filename in filenames:
+                path = book_dir / filename
+                chunks = list(self._chunk_file(path)) if path.is_file() else []
+                embeddings = self.llm.embed([c.content for c in chunks]) if chunks else []
+                if reducer:
+                    embeddings = reducer.transform(embeddings)
+
+                if not chunks:
+                    self.qdrant.delete_source_file(book_id, filename)
+                    logger.info(f"Synced {book_id}/{filename}: 0 chunks")
+                    continue
+
+                # Reuse the file's chunk indexes; a new file goes after the rest
+                current = self.qdrant.chunk_index_range(book_id, filename)
+                if current is None:
+                    current = self.qdrant.chunk_index_range(book_id) or range(0)
+                    start = current.stop
+                else:
+                    start = current.start
+                self._insert(book_id, chunks, embeddings, start_index=start)
+                self.qdrant.delete_source_file(
+                    book_id, filename, keep=range(start, start + len(chunks))
+                )
+                if settings.retriever_hierarchical:
+                    self._build_sections(book_id, source_file=filename)
+                logger.info(f"Synced {book_id}/{filename}: {len(chunks)} chunks")
+
+        except Exception as e:
+            logger.exception(f"Incremental ingestion failed for {book_id}")
+            return IngestResult(
+                book_id=book_id,
+                status=IngestStatus.ERROR,
+                chunks_count=self.qdrant.count_chunks(book_id),
+                files_processed=0,
+                error=str(e),
+            )
+
+        try:
+            self._compact_texts(book_id)
+        except Exception:
+            # The sync itself succeeded; old texts just stay until the next try
+            logger.exception(f"Compacting chunk texts of {book_id} failed")
+
+        return IngestResult(
+            book_id=book_id,
+            status=IngestStatus.READY,
+            chunks_count=self.qdrant.count_chunks(book_id),
+            files_processed=len(filenames),
+        )
+
+    def _compact_texts(self, book_id: str) -> None:
+        """
+        Rewrite the book's local chunk texts once superseded ones (left by
+        incremental syncs) pass CHUNK_STORE_COMPACT_RATIO of the stored bytes.
+
+        Live texts are copied to a new file, the points repointed, and only
+        then the old files deleted; a search holding an old ref meanwhile
+        falls back to Qdrant for the text.
+        """
+        if self.text_store is None:
+            return
+        stored = self.text_store.size(book_id)
+        if stored < settings.chunk_store_compact_min_bytes:
+            return
+        refs = self.qdrant.text_refs(book_id)
+        live = sum(ref["length"] for ref in refs.values())
+        if (stored - live) / stored < settings.chunk_store_compact_ratio:
+            return
+
+        new_refs = self.text_store.rewrite(book_id, refs)
+        self.qdrant.set_text_refs(book_id, new_refs)
+        freed = self.text_store.prune(
+            book_id, keep={ref["file"] for ref in new_refs.values()}
+        )
+        logger.info(f"Compacted chunk texts of {book_id}: {freed} bytes freed")
+
     def delete_book(self, book_id: str) -> bool:
         """Delete a book's collection."""
-        return self.qdrant.delete_collection(book_id)
+        return self._delete_collection(book_id)
 
     def get_book_status(self, book_id: str) -> dict:
         """Get the status of a book's collection."""
@@ -292,5 +844,8 @@ class IngestService:
         return self.qdrant.list_collections()
 
 
-# Default service instance
-ingest_service = IngestService()
+def __getattr__(name: str) -> Any:
+    # Former module-level singleton, now built lazily by the container
+    if name == "ingest_service":
+        return container.ingest
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,312 @@
+"""
+Leader election for startup ingestion.
+With several uvicorn workers (or nodes) only the leader auto-ingests docs/,
+watches it and resumes interrupted ingest jobs; the others serve requests.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from pathlib import Path
+from typing import IO, Any
+from uuid import NAMESPACE_URL, uuid4, uuid5
+
+from app.core.config import settings
+from app.core.container import container
+
+logger = logging.getLogger(__name__)
+
+
+def _owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class LeaderElection(ABC):
+    """
+    One leader per deployment, chosen at startup.
+
+    The leader publishes a small state record (owner, acquired_at, ready);
+    followers read it to learn when the leader's startup ingestion is done.
+    """
+
+    def __init__(self):
+        self.owner = _owner_id()
+        self.is_leader = False
+
+    @abstractmethod
+    def try_acquire(self) -> bool:
+        """Become the leader if nobody else is; never blocks for long."""
+        ...
+
+    @abstractmethod
+    def read_state(self) -> dict[str, Any] | None:
+        """The current leader's state record, if any."""
+        ...
+
+    @abstractmethod
+    def _write_state(self, state: dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def release(self) -> None:
+        ...
+
+    def mark_ready(self) -> None:
+        """Leader only: startup ingestion finished."""
+        try:
+            state = self.read_state() or {}
+            self._write_state({**state, "ready": True, "ready_at": time.time()})
+        except Exception:
+            logger.exception("Failed to publish leader readiness")
+
+    async def wait_ready(self, timeout: float, poll_interval: float = 1.0) -> bool:
+        """
+        Follower only: wait until the leader's startup ingestion is done.
+
+        Returns True when the leader reports ready, or when the leader went
+        away and this process took over (and is now the leader).
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                state = await asyncio.to_thread(self.read_state)
+                if state and state.get("ready"):
+                    return True
+                if await asyncio.to_thread(self.try_acquire):
+                    return True
+            except Exception as e:
+                logger.warning(f"Waiting for ingestion leader: {e}")
+            await asyncio.sleep(poll_interval)
+        return False
+
+
+class FileLeaderElection(LeaderElection):
+    """
+    Leader election with an exclusive flock on a local file.
+
+    Works across the workers of one host (or hosts sharing a filesystem with
+    working locks). The kernel drops the lock when the leader process exits,
+    so a restarted worker can take over.
+    """
+
+    def __init__(self, path: Path | str | None = None):
+        super().__init__()
+        self.path = Path(path or settings.ingest_leader_lock_file)
+        self._file: IO[str] | None = None
+
+    def try_acquire(self) -> bool:
+        if self.is_leader:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with ExitStack() as stack:
+            lock_file = stack.enter_context(open(self.path, "a+"))
+            stack.callback(self._forget_file)
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+
+            self._file = lock_file
+            self._write_state({"owner": self.owner, "acquired_at": time.time(), "ready": False})
+            # Held (open and locked) while leader; release() closes it
+            stack.pop_all()
+        self.is_leader = True
+        return True
+
+    def _forget_file(self) -> None:
+        self._file = None
+
+    def read_state(self) -> dict[str, Any] | None:
+        try:
+            return json.loads(self.path.read_text() or "null")
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_state(self, state: dict[str, Any]) -> None:
+        if self._file is None:
+            raise RuntimeError("Only the leader can write the election state")
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(json.dumps(state))
+        self._file.flush()
+
+    def release(self) -> None:
+        if self._file is not None:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            finally:
+                self._file.close()
+                self._file = None
+        self.is_leader = False
+
+
+class QdrantLeaderElection(LeaderElection):
+    """
+    Best-effort leader election with a lease marker point in Qdrant.
+
+    Qdrant has no compare-and-set, so acquisition writes the marker, waits
+    `settle_seconds` and reads it back. That usually leaves one owner, but
+    it is not exclusive: if one candidate reads back before another's
+    delayed write lands, both see themselves as owner and both ingest.
+    Losing the lease in `_renew` only clears `is_leader`; an ingestion
+    already running carries on. Use it where an occasional duplicate
+    ingestion is acceptable; FileLeaderElection is the only exclusive mode.
+
+    The leader renews the lease in a background thread; a crashed leader's
+    lease expires after `lease_seconds` and another node can take over.
+    """
+
+    # Outside qdrant_collection_prefix, so it is never listed as a book
+    COLLECTION = "booktutor_leader"
+    POINT_ID = str(uuid5(NAMESPACE_URL, "booktutor:leader:ingest"))
+
+    def __init__(
+        self,
+        collection: str | None = None,
+        lease_seconds: float | None = None,
+        settle_seconds: float = 0.5,
+    ):
+        super().__init__()
+        self.collection = collection or self.COLLECTION
+        self.lease_seconds = lease_seconds or settings.ingest_leader_lease_seconds
+        self.settle_seconds = settle_seconds
+        self._stop_renewing = threading.Event()
+        self._renewer: threading.Thread | None = None
+
+    @property
+    def client(self):
+        return container.qdrant_client
+
+    def _ensure_collection(self) -> None:
+        from qdrant_client.http import models
+        from qdrant_client.http.exceptions import UnexpectedResponse
+
+        try:
+            self.client.get_collection(self.collection)
+        except (UnexpectedResponse, ValueError):
+            try:
+                self.client.create_collection(
+                    collection_name=self.collection,
+                    vectors_config=models.VectorParams(size=1, distance=models.Distance.DOT),
+                )
+            except (UnexpectedResponse, ValueError):
+                pass  # Another candidate created it first
+
+    def read_state(self) -> dict[str, Any] | None:
+        from qdrant_client.http.exceptions import UnexpectedResponse
+
+        try:
+            points = self.client.retrieve(self.collection, ids=[self.POINT_ID], with_payload=True)
+        except (UnexpectedResponse, ValueError):
+            return None
+        return points[0].payload if points else None
+
+    def _write_state(self, state: dict[str, Any]) -> None:
+        from qdrant_client.http import models
+
+        self.client.upsert(
+            collection_name=self.collection,
+            points=[models.PointStruct(id=self.POINT_ID, vector=[1.0], payload=state)],
+            wait=True,
+        )
+
+    def try_acquire(self) -> bool:
+        if self.is_leader:
+            return True
+        self._ensure_collection()
+        state = self.read_state()
+        if state and state.get("owner") != self.owner and state.get("expires_at", 0) > time.time():
+            return False
+
+        now = time.time()
+        self._write_state({
+            "owner": self.owner,
+            "acquired_at": now,
+            "expires_at": now + self.lease_seconds,
+            "ready": False,
+        })
+        time.sleep(self.settle_seconds)
+        state = self.read_state()
+        if not state or state.get("owner") != self.owner:
+            return False
+
+        self.is_leader = True
+        self._stop_renewing.clear()
+        self._renewer = threading.Thread(target=self._renew, daemon=True, name="leader-lease")
+        self._renewer.start()
+        return True
+
+    def _renew(self) -> None:
+        while not self._stop_renewing.wait(self.lease_seconds / 3):
+            try:
+                state = self.read_state()
+                if not state or state.get("owner") != self.owner:
+                    logger.error("Lost ingestion leadership (lease taken over)")
+                    self.is_leader = False
+                    return
+                self._write_state({**state, "expires_at": time.time() + self.lease_seconds})
+            except Exception:
+                logger.exception("Failed to renew ingestion leader lease")
+
+    def release(self) -> None:
+        from qdrant_client.http import models
+
+        self._stop_renewing.set()
+        if self._renewer is not None:
+            self._renewer.join(timeout=5)
+            self._renewer = None
+        if self.is_leader:
+            self.is_leader = False
+            try:
+                state = self.read_state()
+                if state and state.get("owner") == self.owner:
+                    self.client.delete(
+                        collection_name=self.collection,
+                        points_selector=models.PointIdsList(points=[self.POINT_ID]),
+                        wait=True,
+                    )
+            except Exception:
+                logger.exception("Failed to release ingestion leader lease")
+
+
+class NoElection(LeaderElection):
+    """Every process is a leader (single worker deployments)."""
+
+    def try_acquire(self) -> bool:
+        self.is_leader = True
+        return True
+
+    def read_state(self) -> dict[str, Any] | None:
+        return {"owner": self.owner, "ready": True}
+
+    def _write_state(self, state: dict[str, Any]) -> None:
+        pass
+
+    def release(self) -> None:
+        self.is_leader = False
+
+
+def get_leader_election(mode: str | None = None) -> LeaderElection:
+    """Build the election configured by INGEST_LEADER_ELECTION."""
+    mode = mode or settings.ingest_leader_election
+    if mode == "file":
+        return FileLeaderElection()
+    if mode == "qdrant":
+        if settings.qdrant_local_path is not None:
+            # Followers only hold read-only replicas and could not write the lease
+            logger.warning("Embedded Qdrant is single-node: using file leader election")
+            return FileLeaderElection()
+        logger.warning(
+            "INGEST_LEADER_ELECTION=qdrant is best-effort: two nodes starting together"
+            " may both ingest. Use file election for an exclusive leader"
+        )
+        return QdrantLeaderElection()
+    if mode == "none":
+        return NoElection()
+    raise ValueError(f"Unknown leader election mode: {mode}")
@@ -2,13 +2,22 @@
 RAG (Retrieval-Augmented Generation) service.
 Combines Qdrant retrieval with LLM generation for Q&A.
 """
+import asyncio
+import heapq
 import logging
+import time
 from dataclasses import dataclass
-from typing import AsyncIterator
+from typing import TYPE_CHECKING, Any, AsyncIterator
 
+from app.core.activity import LiveActivity
 from app.core.config import settings
-from app.db.qdrant import QdrantService, qdrant_service
-from app.llm.base import LLMProvider, get_default_provider
+from app.core.container import container
+from app.llm.base import LLMProvider
+
+if TYPE_CHECKING:
+    from app.db.answer_store import AnswerStore, PrecomputedAnswer
+    from app.db.qdrant import QdrantService  # Imported lazily (slow import)
+    from app.services.embedding_reduction import ReducerStore
 
 logger = logging.getLogger(__name__)
 
@@ -39,10 +48,60 @@ Respondes basándote EXCLUSIVAMENTE en el contenido del material proporcionado.
 1. Comienza con una introducción breve al tema
 2. Desarrolla los puntos principales con detalle
 3. Si aplica, incluye ejemplos o casos prácticos del material
-4. Concluye con un resumen si la respuesta es extensa
+4. Concluye con un resumen si la respuesta es extensa"""
 
+# The system prompt above is a static prefix shared by every request, so
+# the backend can reuse its KV cache. Everything that varies per request
+# (retrieved context and question) goes in this dynamic suffix.
+USER_PROMPT = """\
 Material de estudio disponible:
-{context}"""
+{context}
+
+Pregunta: {question}"""
+
+NO_RESULTS_ANSWER = "No encuentro información relevante en este libro para responder tu pregunta."
+
+# How many times larger than every other drop the elbow must be
+ELBOW_DOMINANCE = 2.0
+
+
+def adaptive_depth(
+    scores: list[float],
+    min_k: int,
+    max_k: int,
+    relative_score: float,
+    min_gap: float,
+    gap_share: float = 0.5,
+) -> int:
+    """
+    Number of results to keep from a best-first score list.
+
+    Keeps between `min_k` and `max_k` results: stops at the first score
+    below `relative_score` times the top score, then cuts at the largest
+    drop between consecutive scores (the elbow) if it stands out: it must
+    be at least `min_gap`, at least `gap_share` of the band the relative
+    cut keeps (top * (1 - relative_score)), and ELBOW_DOMINANCE times any
+    other drop. Score noise between similar chunks is neither, so a clear
+    winner keeps one or two chunks and a flat curve keeps max_k.
+    """
+    n = min(len(scores), max_k)
+    if n <= min_k:
+        return n
+
+    depth = n
+    for i in range(min_k, n):
+        if scores[i] < scores[0] * relative_score:
+            depth = i
+            break
+
+    if depth > min_k:
+        gaps = sorted(((scores[i - 1] - scores[i], i) for i in range(min_k, depth)), reverse=True)
+        gap, cut = gaps[0]
+        runner_up = gaps[1][0] if len(gaps) > 1 else 0.0
+        band = scores[0] * (1 - relative_score)
+        if gap >= max(min_gap, gap_share * band) and gap >= ELBOW_DOMINANCE * runner_up:
+            depth = cut
+    return depth
 
 
 @dataclass
@@ -54,6 +113,7 @@ class Source:
     subseccion: str | None
     content: str
     score: float
+    book_id: str | None = None
 
 
 @dataclass
@@ -70,13 +130,33 @@ class RAGService:
 
     def __init__(
         self,
-        qdrant: QdrantService | None = None,
+        qdrant: "QdrantService | None" = None,
         llm: LLMProvider | None = None,
+        reducers: "ReducerStore | None" = None,
+        answers: "AnswerStore | None" = None,
     ):
-        self.qdrant = qdrant or qdrant_service
-        self.llm = llm or get_default_provider()
+        self.qdrant = qdrant or container.qdrant
+        self.llm = llm or container.llm
+        self.reducers = reducers or container.reducers
+        if answers is None and settings.answer_cache_enabled:
+            answers = container.answers
+        self.answers = answers
         self.retriever_k = settings.retriever_k
         self.min_relevance = settings.min_relevance_score
+        self.adaptive = settings.retriever_adaptive
+        self.hierarchical = settings.retriever_hierarchical
+        self.sections_k = settings.retriever_sections_k
+        # When a live (user) question last started or finished; the answer
+        # warm-up only generates after a quiet period. The activity file
+        # carries the same signal to the other workers of the host.
+        self.last_live_request = 0.0
+        self.activity = LiveActivity(
+            settings.answer_warmup_activity_file if settings.answer_warmup_enabled else None
+        )
+
+    def _mark_live(self) -> None:
+        self.last_live_request = time.monotonic()
+        self.activity.touch()
 
     def _build_context(self, chunks: list[dict]) -> tuple[str, list[Source]]:
         """Build numbered context string and source list."""
@@ -93,12 +173,72 @@ class RAGService:
                     subseccion=chunk.get("subseccion"),
                     content=chunk["content"],
                     score=round(chunk["score"], 3),
+                    book_id=chunk.get("book_id"),
                 )
             )
 
         context = "\n\n".join(numbered_parts)
         return context, sources
 
+    def _top(self, results: list[dict], key: str = "score") -> list[dict]:
+        """Best-first (by `key`) results cut to the retrieval depth (fixed or adaptive)."""
+        if not self.adaptive:
+            return results[: self.retriever_k]
+        depth = adaptive_depth(
+            [r[key] for r in results],
+            min_k=settings.retriever_min_k,
+            max_k=self.retriever_k,
+            relative_score=settings.retriever_relative_score,
+            min_gap=settings.retriever_min_gap,
+            gap_share=settings.retriever_gap_share,
+        )
+        return results[:depth]
+
+    def _search(
+        self, book_id: str, query_embedding: list[float], limit: int | None = None
+    ) -> list[dict]:
+        """
+        Over-fetch candidate chunks for a question.
+
+        With RETRIEVER_HIERARCHICAL, books with a section index are searched
+        in two stages: the closest `retriever_sections_k` sections, then
+        only the chunks of those sections.
+        """
+        section_ids = None
+        if self.hierarchical:
+            section_ids = self.qdrant.search_sections(book_id, query_embedding, self.sections_k)
+        return self.qdrant.search(
+            book_id=book_id,
+            query_vector=query_embedding,
+            limit=limit or self.retriever_k * 3,  # Over-fetch for filtering
+            score_threshold=self.min_relevance,
+            section_ids=section_ids,
+        )
+
+    def _precomputed(
+        self, book_id: str, query_embedding: list[float]
+    ) -> "PrecomputedAnswer | None":
+        """A stored answer to a question close enough to this one."""
+        if self.answers is None:
+            return None
+        hit = self.answers.lookup(
+            book_id, query_embedding, settings.answer_cache_min_similarity
+        )
+        if hit is not None:
+            logger.info(
+                f"Precomputed answer for {book_id}: '{hit.question}' ({hit.similarity:.3f})"
+            )
+        return hit
+
+    def _reduce(self, book_id: str, embeddings: list[list[float]]) -> list[list[float]]:
+        """Project query embeddings like the book's stored vectors."""
+        reducer = self.reducers.load(book_id)
+        return reducer.transform(embeddings) if reducer else embeddings
+
+    def _build_prompt(self, context: str, question: str) -> str:
+        """Build the dynamic user prompt that follows the static system prompt."""
+        return USER_PROMPT.format(context=context, question=question)
+
     def ask(self, book_id: str, question: str) -> RAGResponse:
         """
         Ask a question about a specific book (synchronous).
@@ -115,22 +255,17 @@ class RAGService:
             raise ValueError(f"Book '{book_id}' not found")
 
         # Generate query embedding
-        query_embedding = self.llm.embed([question])[0]
+        query_embedding = self._reduce(book_id, self.llm.embed([question]))[0]
 
         # Retrieve relevant chunks
-        results = self.qdrant.search(
-            book_id=book_id,
-            query_vector=query_embedding,
-            limit=self.retriever_k * 3,  # Over-fetch for filtering
-            score_threshold=self.min_relevance,
-        )
+        results = self._search(book_id, query_embedding)
 
-        # Keep top k results
-        results = results[: self.retriever_k]
+        # Keep top k results (and only load their text)
+        results = self.qdrant.load_content(self._top(results))
 
         if not results:
             return RAGResponse(
-                answer="No encuentro información relevante en este libro para responder tu pregunta.",
+                answer=NO_RESULTS_ANSWER,
                 sources=[],
                 book_id=book_id,
                 model_used=self.llm.model,
@@ -140,8 +275,8 @@ class RAGService:
         context, sources = self._build_context(results)
 
         # Generate answer
-        system_prompt = SYSTEM_PROMPT.format(context=context)
-        answer = self.llm.generate(question, system_prompt=system_prompt)
+        prompt = self._build_prompt(context, question)
+        answer = self.llm.generate(prompt, system_prompt=SYSTEM_PROMPT)
 
         return RAGResponse(
             answer=answer,
@@ -151,33 +286,52 @@ class RAGService:
         )
 
     async def aask(self, book_id: str, question: str) -> RAGResponse:
-        """Ask a question asynchronously."""
+        """Ask a question asynchronously (precomputed answers first)."""
+        self._mark_live()
+        try:
+            return await self.agenerate_answer(book_id, question, use_precomputed=True)
+        finally:
+            self._mark_live()
+
+    async def agenerate_answer(
+        self, book_id: str, question: str, use_precomputed: bool = False
+    ) -> RAGResponse:
+        """
+        Retrieve and generate an answer.
+
+        Unlike aask(), not counted as live traffic and, by default, always
+        generated: the answer warm-up uses it to fill the answer store.
+        """
         if not self.qdrant.collection_exists(book_id):
             raise ValueError(f"Book '{book_id}' not found")
 
         # Generate query embedding
-        query_embedding = (await self.llm.aembed([question]))[0]
+        raw_embedding = (await self.llm.aembed([question]))[0]
+        hit = self._precomputed(book_id, raw_embedding) if use_precomputed else None
+        if hit is not None:
+            return RAGResponse(
+                answer=hit.answer,
+                sources=[Source(**source) for source in hit.sources],
+                book_id=book_id,
+                model_used=hit.model,
+            )
+        query_embedding = self._reduce(book_id, [raw_embedding])[0]
 
         # Retrieve relevant chunks
-        results = self.qdrant.search(
-            book_id=book_id,
-            query_vector=query_embedding,
-            limit=self.retriever_k * 3,
-            score_threshold=self.min_relevance,
-        )
-        results = results[: self.retriever_k]
+        results = self._search(book_id, query_embedding)
+        results = self.qdrant.load_content(self._top(results))
 
         if not results:
             return RAGResponse(
-                answer="No encuentro información relevante en este libro para responder tu pregunta.",
+                answer=NO_RESULTS_ANSWER,
                 sources=[],
                 book_id=book_id,
                 model_used=self.llm.model,
             )
 
         context, sources = self._build_context(results)
-        system_prompt = SYSTEM_PROMPT.format(context=context)
-        answer = await self.llm.agenerate(question, system_prompt=system_prompt)
+        prompt = self._build_prompt(context, question)
+        answer = await self.llm.agenerate(prompt, system_prompt=SYSTEM_PROMPT)
 
         return RAGResponse(
             answer=answer,
@@ -195,29 +349,246 @@ class RAGService:
         Returns:
             Tuple of (token iterator, sources list)
         """
+        self._mark_live()
         if not self.qdrant.collection_exists(book_id):
             raise ValueError(f"Book '{book_id}' not found")
 
+        raw_embedding = (await self.llm.aembed([question]))[0]
+        hit = self._precomputed(book_id, raw_embedding)
+        if hit is not None:
+            async def precomputed_stream():
+                yield hit.answer
+            return precomputed_stream(), [Source(**source) for source in hit.sources]
+
+        query_embedding = self._reduce(book_id, [raw_embedding])[0]
+
+        results = self._search(book_id, query_embedding)
+        results = self.qdrant.load_content(self._top(results))
+
+        if not results:
+            async def empty_stream():
+                yield NO_RESULTS_ANSWER
+            return empty_stream(), []
+
+        context, sources = self._build_context(results)
+        prompt = self._build_prompt(context, question)
+
+        return self._live(self.llm.astream(prompt, system_prompt=SYSTEM_PROMPT)), sources
+
+    async def _live(self, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Pass a live answer stream through, marking when it ends."""
+        try:
+            async for token in stream:
+                yield token
+        finally:
+            self._mark_live()
+
+    async def _aretrieve_multi(
+        self, book_ids: list[str], question: str
+    ) -> list[dict]:
+        """
+        Retrieve the global top-k chunks for a question across several books.
+
+        The question is embedded once. Per-subject collections are searched
+        concurrently, so latency tracks the slowest search rather than the
+        sum; in shared storage mode a single filtered search is enough
+        unless the books use different projections (per-subject PCA).
+
+        Books searched in the same vector space (no reduction, or the same
+        projection) are merged by raw cosine score. Per-subject PCA bases
+        put cosines on different scales, so then each book's candidates are
+        min-max normalized (`merge_score`) before merging; `score` stays the
+        raw value shown with the source.
+        """
+        exists = await asyncio.gather(
+            *(asyncio.to_thread(self.qdrant.collection_exists, b) for b in book_ids)
+        )
+        missing = [b for b, found in zip(book_ids, exists) if not found]
+        if missing:
+            raise ValueError(f"Books not found: {', '.join(missing)}")
+
         query_embedding = (await self.llm.aembed([question]))[0]
+        limit = self.retriever_k * 3
+        reducers = await asyncio.gather(
+            *(asyncio.to_thread(self.reducers.load, b) for b in book_ids)
+        )
+        signatures = {r.signature if r else None for r in reducers}
+        same_space = len(signatures) == 1
+        query_vectors = [
+            r.transform([query_embedding])[0] if r else query_embedding for r in reducers
+        ]
+
+        if self.qdrant.is_shared and same_space:
+            results = await asyncio.to_thread(
+                self.qdrant.search_many,
+                book_ids=book_ids,
+                query_vector=query_vectors[0],
+                limit=limit,
+                score_threshold=self.min_relevance,
+            )
+            return await asyncio.to_thread(
+                self.qdrant.load_content, self._top(results)
+            )
+
+        per_book = await asyncio.gather(
+            *(
+                asyncio.to_thread(self._search, book_id, query_vector, limit)
+                for book_id, query_vector in zip(book_ids, query_vectors)
+            )
+        )
+        key = "score" if same_space else "merge_score"
+        if not same_space:
+            for results in per_book:
+                if not results:
+                    continue
+                low = min(r["score"] for r in results)
+                spread = max(r["score"] for r in results) - low
+                for r in results:
+                    r["merge_score"] = (r["score"] - low) / spread if spread > 0 else 1.0
+        merged = heapq.nlargest(
+            self.retriever_k,
+            (r for results in per_book for r in results),
+            key=lambda r: r[key],
+        )
+        return await asyncio.to_thread(self.qdrant.load_content, self._top(merged, key))
 
-        results = self.qdrant.search(
+    async def aask_multi(self, book_ids: list[str], question: str) -> RAGResponse:
+        """
+        Ask a question across several books asynchronously.
+
+        Sources carry the book they come from; the response `book_id` is the
+        comma-separated list of books searched.
+        """
+        self._mark_live()
+        results = await self._aretrieve_multi(book_ids, question)
+        book_id = ",".join(book_ids)
+
+        if not results:
+            return RAGResponse(
+                answer=NO_RESULTS_ANSWER,
+                sources=[],
+                book_id=book_id,
+                model_used=self.llm.model,
+            )
+
+        context, sources = self._build_context(results)
+        prompt = self._build_prompt(context, question)
+        answer = await self.llm.agenerate(prompt, system_prompt=SYSTEM_PROMPT)
+        self._mark_live()
+
+        return RAGResponse(
+            answer=answer,
+            sources=sources,
             book_id=book_id,
-            query_vector=query_embedding,
-            limit=self.retriever_k * 3,
-            score_threshold=self.min_relevance,
+            model_used=self.llm.model,
         )
-        results = results[: self.retriever_k]
+
+    async def astream_multi(
+        self, book_ids: list[str], question: str
+    ) -> tuple[AsyncIterator[str], list[Source]]:
+        """
+        Stream answer tokens for a question across several books.
+
+        Returns:
+            Tuple of (token iterator, sources list)
+        """
+        self._mark_live()
+        results = await self._aretrieve_multi(book_ids, question)
 
         if not results:
             async def empty_stream():
-                yield "No encuentro información relevante en este libro para responder tu pregunta."
+                yield NO_RESULTS_ANSWER
             return empty_stream(), []
 
         context, sources = self._build_context(results)
-        system_prompt = SYSTEM_PROMPT.format(context=context)
+        prompt = self._build_prompt(context, question)
+
+        return self._live(self.llm.astream(prompt, system_prompt=SYSTEM_PROMPT)), sources
 
-        return self.llm.astream(question, system_prompt=system_prompt), sources
+    async def aask_batch(
+        self,
+        book_id: str,
+        questions: list[str],
+        max_concurrency: int | None = None,
+    ) -> AsyncIterator[tuple[int, RAGResponse | Exception]]:
+        """
+        Answer several questions about a book.
 
+        All questions are embedded in one batched call and retrieved
+        concurrently; generations run with at most `max_concurrency` in flight.
 
-# Default service instance
-rag_service = RAGService()
+        Returns:
+            Async iterator of (question index, response or error), in
+            completion order
+        """
+        self._mark_live()
+        if not await asyncio.to_thread(self.qdrant.collection_exists, book_id):
+            raise ValueError(f"Book '{book_id}' not found")
+
+        raw_embeddings = await self.llm.aembed(questions)
+        query_embeddings = self._reduce(book_id, raw_embeddings)
+        semaphore = asyncio.Semaphore(max_concurrency or settings.batch_max_concurrency)
+
+        async def answer_one(
+            index: int, question: str, query_embedding: list[float]
+        ) -> tuple[int, RAGResponse | Exception]:
+            try:
+                hit = self._precomputed(book_id, raw_embeddings[index])
+                if hit is not None:
+                    return index, RAGResponse(
+                        answer=hit.answer,
+                        sources=[Source(**source) for source in hit.sources],
+                        book_id=book_id,
+                        model_used=hit.model,
+                    )
+
+                results = await asyncio.to_thread(self._search, book_id, query_embedding)
+                results = await asyncio.to_thread(
+                    self.qdrant.load_content, self._top(results)
+                )
+
+                if not results:
+                    return index, RAGResponse(
+                        answer=NO_RESULTS_ANSWER,
+                        sources=[],
+                        book_id=book_id,
+                        model_used=self.llm.model,
+                    )
+
+                context, sources = self._build_context(results)
+                prompt = self._build_prompt(context, question)
+                async with semaphore:
+                    answer = await self.llm.agenerate(prompt, system_prompt=SYSTEM_PROMPT)
+                self._mark_live()
+
+                return index, RAGResponse(
+                    answer=answer,
+                    sources=sources,
+                    book_id=book_id,
+                    model_used=self.llm.model,
+                )
+            except Exception as e:
+                logger.exception(f"Batch question {index} failed for {book_id}")
+                return index, e
+
+        async def results_as_completed():
+            tasks = [
+                asyncio.create_task(answer_one(i, q, e))
+                for i, (q, e) in enumerate(zip(questions, query_embeddings))
+            ]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+            finally:
+                # Client went away or iteration stopped early
+                for task in tasks:
+                    task.cancel()
+
+        return results_as_completed()
+
+
+def __getattr__(name: str) -> Any:
+    # Former module-level singleton, now built lazily by the container
+    if name == "rag_service":
+        return container.rag
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
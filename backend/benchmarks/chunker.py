@@ -0,0 +1,165 @@
+"""
+Markdown chunker micro-benchmark.
+
+Generates a synthetic markdown corpus (headings, paragraphs, code blocks
+and some oversize paragraphs) and compares the single-pass chunker in
+IngestService against the previous regex/re-scan implementation.
+
+Usage (from backend/):
+    python -m benchmarks.chunker --docs 200 --sections 40
+    python -m benchmarks.chunker --unit tokens --chunk-size 256 --chunk-overlap 32
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+
+from app.services.ingest_service import IngestService, count_tokens
+
+WORDS = (
+    "sistema proceso memoria archivo usuario red datos tabla consulta "
+    "variable función clase objeto lista bucle condición servidor cliente "
+    "virtualización núcleo hardware software licencia versión instalación"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(6, 18))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+
+def make_document(rng: random.Random, sections: int) -> str:
+    """A synthetic chapter resembling the docs/ material."""
+    parts = [f"# **Tema {rng.randint(1, 99)}**", _paragraph(rng, 3)]
+    for s in range(sections):
+        parts.append(f"## Sección {s}")
+        parts.append(_paragraph(rng, rng.randint(2, 6)))
+        if rng.random() < 0.5:
+            parts.append(f"### Subsección {s}.1")
+            parts.append(_paragraph(rng, rng.randint(2, 8)))
+        if rng.random() < 0.3:
+            parts.append("```python\n# comentario\nx = 1\n\nprint(x)\n```")
+        if rng.random() < 0.1:
+            # Oversize paragraph (well above the default chunk_size)
+            parts.append(_paragraph(rng, 60))
+    return "\n\n".join(parts) + "\n"
+
+
+BOLD_HEADER_RE = re.compile(r"^(#{1,6})\s+\*\*(.+?)\*\*\s*$", re.MULTILINE)
+
+
+class LegacyChunker:
+    """The pre-refactor chunker: lookahead split, per-section re-scan,
+    string concatenation and no overlap."""
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+
+    def _extract_header_metadata(self, text: str) -> dict[str, str | None]:
+        metadata = {"titulo": None, "seccion": None, "subseccion": None}
+        for line in text.split("\n"):
+            line = line.strip()
+            if line.startswith("# ") and not metadata["titulo"]:
+                metadata["titulo"] = line[2:].strip()
+            elif line.startswith("## ") and not metadata["seccion"]:
+                metadata["seccion"] = line[3:].strip()
+            elif line.startswith("### ") and not metadata["subseccion"]:
+                metadata["subseccion"] = line[4:].strip()
+        return metadata
+
+    def chunk(self, content: str) -> list[str]:
+        content = BOLD_HEADER_RE.sub(r"\1 \2", content)
+        chunks = []
+        for section in re.split(r"(?=^## )", content, flags=re.MULTILINE):
+            if not section.strip():
+                continue
+            self._extract_header_metadata(section)
+            if len(section) <= self.chunk_size:
+                chunks.append(section.strip())
+                continue
+            current_chunk = ""
+            for para in section.split("\n\n"):
+                if len(current_chunk) + len(para) <= self.chunk_size:
+                    current_chunk += para + "\n\n"
+                else:
+                    if current_chunk.strip():
+                        chunks.append(current_chunk.strip())
+                    current_chunk = para + "\n\n"
+            if current_chunk.strip():
+                chunks.append(current_chunk.strip())
+        return chunks
+
+
+def _time(fn, repeat: int) -> float:
+    """Best-of-N wall time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--sections", type=int, default=40, help="## sections per document")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--unit", choices=["chars", "tokens"], default="chars")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [make_document(rng, args.sections) for _ in range(args.docs)]
+    corpus_mb = sum(len(d.encode("utf-8")) for d in corpus) / 1e6
+
+    length = count_tokens if args.unit == "tokens" else len
+    service = IngestService(qdrant=object(), llm=object(), length_function=length)
+    service.chunk_size = args.chunk_size
+    service.chunk_overlap = args.chunk_overlap
+    legacy = LegacyChunker(args.chunk_size)
+
+    new_chunks = [c for d in corpus for c in service._chunk_markdown(d, "doc.md")]
+    legacy_chunks = [c for d in corpus for c in legacy.chunk(d)]
+
+    new_s = _time(lambda: [service._chunk_markdown(d, "doc.md") for d in corpus], args.repeat)
+    legacy_s = _time(lambda: [legacy.chunk(d) for d in corpus], args.repeat)
+
+    def sizes(texts: list[str]) -> dict:
+        values = [length(t) for t in texts]
+        return {
+            "count": len(values),
+            "mean": round(statistics.mean(values), 1),
+            "max": max(values),
+            "over_chunk_size": sum(v > args.chunk_size for v in values),
+        }
+
+    report = {
+        "corpus_mb": round(corpus_mb, 2),
+        "unit": args.unit,
+        "chunk_size": args.chunk_size,
+        "chunk_overlap": args.chunk_overlap,
+        "single_pass": {
+            "seconds": round(new_s, 3),
+            "mb_per_s": round(corpus_mb / new_s, 1),
+            "chunks": sizes([c.content for c in new_chunks]),
+        },
+        "legacy": {
+            "seconds": round(legacy_s, 3),
+            "mb_per_s": round(corpus_mb / legacy_s, 1),
+            "chunks": sizes(legacy_chunks),
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Embedding reduction benchmark: index memory, search latency and recall@k.
+
+Chunks a subject from docs/, embeds the chunks and a set of queries taken
+from the chunks themselves (a sentence each), and takes the exact top-k
+with full-size vectors as ground truth. Each reduction (truncation, PCA)
+and target size is then loaded into Qdrant and searched, reporting the
+stored vector memory, search latency and recall@k against that ground truth.
+
+Embeddings come from Ollama (EMBEDDING_MODEL) or, with --fake, from the
+feature-hashed vectors of benchmarks.fake_ollama (plumbing checks only:
+hashed features say nothing about how a real model truncates).
+
+Usage (from backend/):
+    python -m benchmarks.embedding_reduction --subject programacion
+    python -m benchmarks.embedding_reduction --subject programacion --dims 256,512,1024 --k 10
+    python -m benchmarks.embedding_reduction --subject programacion --qdrant-url http://localhost:6333
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.core.config import settings
+from app.services.embedding_reduction import EmbeddingReducer, PCAProjection, Truncation
+from app.services.ingest_service import IngestService
+from benchmarks.fake_ollama import embed_text
+
+BENCH_COLLECTION = "bench_reduction"
+SENTENCE_RE = re.compile(r"[^.!?\n]{40,200}[.!?]")
+
+
+def _embed(texts: list[str], fake: bool, batch_size: int = 64) -> np.ndarray:
+    if fake:
+        vectors = [embed_text(t, settings.embedding_dimensions) for t in texts]
+    else:
+        from app.llm.ollama import OllamaProvider
+
+        provider = OllamaProvider()
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            vectors.extend(provider.embed(texts[start:start + batch_size]))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _load_chunks(subject_dir: Path) -> list[str]:
+    ingest = IngestService(qdrant=object(), llm=object(), reducers=object())
+    chunks = []
+    for md_file in sorted(subject_dir.glob("*.md")):
+        content = md_file.read_text(encoding="utf-8")
+        chunks.extend(c.content for c in ingest._chunk_markdown(content, md_file.name))
+    return chunks
+
+
+def _queries(chunks: list[str], count: int, seed: int) -> list[str]:
+    """One sentence from each of `count` random chunks."""
+    rng = random.Random(seed)
+    sentences = []
+    for chunk in rng.sample(chunks, min(count * 2, len(chunks))):
+        found = SENTENCE_RE.findall(chunk)
+        if found:
+            sentences.append(rng.choice(found).strip())
+        if len(sentences) == count:
+            break
+    return sentences
+
+
+def _exact_top_k(docs: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ docs.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def _reducer(method: str, dim: int, docs: np.ndarray, pca_samples: int) -> EmbeddingReducer | None:
+    if method == "truncate":
+        return Truncation(dim)
+    sample = docs[np.linspace(0, len(docs) - 1, min(len(docs), pca_samples)).astype(int)]
+    if len(sample) <= dim:
+        return None  # Not enough chunks to fit this many components
+    return PCAProjection.fit(sample, dim)
+
+
+def _search(
+    client: QdrantClient, docs: np.ndarray, queries: np.ndarray, k: int
+) -> tuple[np.ndarray, list[float]]:
+    """Load docs into a fresh collection; return top-k ids and latencies (ms)."""
+    try:
+        client.delete_collection(BENCH_COLLECTION)
+    except Exception:
+        pass
+    client.create_collection(
+        collection_name=BENCH_COLLECTION,
+        vectors_config=models.VectorParams(size=docs.shape[1], distance=models.Distance.COSINE),
+    )
+    for start in range(0, len(docs), 512):
+        client.upsert(
+            collection_name=BENCH_COLLECTION,
+            points=models.Batch(
+                ids=list(range(start, min(start + 512, len(docs)))),
+                vectors=docs[start:start + 512].tolist(),
+            ),
+            wait=True,
+        )
+
+    found = np.zeros((len(queries), k), dtype=int)
+    latencies = []
+    try:
+        for i, query in enumerate(queries):
+            start = time.perf_counter()
+            hits = client.search(BENCH_COLLECTION, query_vector=query.tolist(), limit=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found[i, : len(hits)] = [hit.id for hit in hits]
+    finally:
+        client.delete_collection(BENCH_COLLECTION)
+    return found, latencies
+
+
+def run(args: argparse.Namespace) -> dict:
+    subject_dir = settings.docs_path / args.subject
+    chunks = _load_chunks(subject_dir)
+    queries = _queries(chunks, args.queries, args.seed)
+    if not chunks or not queries:
+        raise SystemExit(f"No chunks/queries found in {subject_dir}")
+
+    start = time.perf_counter()
+    docs = _embed(chunks, args.fake)
+    query_vectors = _embed(queries, args.fake)
+    embed_s = time.perf_counter() - start
+    truth = _exact_top_k(docs, query_vectors, args.k)
+
+    client = QdrantClient(url=args.qdrant_url) if args.qdrant_url else QdrantClient(":memory:")
+    full_dim = docs.shape[1]
+
+    def measure(method: str, reducer: EmbeddingReducer | None) -> dict:
+        reduced_docs = reducer.reduce(docs) if reducer else docs
+        reduced_queries = reducer.reduce(query_vectors) if reducer else query_vectors
+        found, latencies = _search(client, reduced_docs, reduced_queries, args.k)
+        recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+        latencies.sort()
+        n, dim = reduced_docs.shape
+        return {
+            "method": method,
+            "dim": dim,
+            "vector_memory_mb": round(n * dim * 4 / 2**20, 2),
+            f"recall@{args.k}": round(float(recall), 4),
+            "search_ms": {
+                "p50": round(statistics.median(latencies), 3),
+                "p95": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+            },
+        }
+
+    # Full size through Qdrant (HNSW) as the reference point
+    results = [measure("none", None)]
+    for method in args.methods:
+        for dim in (d for d in args.dims if d < full_dim):
+            reducer = _reducer(method, dim, docs, args.pca_samples)
+            if reducer is None:
+                results.append({"method": method, "dim": dim, "skipped": "too few chunks for PCA"})
+            else:
+                results.append(measure(method, reducer))
+
+    return {
+        "subject": args.subject,
+        "embeddings": "fake" if args.fake else settings.embedding_model,
+        "qdrant": args.qdrant_url or ":memory:",
+        "chunks": len(chunks),
+        "queries": len(queries),
+        "embed_s": round(embed_s, 2),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subject", required=True, help="Folder under docs/")
+    parser.add_argument("--dims", default="256,512,1024", help="Comma-separated target sizes")
+    parser.add_argument("--methods", default="truncate,pca", help="Comma-separated: truncate,pca")
+    parser.add_argument("--k", type=int, default=settings.retriever_k)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--pca-samples", type=int, default=settings.embedding_pca_samples)
+    parser.add_argument("--qdrant-url", help="Qdrant server (default: in-memory local mode)")
+    parser.add_argument("--fake", action="store_true", help="Hashed fake embeddings, no Ollama")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    args.dims = [int(d) for d in args.dims.split(",")]
+    args.methods = args.methods.split(",")
+
+    text = json.dumps(run(args), indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
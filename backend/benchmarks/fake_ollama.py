@@ -0,0 +1,161 @@
+"""
+Deterministic stand-in for the Ollama HTTP API.
+
+Implements the endpoints OllamaProvider uses (/api/chat streaming and not,
+/api/embed, /api/tags) with configurable latencies, so the API can be load
+tested without a GPU. /stats counts streamed tokens, which shows whether
+abandoned streams stop generating. Embeddings are feature-hashed bags of words: texts
+sharing words get similar vectors, which keeps retrieval scores realistic
+enough to pass MIN_RELEVANCE_SCORE.
+
+Usage (from backend/):
+    python -m benchmarks.fake_ollama --port 11435 --token-delay-ms 20
+    OLLAMA_BASE_URL=http://localhost:11435 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import math
+import re
+import time
+import zlib
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.core.config import settings
+
+WORD_RE = re.compile(r"\w+")
+
+# Deterministic filler for generated answers
+ANSWER_WORDS = (
+    "El material explica que este concepto se basa en los puntos "
+    "anteriores y se aplica paso a paso con un ejemplo práctico [1]."
+).split()
+
+
+@dataclass
+class FakeOllamaConfig:
+    token_delay_ms: float = 20.0  # Between streamed tokens
+    prompt_delay_ms: float = 100.0  # Before the first token (prompt eval)
+    tokens: int = 64  # Tokens per answer (capped by num_predict)
+    embed_delay_ms: float = 10.0  # Per /api/embed call
+    embed_delay_per_text_ms: float = 1.0
+    dim: int = settings.embedding_dimensions
+
+
+def embed_text(text: str, dim: int) -> list[float]:
+    """Feature-hashed, L2-normalized bag-of-words vector."""
+    vector = [0.0] * dim
+    for word in WORD_RE.findall(text.lower()):
+        h = zlib.crc32(word.encode())
+        vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _answer_tokens(count: int) -> list[str]:
+    return [
+        (" " if i else "") + ANSWER_WORDS[i % len(ANSWER_WORDS)]
+        for i in range(count)
+    ]
+
+
+def create_app(config: FakeOllamaConfig) -> FastAPI:
+    app = FastAPI(title="Fake Ollama")
+    stats = {"tokens_streamed": 0, "streams_started": 0, "streams_completed": 0}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": settings.default_llm_model}, {"name": settings.embedding_model}]}
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        body = await request.json()
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await asyncio.sleep(
+            (config.embed_delay_ms + config.embed_delay_per_text_ms * len(texts)) / 1000
+        )
+        return {
+            "model": body.get("model"),
+            "embeddings": [embed_text(t, config.dim) for t in texts],
+        }
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        num_predict = body.get("options", {}).get("num_predict") or config.tokens
+        tokens = _answer_tokens(min(config.tokens, num_predict))
+        model = body.get("model")
+
+        def message(content: str, done: bool) -> dict:
+            return {
+                "model": model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "message": {"role": "assistant", "content": content},
+                "done": done,
+            }
+
+        if not body.get("stream", True):
+            await asyncio.sleep(
+                (config.prompt_delay_ms + config.token_delay_ms * len(tokens)) / 1000
+            )
+            return JSONResponse(message("".join(tokens), True))
+
+        async def generate():
+            stats["streams_started"] += 1
+            await asyncio.sleep(config.prompt_delay_ms / 1000)
+            for token in tokens:
+                stats["tokens_streamed"] += 1
+                yield json.dumps(message(token, False)) + "\n"
+                await asyncio.sleep(config.token_delay_ms / 1000)
+            stats["streams_completed"] += 1
+            yield json.dumps(message("", True)) + "\n"
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = FakeOllamaConfig()
+    parser.add_argument("--token-delay-ms", type=float, default=defaults.token_delay_ms)
+    parser.add_argument("--prompt-delay-ms", type=float, default=defaults.prompt_delay_ms)
+    parser.add_argument("--tokens", type=int, default=defaults.tokens)
+    parser.add_argument("--embed-delay-ms", type=float, default=defaults.embed_delay_ms)
+    parser.add_argument(
+        "--embed-delay-per-text-ms", type=float, default=defaults.embed_delay_per_text_ms
+    )
+    parser.add_argument("--dim", type=int, default=defaults.dim)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeOllamaConfig:
+    return FakeOllamaConfig(
+        token_delay_ms=args.token_delay_ms,
+        prompt_delay_ms=args.prompt_delay_ms,
+        tokens=args.tokens,
+        embed_delay_ms=args.embed_delay_ms,
+        embed_delay_per_text_ms=args.embed_delay_per_text_ms,
+        dim=args.dim,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Import-time benchmark: cold start cost of `import app.main` per worker.
+
+Each run is a fresh interpreter with `python -X importtime`, as a uvicorn
+worker would start. Reports the app import time, the whole process time and
+the heaviest top-level packages. With --compare-ref, the same measurement
+runs on a git worktree of another commit for a before/after view.
+
+Usage (from backend/):
+    python -m benchmarks.import_time --runs 10
+    python -m benchmarks.import_time --compare-ref HEAD~1
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+# Time to build the services once imported (where the deferred cost went)
+BUILD_SERVICES = """
+import time
+from app.core.container import container
+start = time.perf_counter()
+container.rag, container.ingest
+print(f"BUILD_MS={(time.perf_counter() - start) * 1000:.2f}")
+"""
+
+
+def _run_once(module: str, cwd: Path, build: bool) -> dict:
+    code = f"import {module}" + (f"\n{BUILD_SERVICES}" if build else "")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    process_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise SystemExit(f"Import failed in {cwd}:\n{result.stderr[-2000:]}")
+
+    import_ms = None
+    self_by_package: Counter[str] = Counter()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        self_by_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == module:
+            import_ms = int(cumulative_us) / 1000
+
+    build_ms = None
+    for line in result.stdout.splitlines():
+        if line.startswith("BUILD_MS="):
+            build_ms = float(line.split("=", 1)[1])
+
+    return {
+        "import_ms": import_ms,
+        "process_ms": process_ms,
+        "build_ms": build_ms,
+        "packages": self_by_package,
+    }
+
+
+def measure(module: str, cwd: Path, runs: int, top: int, build: bool) -> dict:
+    _run_once(module, cwd, build=False)  # Warm the OS file cache and .pyc files
+    samples = [_run_once(module, cwd, build=False) for _ in range(runs)]
+    # Separate runs, so process_ms stays comparable with trees without a container
+    built = [_run_once(module, cwd, build=True) for _ in range(runs)] if build else []
+
+    def summary(key: str, runs: list[dict]) -> dict | None:
+        values = [s[key] for s in runs if s[key] is not None]
+        if not values:
+            return None
+        return {"median": round(statistics.median(values), 1), "min": round(min(values), 1)}
+
+    packages: Counter[str] = Counter()
+    for sample in samples:
+        packages.update(sample["packages"])
+    return {
+        "import_ms": summary("import_ms", samples),
+        "process_ms": summary("process_ms", samples),
+        "service_build_ms": summary("build_ms", built),
+        "top_packages_ms": {
+            name: round(total / runs, 1) for name, total in packages.most_common(top)
+        },
+    }
+
+
+def _measure_ref(ref: str, args: argparse.Namespace) -> dict:
+    """Measure another commit in a temporary git worktree."""
+    repo_root = Path(
+        subprocess.check_output(["git", "rev-parse", "--show-toplevel"], text=True).strip()
+    )
+    backend = Path.cwd().resolve().relative_to(repo_root)
+    with tempfile.TemporaryDirectory(prefix="booktutor-importtime-") as tmp:
+        worktree = Path(tmp) / "tree"
+        subprocess.run(
+            ["git", "worktree", "add", "--detach", str(worktree), ref],
+            check=True,
+            capture_output=True,
+        )
+        try:
+            return measure(args.module, worktree / backend, args.runs, args.top, build=False)
+        finally:
+            subprocess.run(
+                ["git", "worktree", "remove", "--force", str(worktree)], capture_output=True
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="Heaviest packages to list")
+    parser.add_argument("--compare-ref", help="Also measure this git ref (e.g. HEAD~1)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "current": measure(args.module, Path.cwd(), args.runs, args.top, build=True),
+    }
+    if args.compare_ref:
+        report[args.compare_ref] = _measure_ref(args.compare_ref, args)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+"""
+End-to-end load test of the API against local stand-ins.
+
+Starts the fake Ollama server (benchmarks.fake_ollama) and the real API,
+each in its own process, with Qdrant in in-memory mode and a throwaway
+copy of docs/. Then drives /asignaturas, /chat/{slug}/ask, /chat/{slug}/stream
+(read in full, and abandoned after the first token) and /ingest/jobs at
+several concurrency levels and reports p50/p95/p99 latency, time to first
+token (stream), requests per second and, for abandoned streams, how many
+tokens the model still generated per request. The fairness scenario runs
+/ask from one heavy client at each concurrency level while a light client
+asks one question at a time, and reports the light client's latency.
+
+Results are written as JSON (with the git commit) so runs can be compared
+across commits with --compare.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --concurrency 1,4,16 --requests 64 --output before.json
+    python -m benchmarks.load_test --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from app.core.config import settings
+from benchmarks import fake_ollama
+
+SCENARIOS = ["asignaturas", "ask", "stream", "stream_abandon", "fairness", "ingest"]
+SESSION_HEADER = "X-Session-Id"  # Tells the API the fairness scenario's clients apart
+ADMIN_TOKEN = "load-test"  # /ingest/jobs needs X-Admin-Token
+
+# make_request(client, i) -> time of first token (perf_counter) or None
+RequestFn = Callable[[httpx.AsyncClient, int], Awaitable[float | None]]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentiles(values: list[float]) -> dict | None:
+    """p50/p95/p99 (nearest rank) and mean, in milliseconds."""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, round(p * len(ordered)) - 1))]
+
+    return {
+        "p50": round(rank(0.50), 2),
+        "p95": round(rank(0.95), 2),
+        "p99": round(rank(0.99), 2),
+        "mean": round(statistics.mean(ordered), 2),
+    }
+
+
+def _questions(subject_dir: Path, count: int) -> list[str]:
+    """Questions built from the subject's own chunks, so retrieval hits."""
+    from app.services.ingest_service import IngestService
+
+    ingest = IngestService(qdrant=object(), llm=object())
+    chunks = []
+    for filename, content in ingest._load_markdown_files(subject_dir):
+        chunks.extend(ingest._chunk_markdown(content, filename))
+    if not chunks:
+        raise SystemExit(f"No chunks found in {subject_dir}")
+
+    questions = []
+    for i in range(count):
+        words = chunks[(i * 7) % len(chunks)].content.split()[:12]
+        questions.append(f"¿Qué explica el material sobre {' '.join(words)}?")
+    return questions
+
+
+def _serve_app(port: int) -> None:
+    """Run the API with an in-memory Qdrant (child process entry point)."""
+    import uvicorn
+    from qdrant_client import QdrantClient
+
+    from app.core.container import container
+    from app.main import app
+
+    container.override(qdrant_client=QdrantClient(location=":memory:"))
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 120.0) -> float:
+    """Poll `url` until it answers; return seconds waited."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise SystemExit(f"Server for {url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise SystemExit(f"Timed out waiting for {url}")
+
+
+async def _run_level(
+    client: httpx.AsyncClient,
+    make_request: RequestFn,
+    concurrency: int,
+    requests: int,
+) -> dict:
+    """Send `requests` requests with `concurrency` in flight."""
+    latencies: list[float] = []
+    ttfts: list[float] = []
+    errors: list[str] = []
+    indexes = iter(range(requests))
+
+    async def worker() -> None:
+        for i in indexes:
+            start = time.perf_counter()
+            try:
+                first_token = await make_request(client, i)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            if first_token is not None:
+                ttfts.append((first_token - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    result = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "rps": round(len(latencies) / wall, 2),
+        "latency_ms": _percentiles(latencies),
+    }
+    if ttfts:
+        result["ttft_ms"] = _percentiles(ttfts)
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+def _request_fns(slug: str, questions: list[str]) -> dict[str, RequestFn]:
+    async def asignaturas(client: httpx.AsyncClient, i: int) -> None:
+        response = await client.get("/api/v1/asignaturas")
+        response.raise_for_status()
+
+    async def ask(client: httpx.AsyncClient, i: int) -> None:
+        response = await client.post(
+            f"/api/v1/chat/{slug}/ask", json={"question": questions[i % len(questions)]}
+        )
+        response.raise_for_status()
+
+    async def stream(client: httpx.AsyncClient, i: int) -> float | None:
+        first_token = None
+        async with client.stream(
+            "POST", f"/api/v1/chat/{slug}/stream", json={"question": questions[i % len(questions)]}
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line == "event: token" and first_token is None:
+                    first_token = time.perf_counter()
+                elif line == "event: error":
+                    raise RuntimeError("stream returned an error event")
+        return first_token
+
+    async def stream_abandon(client: httpx.AsyncClient, i: int) -> float | None:
+        # A student closing the tab: read up to the first token, then disconnect
+        async with client.stream(
+            "POST", f"/api/v1/chat/{slug}/stream", json={"question": questions[i % len(questions)]}
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line == "event: token":
+                    return time.perf_counter()
+                if line == "event: error":
+                    raise RuntimeError("stream returned an error event")
+        return None
+
+    return {
+        "asignaturas": asignaturas,
+        "ask": ask,
+        "stream": stream,
+        "stream_abandon": stream_abandon,
+    }
+
+
+def _ask_as(slug: str, questions: list[str], session: str) -> RequestFn:
+    async def ask(client: httpx.AsyncClient, i: int) -> None:
+        response = await client.post(
+            f"/api/v1/chat/{slug}/ask",
+            json={"question": questions[i % len(questions)]},
+            headers={SESSION_HEADER: session},
+        )
+        response.raise_for_status()
+
+    return ask
+
+
+async def _run_fairness_level(
+    client: httpx.AsyncClient, slug: str, questions: list[str], concurrency: int, requests: int
+) -> dict:
+    """A heavy client at `concurrency` and, meanwhile, a light one asking serially."""
+    heavy = asyncio.create_task(
+        _run_level(client, _ask_as(slug, questions, "heavy"), concurrency, requests)
+    )
+    light = _ask_as(slug, questions, "light")
+    light_latencies = []
+    i = 0
+    while not heavy.done():
+        start = time.perf_counter()
+        await light(client, i)
+        light_latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+    level = await heavy
+    level["light_latency_ms"] = _percentiles(light_latencies)
+    return level
+
+
+async def _upstream_tokens(ollama_url: str) -> int:
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{ollama_url}/stats")).json()["tokens_streamed"]
+
+
+async def _run_ingest_level(
+    client: httpx.AsyncClient, docs_dir: Path, slug: str, concurrency: int
+) -> dict:
+    """Submit `concurrency` ingest jobs for copies of the subject at once."""
+    copies = [f"bench-ingest-{concurrency}-{n}" for n in range(concurrency)]
+    for copy in copies:
+        shutil.copytree(docs_dir / slug, docs_dir / copy, dirs_exist_ok=True)
+
+    start = time.perf_counter()
+    try:
+        submitted = await asyncio.gather(
+            *(
+                client.post(
+                    "/api/v1/ingest/jobs",
+                    json={"book_id": c, "force": True},
+                    headers={"X-Admin-Token": ADMIN_TOKEN},
+                )
+                for c in copies
+            )
+        )
+        pending = {r.raise_for_status().json()["id"] for r in submitted}
+        jobs = []
+        while pending:
+            await asyncio.sleep(0.05)
+            for job_id in list(pending):
+                job = (
+                    await client.get(
+                        f"/api/v1/ingest/jobs/{job_id}", headers={"X-Admin-Token": ADMIN_TOKEN}
+                    )
+                ).json()
+                if job["status"] in ("ready", "error"):
+                    pending.discard(job_id)
+                    jobs.append(job)
+        wall = time.perf_counter() - start
+    finally:
+        for copy in copies:
+            shutil.rmtree(docs_dir / copy, ignore_errors=True)
+
+    def seconds(job: dict, field: str) -> float:
+        return datetime.fromisoformat(job[field].replace("Z", "+00:00")).timestamp()
+
+    ok = [j for j in jobs if j["status"] == "ready"]
+    result = {
+        "concurrency": concurrency,
+        "requests": concurrency,
+        "errors": len(jobs) - len(ok),
+        "rps": round(len(ok) / wall, 2),
+        "latency_ms": _percentiles(
+            [(seconds(j, "finished_at") - seconds(j, "created_at")) * 1000 for j in ok]
+        ),
+        "chunks_per_s": round(sum(j["upserted_chunks"] for j in ok) / wall, 1),
+    }
+    if len(ok) < len(jobs):
+        result["first_error"] = next(j["error"] for j in jobs if j["status"] != "ready")
+    return result
+
+
+async def run_scenarios(
+    args: argparse.Namespace, base_url: str, docs_dir: Path, ollama_url: str
+) -> dict:
+    questions = _questions(docs_dir / args.subject, 64)
+    request_fns = _request_fns(args.subject, questions)
+    results: dict[str, list[dict]] = {}
+
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300.0, limits=limits) as client:
+        for scenario in args.scenarios:
+            results[scenario] = []
+            for concurrency in args.concurrency:
+                if scenario == "ingest":
+                    level = await _run_ingest_level(client, docs_dir, args.subject, concurrency)
+                elif scenario == "fairness":
+                    level = await _run_fairness_level(
+                        client, args.subject, questions, concurrency, args.requests
+                    )
+                else:
+                    await _run_level(client, request_fns[scenario], concurrency, args.warmup)
+                    upstream_before = await _upstream_tokens(ollama_url)
+                    level = await _run_level(
+                        client, request_fns[scenario], concurrency, args.requests
+                    )
+                    if scenario == "stream_abandon":
+                        # Let cancelled generations wind down, then count what ran
+                        await asyncio.sleep(1.0)
+                        upstream = await _upstream_tokens(ollama_url) - upstream_before
+                        level["upstream_tokens_per_request"] = round(upstream / args.requests, 1)
+                results[scenario].append(level)
+                print(f"{scenario:12} c={concurrency:<4} {json.dumps(level)}", file=sys.stderr)
+    return results
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """Print p50/p95/rps changes per scenario and concurrency level."""
+    print(f"\nvs {baseline.get('commit')} -> {current.get('commit')}")
+    print(f"{'scenario':12} {'c':>4} {'p50 ms':>22} {'p95 ms':>22} {'rps':>20}")
+
+    def delta(old: float | None, new: float | None) -> str:
+        if old is None or new is None:
+            return "-"
+        change = f" ({(new - old) / old * 100:+.0f}%)" if old else ""
+        return f"{old:g}->{new:g}{change}"
+
+    for scenario, levels in current["results"].items():
+        old_levels = {
+            level["concurrency"]: level for level in baseline["results"].get(scenario, [])
+        }
+        for level in levels:
+            old = old_levels.get(level["concurrency"])
+            if old is None:
+                continue
+            old_lat, new_lat = old["latency_ms"] or {}, level["latency_ms"] or {}
+            print(
+                f"{scenario:12} {level['concurrency']:>4} "
+                f"{delta(old_lat.get('p50'), new_lat.get('p50')):>22} "
+                f"{delta(old_lat.get('p95'), new_lat.get('p95')):>22} "
+                f"{delta(old['rps'], level['rps']):>20}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subject", help="Subject to query (default: first in docs/)")
+    parser.add_argument(
+        "--scenarios",
+        type=lambda v: v.split(","),
+        default=SCENARIOS,
+        help=f"Comma-separated subset of {','.join(SCENARIOS)}",
+    )
+    parser.add_argument(
+        "--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 4, 16]
+    )
+    parser.add_argument("--requests", type=int, default=64, help="Requests per level")
+    parser.add_argument("--warmup", type=int, default=4, help="Unmeasured requests per level")
+    parser.add_argument("--storage-mode", choices=["per_subject", "shared"], default="per_subject")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument("--serve-app", type=int, help=argparse.SUPPRESS)
+    fake_ollama.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.serve_app:
+        _serve_app(args.serve_app)
+        return
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    workdir = Path(tempfile.mkdtemp(prefix="booktutor-load-"))
+    docs_dir = workdir / "docs"
+    shutil.copytree(settings.docs_path, docs_dir)
+    args.subject = args.subject or next(
+        d.name for d in sorted(docs_dir.iterdir()) if d.is_dir() and any(d.glob("*.md"))
+    )
+
+    ollama_port, api_port = _free_port(), _free_port()
+    fake_args = [
+        f"--{name.replace('_', '-')}={value}"
+        for name, value in asdict(fake_ollama.config_from_args(args)).items()
+    ]
+    env = {
+        **os.environ,
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{ollama_port}",
+        "DOCS_DIR": str(docs_dir),
+        "DOCS_WATCH_ENABLED": "false",
+        "INGEST_JOBS_DB": str(workdir / "ingest_jobs.sqlite3"),
+        "INGEST_LEADER_LOCK_FILE": str(workdir / "ingest-leader.lock"),
+        "QDRANT_STORAGE_MODE": args.storage_mode,
+        "EMBEDDING_DIMENSIONS": str(args.dim),
+        "RATE_LIMIT_SESSION_HEADER": SESSION_HEADER,
+        "ADMIN_TOKEN": ADMIN_TOKEN,
+    }
+
+    processes = []
+    try:
+        fake = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.fake_ollama", f"--port={ollama_port}", *fake_args],
+            env=env,
+        )
+        processes.append(fake)
+        _wait_ready(f"http://127.0.0.1:{ollama_port}/api/tags", fake)
+
+        api = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.load_test", f"--serve-app={api_port}"],
+            env=env,
+        )
+        processes.append(api)
+        # Startup includes auto-ingestion of the docs/ copy
+        startup_s = _wait_ready(f"http://127.0.0.1:{api_port}/api/v1/health", api)
+
+        results = asyncio.run(run_scenarios(
+            args, f"http://127.0.0.1:{api_port}", docs_dir, f"http://127.0.0.1:{ollama_port}"
+        ))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "subject": args.subject,
+        "storage_mode": args.storage_mode,
+        "requests_per_level": args.requests,
+        "fake_ollama": asdict(fake_ollama.config_from_args(args)),
+        "startup_s": round(startup_s, 2),
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Prompt prefix caching benchmark.
+
+Compares Ollama prompt-eval time for the legacy prompt layout (retrieved
+context inside the system message) against the static-prefix layout used
+by RAGService, over a set of questions asked repeatedly.
+
+Usage (from backend/, with Ollama running):
+    python -m benchmarks.prompt_cache --subject programacion --repeat 3
+"""
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.llm.ollama import NO_THINK, OllamaProvider
+from app.services.ingest_service import IngestService
+from app.services.rag_service import SYSTEM_PROMPT, USER_PROMPT
+
+# Pre-refactor layout: context interpolated at the end of the system message
+LEGACY_SYSTEM_PROMPT = SYSTEM_PROMPT + "\n\nMaterial de estudio disponible:\n{context}"
+
+QUESTIONS = [
+    "¿Cuál es la idea principal de este tema?",
+    "Explica el concepto más importante con un ejemplo.",
+    "¿Qué diferencias hay entre los conceptos descritos?",
+    "Resume los pasos que se describen en el material.",
+]
+
+
+def _load_contexts(subject: str, count: int, k: int) -> list[str]:
+    """Build `count` numbered contexts of `k` chunks from docs/<subject>."""
+    ingest = IngestService(llm=OllamaProvider())
+    chunks = []
+    for filename, content in ingest._load_markdown_files(settings.docs_path / subject):
+        chunks.extend(ingest._chunk_markdown(content, filename))
+    if not chunks:
+        raise SystemExit(f"No chunks found for subject '{subject}'")
+
+    contexts = []
+    for i in range(count):
+        selected = [chunks[(i * k + j) % len(chunks)] for j in range(k)]
+        contexts.append(
+            "\n\n".join(f"[{n}] {c.content}" for n, c in enumerate(selected, 1))
+        )
+    return contexts
+
+
+def _legacy_messages(context: str, question: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": LEGACY_SYSTEM_PROMPT.format(context=context)},
+        {"role": "user", "content": f"{NO_THINK}\n{question}"},
+    ]
+
+
+def _prefix_messages(
+    provider: OllamaProvider, context: str, question: str
+) -> list[dict[str, str]]:
+    prompt = USER_PROMPT.format(context=context, question=question)
+    return provider._build_messages(prompt, SYSTEM_PROMPT)
+
+
+def _prefill(client: httpx.Client, provider: OllamaProvider, messages: list) -> dict:
+    """Run a single-token generation and return Ollama's prompt-eval stats."""
+    payload = provider._chat_payload(messages, False, None, 1)
+    start = time.perf_counter()
+    response = client.post(f"{provider.base_url}/api/chat", json=payload)
+    response.raise_for_status()
+    data = response.json()
+    return {
+        "prompt_eval_count": data.get("prompt_eval_count", 0),
+        "prompt_eval_ms": data.get("prompt_eval_duration", 0) / 1e6,
+        "wall_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def _summary(samples: list[dict]) -> dict:
+    return {
+        "requests": len(samples),
+        "prompt_eval_count_mean": round(
+            statistics.mean(s["prompt_eval_count"] for s in samples), 1
+        ),
+        "prompt_eval_ms_mean": round(
+            statistics.mean(s["prompt_eval_ms"] for s in samples), 1
+        ),
+        "wall_ms_mean": round(statistics.mean(s["wall_ms"] for s in samples), 1),
+    }
+
+
+def run(subject: str, repeat: int, k: int) -> dict:
+    provider = OllamaProvider()
+    contexts = _load_contexts(subject, len(QUESTIONS), k)
+    layouts = {
+        "legacy": _legacy_messages,
+        "prefix": lambda c, q: _prefix_messages(provider, c, q),
+    }
+
+    results = {}
+    with httpx.Client(timeout=settings.llm_timeout) as client:
+        # Warm up so model load time is not attributed to either layout
+        _prefill(client, provider, [{"role": "user", "content": "hola"}])
+
+        for name, build in layouts.items():
+            first, repeated = [], []
+            for round_ in range(repeat):
+                for context, question in zip(contexts, QUESTIONS):
+                    stats = _prefill(client, provider, build(context, question))
+                    (first if round_ == 0 else repeated).append(stats)
+            results[name] = {
+                "first": _summary(first),
+                "repeated": _summary(repeated) if repeated else None,
+            }
+
+    return {
+        "model": provider.model,
+        "subject": subject,
+        "retriever_k": k,
+        "repeat": repeat,
+        "layouts": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subject", required=True, help="Subject slug in docs/")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds per question")
+    parser.add_argument("--k", type=int, default=settings.retriever_k, help="Chunks per context")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    report = run(args.subject, args.repeat, args.k)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Embedded Qdrant benchmark: local storage vs the Qdrant server over HTTP.
+
+Loads the same synthetic subject (N chunks of random unit vectors) into an
+embedded store in a temporary directory (qdrant_url=local://...), into a
+read-only replica of that store (what non-leader workers search) and, if
+one is reachable, into a Qdrant server under a throwaway collection name,
+then reports search latency through QdrantService for each.
+
+Usage (from backend/):
+    python -m benchmarks.qdrant_local --chunks 5000
+    python -m benchmarks.qdrant_local --qdrant-url http://localhost:6333
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.core.config import settings
+from app.db.local_qdrant import ReplicaClient, open_local_client
+from app.db.qdrant import QdrantService
+
+BENCH_PREFIX = "bench_local_"
+BENCH_BOOK = "subject"
+
+
+def _random_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _service(client: QdrantClient | ReplicaClient, dim: int) -> QdrantService:
+    service = QdrantService(client=client, storage_mode="per_subject")
+    service.collection_prefix = BENCH_PREFIX
+    service.vector_size = dim
+    return service
+
+
+def _build(service: QdrantService, chunks: int, dim: int, seed: int) -> float:
+    rng = np.random.default_rng(seed)
+    vectors = _random_vectors(rng, chunks, dim)
+    start = time.perf_counter()
+    service.create_collection(BENCH_BOOK)
+    for offset in range(0, chunks, 512):
+        service.client.upsert(
+            collection_name=service._collection_name(BENCH_BOOK),
+            points=[
+                models.PointStruct(
+                    id=str(uuid4()),
+                    vector=v.tolist(),
+                    payload={
+                        "book_id": BENCH_BOOK,
+                        "chunk_index": offset + i,
+                        "source_file": "bench.md",
+                        "content": "x" * 200,
+                    },
+                )
+                for i, v in enumerate(vectors[offset:offset + 512])
+            ],
+            wait=True,
+        )
+    return time.perf_counter() - start
+
+
+def _search(service: QdrantService, args: argparse.Namespace) -> dict:
+    rng = np.random.default_rng(args.seed + 1)
+    queries = [v.tolist() for v in _random_vectors(rng, args.queries, args.dim)]
+    for vector in queries[:10]:
+        service.search(BENCH_BOOK, vector, limit=args.k)  # Warm-up
+    latencies = []
+    for vector in queries:
+        start = time.perf_counter()
+        service.search(BENCH_BOOK, vector, limit=args.k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "p50": round(statistics.median(latencies), 3),
+        "p95": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "mean": round(statistics.mean(latencies), 3),
+    }
+
+
+def run_local(args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory(prefix="bench-qdrant-") as path:
+        writer = open_local_client(path, writer=True)
+        try:
+            service = _service(writer, args.dim)
+            build_s = _build(service, args.chunks, args.dim, args.seed)
+            embedded = {"build_s": round(build_s, 2), "search_ms": _search(service, args)}
+
+            start = time.perf_counter()
+            replica = ReplicaClient(path)
+            load_s = time.perf_counter() - start
+            replica_report = {
+                "load_s": round(load_s, 2),
+                "search_ms": _search(_service(replica, args.dim), args),
+            }
+            replica.close()
+        finally:
+            writer.close()
+    return {"embedded": embedded, "replica": replica_report}
+
+
+def run_http(args: argparse.Namespace) -> dict:
+    client = QdrantClient(url=args.qdrant_url, api_key=settings.qdrant_api_key, timeout=30)
+    try:
+        client.get_collections()
+    except Exception as e:
+        return {"skipped": f"Qdrant server not reachable at {args.qdrant_url}: {e}"}
+
+    service = _service(client, args.dim)
+    service.delete_collection(BENCH_BOOK)
+    try:
+        build_s = _build(service, args.chunks, args.dim, args.seed)
+        return {"build_s": round(build_s, 2), "search_ms": _search(service, args)}
+    finally:
+        service.delete_collection(BENCH_BOOK)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=3000)
+    parser.add_argument("--dim", type=int, default=settings.embedding_dimensions)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=settings.retriever_k * 3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--qdrant-url",
+        default=settings.qdrant_url if settings.qdrant_local_path is None else "http://localhost:6333",
+        help="Qdrant server to compare against (skipped if unreachable)",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    report = {
+        "chunks": args.chunks,
+        "dim": args.dim,
+        "k": args.k,
+        **run_local(args),
+        "http": run_http(args),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Storage layout benchmark: per-subject collections vs one shared collection.
+
+Builds the same synthetic corpus (N subjects x M chunks of random unit
+vectors) in both layouts under throwaway collection names, then reports
+search latency, segment counts and, if the Qdrant server PID is given,
+resident memory growth of the server process.
+
+Usage (from backend/, with Qdrant running):
+    python -m benchmarks.storage_layout --subjects 100 --chunks 2000
+    python -m benchmarks.storage_layout --qdrant-pid $(pgrep -f qdrant)
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import numpy as np
+from qdrant_client.http import models
+
+from app.core.config import settings
+from app.db.qdrant import QdrantService
+
+BENCH_PREFIX = "bench_layout_"
+BENCH_SHARED = "bench_layout_shared"
+
+
+def _rss_mb(pid: int | None) -> float | None:
+    """Resident set size of a process in MiB (Linux only)."""
+    if pid is None:
+        return None
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024
+    return None
+
+
+def _random_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _service(mode: str, dim: int) -> QdrantService:
+    service = QdrantService(storage_mode=mode)
+    service.collection_prefix = BENCH_PREFIX
+    service.shared_collection = BENCH_SHARED
+    service.vector_size = dim
+    return service
+
+
+def _build(service: QdrantService, subjects: list[str], chunks: int, dim: int, seed: int) -> float:
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    for book_id in subjects:
+        service.create_collection(book_id)
+        vectors = _random_vectors(rng, chunks, dim)
+        for offset in range(0, chunks, 512):
+            batch = vectors[offset:offset + 512]
+            service.client.upsert(
+                collection_name=service._collection_name(book_id),
+                points=[
+                    models.PointStruct(
+                        id=str(uuid4()),
+                        vector=v.tolist(),
+                        payload={
+                            "book_id": book_id,
+                            "chunk_index": offset + i,
+                            "content": "x" * 200,
+                        },
+                    )
+                    for i, v in enumerate(batch)
+                ],
+                wait=True,
+            )
+    return time.perf_counter() - start
+
+
+def _wait_indexed(service: QdrantService, subjects: list[str]) -> int:
+    """Wait for optimizers to finish; return total segment count."""
+    names = {service._collection_name(b) for b in subjects}
+    while True:
+        infos = [service.client.get_collection(n) for n in names]
+        if all(i.status == models.CollectionStatus.GREEN for i in infos):
+            return sum(i.segments_count for i in infos)
+        time.sleep(0.5)
+
+
+def _search_latencies(
+    service: QdrantService, subjects: list[str], queries: int, k: int, dim: int, seed: int
+) -> list[float]:
+    rng = np.random.default_rng(seed + 1)
+    vectors = _random_vectors(rng, queries, dim)
+    latencies = []
+    for i, vector in enumerate(vectors):
+        book_id = subjects[i % len(subjects)]
+        start = time.perf_counter()
+        service.search(book_id, vector.tolist(), limit=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _cleanup(service: QdrantService, subjects: list[str]) -> None:
+    for name in {service._collection_name(b) for b in subjects}:
+        try:
+            service.client.delete_collection(name)
+        except Exception:
+            pass
+
+
+def run_layout(mode: str, args: argparse.Namespace) -> dict:
+    subjects = [f"s{i:04d}" for i in range(args.subjects)]
+    service = _service(mode, args.dim)
+    _cleanup(service, subjects)
+
+    rss_before = _rss_mb(args.qdrant_pid)
+    try:
+        build_s = _build(service, subjects, args.chunks, args.dim, args.seed)
+        segments = _wait_indexed(service, subjects)
+        rss_after = _rss_mb(args.qdrant_pid)
+        latencies = _search_latencies(service, subjects, args.queries, args.k, args.dim, args.seed)
+    finally:
+        if not args.keep:
+            _cleanup(service, subjects)
+
+    latencies.sort()
+    return {
+        "build_s": round(build_s, 2),
+        "segments": segments,
+        "rss_delta_mb": round(rss_after - rss_before, 1) if rss_before is not None else None,
+        "search_ms": {
+            "p50": round(statistics.median(latencies), 2),
+            "p95": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+            "mean": round(statistics.mean(latencies), 2),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subjects", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=1000, help="Chunks per subject")
+    parser.add_argument("--dim", type=int, default=settings.embedding_dimensions)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=settings.retriever_k * 3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--layout", choices=["per_subject", "shared", "both"], default="both")
+    parser.add_argument("--qdrant-pid", type=int, help="Qdrant server PID for RSS measurement")
+    parser.add_argument("--keep", action="store_true", help="Keep benchmark collections")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    layouts = ["per_subject", "shared"] if args.layout == "both" else [args.layout]
+    report = {
+        "qdrant_url": settings.qdrant_url,
+        "subjects": args.subjects,
+        "chunks_per_subject": args.chunks,
+        "dim": args.dim,
+        "layouts": {mode: run_layout(mode, args) for mode in layouts},
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Maintenance scripts - run from backend/ with `python -m scripts.<name>`
@@ -0,0 +1,46 @@
+"""
+Build the section index used by RETRIEVER_HIERARCHICAL for ingested books.
+
+Section vectors are computed from the vectors already stored in Qdrant
+(nothing is re-embedded), so books ingested before enabling hierarchical
+retrieval can be indexed in place. Re-running rebuilds the index.
+
+Usage (from backend/):
+    python -m scripts.build_sections --all
+    python -m scripts.build_sections --book-id programacion
+"""
+import argparse
+import logging
+import time
+
+from app.db.qdrant import QdrantService
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--book-id", help="Index a single book")
+    group.add_argument("--all", action="store_true", help="Index every ingested book")
+    args = parser.parse_args()
+
+    qdrant = QdrantService()
+    book_ids = qdrant.list_collections() if args.all else [args.book_id]
+    for book_id in book_ids:
+        if not qdrant.collection_exists(book_id):
+            logger.error(f"{book_id}: not ingested")
+            continue
+        start = time.perf_counter()
+        qdrant.delete_sections(book_id)
+        sections = qdrant.build_sections(book_id)
+        chunks = qdrant.count_chunks(book_id)
+        logger.info(
+            f"{book_id}: {sections} sections for {chunks} chunks"
+            f" in {time.perf_counter() - start:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
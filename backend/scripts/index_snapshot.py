@@ -0,0 +1,76 @@
+"""
+Export ingested subjects as index snapshots, or restore them.
+
+A snapshot holds a subject's vectors, payloads and embedding reducer, tagged
+with a fingerprint of its docs, the embedding model and the chunk settings.
+Startup ingestion restores a matching snapshot from INDEX_SNAPSHOT_DIR instead
+of embedding the docs again, so build snapshots once (e.g. in CI) and ship
+them with the deploy.
+
+Usage (from backend/):
+    python -m scripts.index_snapshot export --all
+    python -m scripts.index_snapshot import --book-id programacion --force
+    python -m scripts.index_snapshot export --all --dir /artifacts/snapshots
+"""
+import argparse
+import logging
+import time
+
+from app.core.config import settings
+from app.services.index_snapshot import IndexSnapshots
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("action", choices=["export", "import"])
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--book-id", help="A single subject")
+    group.add_argument("--all", action="store_true", help="Every subject in docs/")
+    parser.add_argument("--dir", help=f"Snapshot directory (default: {settings.index_snapshot_dir})")
+    parser.add_argument("--force", action="store_true", help="import: replace an existing index")
+    args = parser.parse_args()
+
+    snapshots = IndexSnapshots(directory=args.dir)
+    if args.all:
+        book_ids = sorted(
+            d.name for d in settings.docs_path.iterdir()
+            if d.is_dir() and not d.name.startswith(".") and any(d.glob("*.md"))
+        )
+    else:
+        book_ids = [args.book_id]
+
+    failed = 0
+    for book_id in book_ids:
+        start = time.perf_counter()
+        try:
+            if args.action == "export":
+                path = snapshots.export(book_id)
+                logger.info(
+                    f"{book_id}: {path} ({path.stat().st_size / 1e6:.1f} MB)"
+                    f" in {time.perf_counter() - start:.1f}s"
+                )
+                continue
+            result = snapshots.restore(book_id, force=args.force)
+        except ValueError as e:
+            logger.error(f"{book_id}: {e}")
+            failed += 1
+            continue
+        if result is None:
+            logger.error(f"{book_id}: no snapshot matches its current docs")
+            failed += 1
+        elif result.error:
+            logger.info(f"{book_id}: {result.error}")
+        else:
+            logger.info(
+                f"{book_id}: restored {result.chunks_count} chunks"
+                f" in {time.perf_counter() - start:.1f}s"
+            )
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Migrate books from per-subject collections (book_<slug>) into the shared
+collection used by QDRANT_STORAGE_MODE=shared.
+
+Point IDs, vectors and payloads are copied as-is, so the migration can be
+re-run safely. Source collections are kept unless --delete-source is given.
+
+Usage (from backend/):
+    python -m scripts.migrate_to_shared --all
+    python -m scripts.migrate_to_shared --book-id programacion --delete-source
+"""
+import argparse
+import logging
+import time
+
+from qdrant_client.http import models
+
+from app.core.config import settings
+from app.db.qdrant import QdrantService
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_book(
+    source: QdrantService,
+    target: QdrantService,
+    book_id: str,
+    batch_size: int = 256,
+    delete_source: bool = False,
+) -> int:
+    """Copy one book into the shared collection. Returns points copied."""
+    if target.collection_exists(book_id):
+        # Replace a partial copy from an earlier interrupted run
+        target.delete_collection(book_id)
+    # Reduced books keep their size (and their projection, keyed by book_id)
+    target.create_collection(book_id, vector_size=source.get_vector_size(book_id))
+
+    copied = 0
+    for records in source.iter_points(book_id, batch_size=batch_size):
+        target.client.upsert(
+            collection_name=target.shared_collection,
+            points=[
+                models.PointStruct(id=r.id, vector=r.vector, payload=r.payload)
+                for r in records
+            ],
+            wait=True,
+        )
+        copied += len(records)
+
+    expected = source.count_chunks(book_id)
+    if copied != expected:
+        raise RuntimeError(f"{book_id}: copied {copied} points, source has {expected}")
+
+    if settings.retriever_hierarchical:
+        target.build_sections(book_id)
+    if delete_source:
+        source.delete_collection(book_id)
+    return copied
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--book-id", help="Migrate a single book")
+    group.add_argument("--all", action="store_true", help="Migrate every per-subject collection")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--delete-source", action="store_true", help="Drop book_<slug> after copying")
+    args = parser.parse_args()
+
+    source = QdrantService(storage_mode="per_subject")
+    target = QdrantService(client=source.client, storage_mode="shared")
+
+    book_ids = source.list_collections() if args.all else [args.book_id]
+    for book_id in book_ids:
+        if not source.collection_exists(book_id):
+            logger.error(f"{book_id}: collection {source._collection_name(book_id)} not found")
+            continue
+        start = time.perf_counter()
+        copied = migrate_book(source, target, book_id, args.batch_size, args.delete_source)
+        logger.info(f"{book_id}: {copied} points migrated in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
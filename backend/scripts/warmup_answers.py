@@ -0,0 +1,45 @@
+"""
+Precompute answers to anticipated questions (ANSWER_CACHE_ENABLED serves them).
+
+Questions are built from the section headings of each subject; answers
+already stored for the current docs are skipped. Unless --now is given the
+run waits for the ANSWER_WARMUP_HOURS window, like the background warm-up.
+
+Usage (from backend/):
+    python -m scripts.warmup_answers --all
+    python -m scripts.warmup_answers --book-id programacion --now
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from app.services.answer_warmup import AnswerWarmup
+
+logger = logging.getLogger(__name__)
+
+
+async def warm(book_ids: list[str] | None, now: bool) -> None:
+    warmup = AnswerWarmup(respect_schedule=not now)
+    if now:
+        warmup.interval = 0
+    for book_id in book_ids or warmup.ingest.list_books():
+        start = time.perf_counter()
+        stored = await warmup.warm_book(book_id)
+        logger.info(f"{book_id}: {stored} answers stored in {time.perf_counter() - start:.1f}s")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--book-id", help="Warm a single book")
+    group.add_argument("--all", action="store_true", help="Warm every ingested book")
+    parser.add_argument("--now", action="store_true", help="Ignore the hours window and pauses")
+    args = parser.parse_args()
+
+    asyncio.run(warm(None if args.all else [args.book_id], args.now))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Shared fixtures: an in-memory Qdrant, a deterministic fake LLM and a
+throwaway docs/ folder, so services run without Ollama or a Qdrant server.
+"""
+import hashlib
+import math
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from qdrant_client import QdrantClient
+
+from app.core.config import settings
+from app.db.qdrant import QdrantService
+from app.llm.base import LLMProvider
+from app.services.embedding_reduction import ReducerStore
+from app.services.ingest_service import IngestService
+from app.services.rag_service import RAGService
+
+VECTOR_SIZE = 16
+
+
+def fake_embedding(text: str) -> list[float]:
+    digest = hashlib.sha256(text.encode()).digest()
+    vector = [digest[i] / 255 - 0.5 for i in range(VECTOR_SIZE)]
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector]
+
+
+class FakeLLM(LLMProvider):
+    """Hash-based embeddings; `on_embed` runs before each embed call."""
+
+    model = "fake"
+
+    def __init__(self):
+        self.embedded = 0
+        self.on_embed: Callable[[], None] | None = None
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, system_prompt=None, temperature=None, max_tokens=None):
+        return "respuesta"
+
+    async def agenerate(self, prompt, system_prompt=None, temperature=None, max_tokens=None):
+        return "respuesta"
+
+    def stream(self, prompt, system_prompt=None, temperature=None, max_tokens=None):
+        yield "respuesta"
+
+    async def astream(self, prompt, system_prompt=None, temperature=None, max_tokens=None):
+        yield "respuesta"
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        if self.on_embed is not None:
+            self.on_embed()
+        with self._lock:
+            self.embedded += len(texts)
+        return [fake_embedding(t) for t in texts]
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed(texts)
+
+
+def write_book(book_dir: Path, sections: int = 6, files: int = 2) -> None:
+    book_dir.mkdir(parents=True, exist_ok=True)
+    for f in range(files):
+        body = "\n\n".join(
+            f"## Seccion {f}.{s}\n\n" + f"Texto del apartado {f}.{s} sobre el tema. " * 12
+            for s in range(sections)
+        )
+        (book_dir / f"{f:02d}-tema.md").write_text(f"# Tema {f}\n\n{body}\n", encoding="utf-8")
+
+
+@pytest.fixture(autouse=True)
+def _defaults(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Defaults for the features a local .env might turn on."""
+    for name, value in {
+        "embedding_reduction": "none",
+        "retriever_hierarchical": False,
+        "chunk_text_store": "retrieve",
+        "answer_cache_enabled": False,
+        "answer_warmup_enabled": False,
+        "rate_limit_session_header": None,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+
+
+@pytest.fixture
+def docs_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    docs = tmp_path / "docs"
+    write_book(docs / "bio")
+    monkeypatch.setattr(settings, "docs_dir", str(docs))
+    return docs
+
+
+@pytest.fixture
+def fake_llm() -> FakeLLM:
+    return FakeLLM()
+
+
+@pytest.fixture
+def qdrant() -> QdrantService:
+    service = QdrantService(client=QdrantClient(location=":memory:"), storage_mode="per_subject")
+    service.vector_size = VECTOR_SIZE
+    return service
+
+
+@pytest.fixture
+def ingest(
+    qdrant: QdrantService, fake_llm: FakeLLM, tmp_path: Path, docs_dir: Path
+) -> IngestService:
+    service = IngestService(
+        qdrant=qdrant, llm=fake_llm, reducers=ReducerStore(tmp_path / "projections")
+    )
+    service.chunk_size = 300
+    service.chunk_overlap = 30
+    service.batch_size = 4
+    return service
+
+
+@pytest.fixture
+def rag(ingest: IngestService) -> RAGService:
+    """A RAGService over the ingested "bio" book that keeps every hit."""
+    ingest.ingest_book("bio")
+    service = RAGService(qdrant=ingest.qdrant, llm=ingest.llm, reducers=ingest.reducers)
+    service.min_relevance = -1.0  # Hash embeddings: scores carry no meaning
+    service.adaptive = False
+    return service
@@ -0,0 +1,31 @@
+import os
+import time
+
+from app.core.activity import LiveActivity
+
+
+def test_idle_seconds_is_shared_through_the_file(tmp_path):
+    path = tmp_path / "state" / "live-activity"
+    worker, warmup = LiveActivity(path), LiveActivity(path)
+    assert warmup.idle_seconds() == float("inf")
+
+    worker.touch()
+    assert warmup.idle_seconds() < 5
+
+    past = time.time() - 120
+    os.utime(path, (past, past))
+    assert warmup.idle_seconds() >= 119
+
+
+def test_touch_is_throttled_and_optional(tmp_path):
+    path = tmp_path / "live-activity"
+    activity = LiveActivity(path, min_interval=60)
+    activity.touch()
+    past = time.time() - 120
+    os.utime(path, (past, past))
+    activity.touch()  # Within the interval: file left alone
+    assert activity.idle_seconds() >= 119
+
+    disabled = LiveActivity(None)
+    disabled.touch()
+    assert disabled.idle_seconds() == float("inf")
@@ -0,0 +1,43 @@
+import pytest
+
+from app.services.rag_service import adaptive_depth
+
+
+def depth(scores, min_k=1, max_k=4):
+    # The RETRIEVER_* defaults
+    return adaptive_depth(
+        scores, min_k=min_k, max_k=max_k, relative_score=0.8, min_gap=0.05, gap_share=0.5
+    )
+
+
+@pytest.mark.parametrize(
+    "scores",
+    [
+        [0.9, 0.85, 0.84, 0.83],  # One 0.05 step of noise at the top
+        [0.62, 0.6, 0.57, 0.55],
+        [0.9, 0.81, 0.73, 0.73],  # Steady decline: no single elbow
+        [0.9, 0.9, 0.9, 0.9],
+    ],
+)
+def test_flat_curve_keeps_max_k(scores):
+    assert depth(scores) == 4
+
+
+@pytest.mark.parametrize(
+    ("scores", "expected"),
+    [
+        ([0.9, 0.76, 0.75, 0.74], 1),  # Elbow inside the relative band
+        ([0.9, 0.5, 0.45, 0.4], 1),  # Relative cut
+        ([0.9, 0.88, 0.74, 0.73], 2),  # Two clear winners
+        ([0.9, 0.89, 0.88, 0.6], 3),
+    ],
+)
+def test_clear_winners_are_kept_alone(scores, expected):
+    assert depth(scores) == expected
+
+
+def test_bounds():
+    assert depth([0.9, 0.5, 0.4], min_k=2) == 2
+    assert depth([0.9, 0.89, 0.88, 0.87, 0.86, 0.85], max_k=4) == 4
+    assert depth([0.9], min_k=2) == 1
+    assert depth([]) == 0
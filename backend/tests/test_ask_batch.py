@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_rag_service
+from app.core.config import settings
+
+URL = "/api/v1/chat/bio/ask-batch"
+
+
+async def collect(results):
+    return sorted([item async for item in results], key=lambda item: item[0])
+
+
+def test_batch_embeds_once_and_answers_every_question(rag, fake_llm):
+    questions = ["¿Qué es la sección 0.1?", "Explica el tema 1", "¿Y el apartado 1.2?"]
+    embedded_before = fake_llm.embedded
+    calls = []
+    original = fake_llm.aembed
+
+    async def aembed(texts):
+        calls.append(len(texts))
+        return await original(texts)
+
+    fake_llm.aembed = aembed
+
+    async def main():
+        return await collect(await rag.aask_batch("bio", questions))
+
+    answers = asyncio.run(main())
+    assert calls == [3]  # One batched embedding call
+    assert fake_llm.embedded - embedded_before == 3
+    assert [index for index, _ in answers] == [0, 1, 2]
+    assert all(response.sources and response.answer == "respuesta" for _, response in answers)
+
+
+def test_failed_question_does_not_fail_the_batch(rag, fake_llm):
+    async def agenerate(prompt, **kwargs):
+        if "falla" in prompt:
+            raise RuntimeError("boom")
+        return "respuesta"
+
+    fake_llm.agenerate = agenerate
+
+    async def main():
+        return await collect(await rag.aask_batch("bio", ["pregunta buena", "esta falla"]))
+
+    (_, ok), (_, failed) = asyncio.run(main())
+    assert ok.answer == "respuesta"
+    assert isinstance(failed, RuntimeError)
+
+
+def test_unknown_book_raises(rag):
+    with pytest.raises(ValueError, match="nada"):
+        asyncio.run(rag.aask_batch("nada", ["pregunta"]))
+
+
+@pytest.fixture
+def client(rag):
+    from app.main import app
+
+    app.dependency_overrides[get_rag_service] = lambda: rag
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_endpoint_streams_one_ndjson_line_per_question(client, fake_llm):
+    async def agenerate(prompt, **kwargs):
+        if "falla" in prompt:
+            raise RuntimeError("boom")
+        return "respuesta"
+
+    fake_llm.agenerate = agenerate
+    response = client.post(URL, json={"questions": ["pregunta uno", "esta falla"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = sorted(map(json.loads, response.text.splitlines()), key=lambda line: line["index"])
+    assert [line["question"] for line in lines] == ["pregunta uno", "esta falla"]
+    assert lines[0]["response"]["answer"] == "respuesta" and lines[0]["error"] is None
+    assert lines[1]["response"] is None and "boom" in lines[1]["error"]
+
+
+def test_endpoint_errors(client):
+    missing = client.post("/api/v1/chat/nada/ask-batch", json={"questions": ["pregunta"]})
+    assert missing.status_code == 404
+    assert client.post(URL, json={"questions": []}).status_code == 422
+    too_many = ["pregunta"] * (settings.batch_max_questions + 1)
+    assert client.post(URL, json={"questions": too_many}).status_code == 422
+    assert client.post(URL, json={"questions": ["no"]}).status_code == 422  # Under min_length
@@ -0,0 +1,74 @@
+import pytest
+
+from app.core.config import settings
+from app.db.chunk_store import ChunkTextStore
+from tests.conftest import write_book
+
+
+def test_append_and_read_across_close(tmp_path):
+    store = ChunkTextStore(tmp_path)
+    refs = store.append("bio", ["uno", "dos"])
+    assert [store.read("bio", ref) for ref in refs] == ["uno", "dos"]
+
+    store.close()
+    assert [store.read("bio", ref) for ref in refs] == ["uno", "dos"]
+    more = store.append("bio", ["tres"])
+    assert store.read("bio", more[0]) == "tres"
+    store.close()
+
+
+def test_failed_append_drops_the_writer(tmp_path):
+    store = ChunkTextStore(tmp_path)
+    first = store.append("bio", ["uno"])
+    writer = store._writers["bio"]
+
+    with pytest.raises(UnicodeEncodeError):
+        store.append("bio", ["dos", "\ud800"])  # Lone surrogate: not UTF-8
+    assert writer.closed
+    assert "bio" not in store._writers
+
+    after = store.append("bio", ["tres"])
+    assert after[0]["file"] != first[0]["file"]
+    assert store.read("bio", first[0]) == "uno"
+    assert store.read("bio", after[0]) == "tres"
+    store.close()
+
+
+def test_rewrite_then_prune_keeps_only_live_texts(tmp_path):
+    store = ChunkTextStore(tmp_path)
+    old = store.append("bio", ["uno", "dos", "tres"])
+    live = {"a": old[0], "c": old[2], "lost": {**old[1], "file": "gone.txt"}}
+
+    new = store.rewrite("bio", live)
+    assert set(new) == {"a", "c"}  # Unreadable refs are dropped
+    assert new["a"]["file"] != old[0]["file"]
+    assert store.read("bio", old[0]) == "uno"  # Old file readable until prune
+
+    freed = store.prune("bio", keep={new["a"]["file"]})
+    assert freed == len("unodostres")
+    assert store.read("bio", old[0]) is None
+    assert [store.read("bio", new[k]) for k in ("a", "c")] == ["uno", "tres"]
+    assert store.size("bio") == len("unotres")
+    store.close()
+
+
+def test_incremental_syncs_compact_the_store(ingest, qdrant, docs_dir, tmp_path, monkeypatch):
+    store = ChunkTextStore(tmp_path / "chunks")
+    ingest.text_store = qdrant.text_store = store
+    monkeypatch.setattr(settings, "chunk_store_compact_min_bytes", 0)
+    monkeypatch.setattr(settings, "chunk_store_compact_ratio", 0.5)
+    ingest.ingest_book("bio")
+    live = store.size("bio")
+
+    sizes = []
+    for sections in (6, 5, 6, 5, 6):
+        write_book(docs_dir / "bio", sections=sections)
+        ingest.sync_files("bio", ["00-tema.md", "01-tema.md"])
+        sizes.append(store.size("bio"))
+    assert max(sizes) < 2 * live + 1  # Never more than half superseded
+    assert len(list((tmp_path / "chunks" / "bio").glob("*.txt"))) <= 2
+
+    refs = qdrant.text_refs("bio")
+    assert len(refs) == qdrant.count_chunks("bio")
+    assert all(store.read("bio", ref) for ref in refs.values())
+    store.close()
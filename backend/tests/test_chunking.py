@@ -0,0 +1,91 @@
+import pytest
+
+from app.services.ingest_service import FENCE_MARKERS, IngestService, count_tokens
+
+
+@pytest.fixture
+def chunker(ingest: IngestService) -> IngestService:
+    ingest.chunk_size = 120
+    ingest.chunk_overlap = 20
+    ingest.length_function = len
+    return ingest
+
+
+def chunk(service: IngestService, text: str):
+    return service._chunk_markdown(text, "tema.md")
+
+
+def test_heading_stack_and_section_boundaries(chunker):
+    text = (
+        "# Tema 1\n\nIntro.\n\n## Celula\n\nTexto.\n\n### Membrana\n\nMas texto.\n\n"
+        "## **Tejidos**\n\nOtro texto.\n\n# Tema 2\n\n### Suelta\n\nFinal."
+    )
+    chunks = chunk(chunker, text)
+    assert [(c.titulo, c.seccion, c.subseccion) for c in chunks] == [
+        ("Tema 1", None, None),
+        ("Tema 1", "Celula", "Membrana"),
+        ("Tema 1", "Tejidos", None),  # Notion bold markers stripped
+        ("Tema 2", None, "Suelta"),
+    ]
+    assert chunks[2].content == "## Tejidos\n\nOtro texto."
+
+
+def test_heading_only_sections_are_dropped(chunker):
+    chunks = chunk(chunker, "# Tema\n\n## Vacia\n\n## Llena\n\nContenido.")
+    assert [c.seccion for c in chunks] == ["Llena"]
+
+
+def test_chunks_fit_and_carry_overlap(chunker):
+    paragraphs = [f"Parrafo {i} con algunas palabras de relleno." for i in range(10)]
+    chunks = chunk(chunker, "## S\n\n" + "\n\n".join(paragraphs))
+    assert len(chunks) > 2
+    assert all(len(c.content) <= chunker.chunk_size for c in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        seed = current.content.split("\n\n")[0]
+        assert previous.content.endswith(seed)
+        assert 0 < len(seed) <= chunker.chunk_overlap
+
+
+def test_token_sizing(chunker):
+    chunker.length_function = count_tokens
+    chunker.chunk_size, chunker.chunk_overlap = 30, 5
+    paragraphs = [f"Frase numero {i}, corta y clara." for i in range(20)]
+    chunks = chunk(chunker, "\n\n".join(paragraphs))
+    assert all(count_tokens(c.content) <= 30 for c in chunks)
+    assert max(len(c.content) for c in chunks) > 30  # Measured in tokens, not chars
+
+
+def test_oversize_paragraph_splits_on_sentences(chunker):
+    sentences = [f"Oracion numero {i} del parrafo largo." for i in range(12)]
+    chunks = chunk(chunker, " ".join(sentences))
+    assert len(chunks) > 1
+    assert all(len(c.content) <= chunker.chunk_size for c in chunks)
+    for sentence in sentences:
+        assert any(sentence in c.content for c in chunks)
+
+
+def test_oversize_code_block_keeps_lines_and_fences(chunker):
+    body = "\n".join(f"def f{i}(x):\n    return x + {i}" for i in range(15))
+    chunks = chunk(chunker, f"## Codigo\n\n```python\n{body}\n```\n\nFin.")
+    assert len(chunks) > 2
+    assert all(len(c.content) <= chunker.chunk_size for c in chunks)
+
+    code_lines = []
+    for c in chunks:
+        fences = [line for line in c.content.split("\n") if line.startswith(FENCE_MARKERS)]
+        assert len(fences) % 2 == 0 and fences[0] == "```python"
+        inside = False
+        for line in c.content.split("\n"):
+            if line.startswith(FENCE_MARKERS):
+                inside = not inside
+            elif inside:
+                code_lines.append(line)
+    assert "\n".join(code_lines) == body  # Indentation and newlines intact
+
+
+def test_oversize_list_splits_on_items(chunker):
+    items = [f"- elemento {i} de la lista" for i in range(20)]
+    chunks = chunk(chunker, "## Lista\n\n" + "\n".join(items))
+    assert len(chunks) > 1
+    for item in items:
+        assert any(item in c.content.split("\n") for c in chunks)
@@ -0,0 +1,112 @@
+import pytest
+
+from app.llm.circuit import CircuitBreaker, CircuitOpenError, CircuitState
+
+
+def breaker(threshold: int = 3, reset: float = 60.0) -> CircuitBreaker:
+    return CircuitBreaker("llm", failure_threshold=threshold, reset_seconds=reset)
+
+
+def fail(b: CircuitBreaker) -> None:
+    with pytest.raises(ConnectionError), b.guard():
+        raise ConnectionError
+
+
+def test_opens_after_consecutive_failures():
+    b = breaker()
+    fail(b)
+    fail(b)
+    with b.guard():
+        pass  # A success resets the count
+    fail(b)
+    fail(b)
+    assert b.state == CircuitState.CLOSED
+    fail(b)
+    assert b.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError), b.guard():
+        pass
+
+
+def test_half_open_lets_one_trial_through():
+    b = breaker(threshold=1, reset=0.0)
+    fail(b)
+    assert b.state == CircuitState.HALF_OPEN
+
+    trial = b.before_call()
+    assert trial
+    with pytest.raises(CircuitOpenError):
+        b.before_call()  # Others fail fast while the trial runs
+    b.record_success()
+    assert b.state == CircuitState.CLOSED
+    assert b.snapshot()["failures"] == 0
+
+
+def test_failed_trial_reopens():
+    b = breaker(threshold=1, reset=60.0)
+    fail(b)
+    b.mark_healthy()
+    assert b.state == CircuitState.HALF_OPEN
+    fail(b)
+    assert b.state == CircuitState.OPEN
+    assert b.snapshot()["retry_after"] > 0
+
+
+def test_cancelled_trial_frees_the_slot():
+    b = breaker(threshold=1, reset=0.0)
+    fail(b)
+    with pytest.raises(KeyboardInterrupt), b.guard():
+        raise KeyboardInterrupt
+    assert b.before_call()
+
+
+def test_failed_probe_opens_without_touching_trial_or_count():
+    b = breaker(threshold=3)
+    fail(b)
+    b.mark_unhealthy()
+    assert b.state == CircuitState.OPEN
+    assert b.snapshot()["failures"] == 1
+
+    b.mark_healthy()  # Probe recovered: half-open, one trial
+    assert b.before_call()
+    b.mark_unhealthy()  # Probe fails again while the trial is in flight
+    with pytest.raises(CircuitOpenError):
+        b.before_call()
+    b.record_success()  # The trial itself worked
+    assert b.state == CircuitState.CLOSED
+
+
+def test_successful_probe_resets_failure_count():
+    b = breaker(threshold=3)
+    fail(b)
+    fail(b)
+    b.mark_healthy()
+    assert b.state == CircuitState.CLOSED
+    assert b.snapshot()["failures"] == 0
+    fail(b)
+    fail(b)
+    assert b.state == CircuitState.CLOSED
+
+
+def test_health_prober_drives_the_breaker():
+    import asyncio
+
+    from app.services.health_prober import HealthProber
+
+    class Provider:
+        def __init__(self):
+            self.breaker = breaker(threshold=3)
+            self.status = "error"
+
+        async def health_check(self):
+            return {"status": self.status}
+
+    llm = Provider()
+    prober = HealthProber(llm=llm, interval=60)
+    asyncio.run(prober.probe())
+    assert llm.breaker.state == CircuitState.OPEN
+    assert not prober.is_ready()
+
+    llm.status = "ok"
+    asyncio.run(prober.probe())
+    assert llm.breaker.state == CircuitState.HALF_OPEN
+    assert llm.breaker.snapshot()["failures"] == 0
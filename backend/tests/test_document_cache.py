@@ -0,0 +1,97 @@
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.services.document_cache import DocumentCache
+
+URL = "/api/v1/asignaturas/bio/documents/tema"
+
+
+def write(docs: Path, name: str, size: int) -> None:
+    (docs / "bio").mkdir(parents=True, exist_ok=True)
+    (docs / "bio" / name).write_text("# Tema\n\n" + "texto de relleno " * (size // 17))
+
+
+def test_byte_budget_evicts_least_recently_used(tmp_path):
+    for name in ("a.md", "b.md", "c.md"):
+        write(tmp_path, name, 10_000)
+    cache = DocumentCache(docs_path=tmp_path, max_entries=10, max_bytes=70_000)
+
+    a = cache.get("bio", "a.md")
+    assert cache._bytes == a.nbytes
+    cache.get("bio", "b.md")
+    cache.get("bio", "a.md")  # a is now the most recent
+    cache.get("bio", "c.md")
+    assert set(cache._entries) == {("bio", "a.md"), ("bio", "c.md")}
+    assert cache._bytes == sum(e.nbytes for e in cache._entries.values())
+
+    cache.encoded_body(a, "gzip")  # Bodies count too
+    assert cache._bytes == sum(e.nbytes for e in cache._entries.values())
+    cache.invalidate()
+    assert cache._bytes == 0
+
+
+def test_document_over_the_budget_is_served_but_not_kept(tmp_path):
+    write(tmp_path, "big.md", 50_000)
+    cache = DocumentCache(docs_path=tmp_path, max_bytes=10_000)
+    assert cache.get("bio", "big.md").title == "Tema"
+    assert not cache._entries and cache._bytes == 0
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from app.api.v1 import asignaturas
+    from app.main import app
+
+    write(tmp_path, "tema.md", 5_000)
+    monkeypatch.setattr(asignaturas, "document_cache", DocumentCache(docs_path=tmp_path))
+    monkeypatch.setattr(settings, "docs_compress_min_bytes", 1024)
+    return TestClient(app)
+
+
+def test_etag_and_304(client):
+    first = client.get(URL, headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    assert json.loads(first.content)["title"] == "Tema"
+    etag = first.headers["ETag"]
+
+    again = client.get(URL, headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    weak = client.get(URL, headers={"Accept-Encoding": "identity", "If-None-Match": f"W/{etag}"})
+    assert weak.status_code == 304
+    other = client.get(URL, headers={"Accept-Encoding": "identity", "If-None-Match": '"x"'})
+    assert other.status_code == 200
+
+
+def test_encoding_negotiation(client):
+    zipped = client.get(URL, headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+    assert json.loads(zipped.content)["title"] == "Tema"  # httpx decodes it
+
+    plain = client.get(URL, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["ETag"] != zipped.headers["ETag"]
+
+    # The gzip ETag does not validate the identity representation
+    stale = client.get(
+        URL, headers={"Accept-Encoding": "identity", "If-None-Match": zipped.headers["ETag"]}
+    )
+    assert stale.status_code == 200
+
+
+def test_missing_document_is_404(client):
+    assert client.get("/api/v1/asignaturas/bio/documents/nada").status_code == 404
+    assert client.get("/api/v1/asignaturas/bio/documents/..%2F..%2Fetc").status_code == 404
+
+
+def test_gzip_body_matches_identity(tmp_path):
+    write(tmp_path, "a.md", 5_000)
+    cache = DocumentCache(docs_path=tmp_path)
+    document = cache.get("bio", "a.md")
+    assert gzip.decompress(cache.encoded_body(document, "gzip")) == document.body
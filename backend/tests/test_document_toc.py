@@ -0,0 +1,101 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.document_cache import DocumentCache, build_toc
+
+DOC = """# Tema 1
+
+Intro.
+
+## **La Célula**
+
+Texto.
+
+```python
+# no es un titulo
+```
+
+### Membrana
+
+Mas texto.
+
+## Resumen
+
+Uno.
+
+## Resumen
+
+Dos.
+"""
+
+URL = "/api/v1/asignaturas/bio/documents/tema"
+
+
+def test_toc_anchors_levels_and_ranges():
+    raw = DOC.encode("utf-8")
+    toc = build_toc(raw)
+    assert [(e.anchor, e.title, e.level) for e in toc] == [
+        ("tema-1", "Tema 1", 1),
+        ("la-celula", "La Célula", 2),  # Notion bold markers stripped
+        ("membrana", "Membrana", 3),
+        ("resumen", "Resumen", 2),
+        ("resumen-1", "Resumen", 2),  # Duplicates get a suffix
+    ]
+    tema, celula, membrana, resumen, resumen_1 = toc
+    assert tema.start == 0 and tema.end == len(raw)  # Nothing closes the only #
+    assert celula.end == resumen.start  # ### stays inside its ##
+    assert membrana.end == resumen.start
+    assert raw[resumen_1.start:resumen_1.end] == b"## Resumen\n\nDos.\n"
+
+
+def test_headings_inside_fences_are_skipped():
+    toc = build_toc(b"~~~\n# dentro\n~~~\n# Fuera\n")
+    assert [e.title for e in toc] == ["Fuera"]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from app.api.v1 import asignaturas
+    from app.main import app
+
+    (tmp_path / "bio").mkdir()
+    (tmp_path / "bio" / "tema.md").write_text(DOC, encoding="utf-8")
+    monkeypatch.setattr(asignaturas, "document_cache", DocumentCache(docs_path=tmp_path))
+    return TestClient(app)
+
+
+def test_toc_endpoint_and_304(client):
+    response = client.get(f"{URL}/toc")
+    assert response.status_code == 200
+    assert [e["anchor"] for e in response.json()["entries"]][:2] == ["tema-1", "la-celula"]
+
+    etag = response.headers["ETag"]
+    assert client.get(f"{URL}/toc", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_section_by_anchor_or_title(client):
+    by_anchor = client.get(f"{URL}/sections/la-celula").json()
+    assert by_anchor["content"].startswith("## **La Célula**\n")
+    assert "### Membrana" in by_anchor["content"]
+    assert "## Resumen" not in by_anchor["content"]
+
+    by_title = client.get(f"{URL}/sections/Membrana").json()
+    assert by_title == client.get(f"{URL}/sections/MEMBRANA").json()
+    assert client.get(f"{URL}/sections/La Célula").json()["anchor"] == "la-celula"
+    assert by_title["content"] == "### Membrana\n\nMas texto.\n\n"
+
+
+def test_section_etag_is_per_section(client):
+    first = client.get(f"{URL}/sections/resumen")
+    etag = first.headers["ETag"]
+    assert client.get(f"{URL}/sections/resumen", headers={"If-None-Match": etag}).status_code == 304
+    other = client.get(f"{URL}/sections/resumen-1", headers={"If-None-Match": etag})
+    assert other.status_code == 200 and other.json()["content"].endswith("Dos.\n")
+
+
+def test_missing_section_or_document_is_404(client):
+    missing = client.get(f"{URL}/sections/nada")
+    assert missing.status_code == 404
+    assert "nada" in missing.json()["detail"]
+    assert client.get("/api/v1/asignaturas/bio/documents/otro/toc").status_code == 404
+    assert client.get("/api/v1/asignaturas/bio/documents/otro/sections/x").status_code == 404
@@ -0,0 +1,89 @@
+import math
+
+import pytest
+
+from app.core.config import settings
+from tests.conftest import fake_embedding
+
+
+@pytest.fixture
+def hierarchical(monkeypatch, rag):
+    """The "bio" book (2 files x 6 sections) with its section index built."""
+    monkeypatch.setattr(settings, "retriever_hierarchical", True)
+    rag.hierarchical = True
+    rag.qdrant.build_sections("bio")
+    return rag
+
+
+def section_points(qdrant, book_id="bio"):
+    records, _ = qdrant.client.scroll(
+        qdrant._sections_collection_name(book_id), limit=1000, with_vectors=True
+    )
+    return records
+
+
+def test_ingest_builds_one_vector_per_section(monkeypatch, ingest):
+    monkeypatch.setattr(settings, "retriever_hierarchical", True)
+    ingest.ingest_book("bio")
+    qdrant = ingest.qdrant
+    assert qdrant.has_sections("bio")
+
+    sections = section_points(qdrant)
+    assert {(r.payload["source_file"], r.payload["seccion"]) for r in sections} == {
+        (f"{f:02d}-tema.md", f"Seccion {f}.{s}") for f in range(2) for s in range(6)
+    }
+    for record in sections:
+        assert math.isclose(math.fsum(x * x for x in record.vector), 1.0, rel_tol=1e-6)
+        assert record.payload["chunks"] >= 1
+
+
+def test_second_stage_searches_only_the_closest_sections(hierarchical):
+    hierarchical.sections_k = 1
+    target = next(
+        r for r in section_points(hierarchical.qdrant) if r.payload["seccion"] == "Seccion 1.3"
+    )
+    results = hierarchical._search("bio", target.vector)
+    assert results
+    assert {(r["source_file"], r["seccion"]) for r in results} == {("01-tema.md", "Seccion 1.3")}
+
+    hierarchical.hierarchical = False
+    flat = hierarchical._search("bio", target.vector)
+    assert len({r["seccion"] for r in flat}) > 1
+
+
+def test_book_without_section_index_falls_back_to_flat_search(rag):
+    rag.hierarchical = True
+    assert not rag.qdrant.has_sections("bio")
+    assert rag.qdrant.search_sections("bio", fake_embedding("x"), 4) is None
+    results = rag._search("bio", fake_embedding("Seccion 0.1"))
+    assert len({r["seccion"] for r in results}) > 1
+
+
+def test_failed_build_leaves_search_flat(monkeypatch, ingest):
+    monkeypatch.setattr(settings, "retriever_hierarchical", True)
+    original = ingest.qdrant.build_sections
+
+    def build_then_fail(book_id, source_file=None):
+        original(book_id, source_file=source_file)
+        raise RuntimeError("qdrant caido")
+
+    monkeypatch.setattr(ingest.qdrant, "build_sections", build_then_fail)
+    assert ingest.ingest_book("bio").chunks_count > 0  # Ingestion still succeeds
+    assert not ingest.qdrant.has_sections("bio")  # No half-built index
+
+
+def test_sync_rebuilds_the_edited_file_and_delete_drops_the_index(hierarchical, ingest, docs_dir):
+    path = docs_dir / "bio" / "00-tema.md"
+    path.write_text("# Tema 0\n\n## Unica\n\nTexto nuevo del tema.\n", encoding="utf-8")
+    ingest.sync_files("bio", ["00-tema.md"])
+
+    sections = {
+        (r.payload["source_file"], r.payload["seccion"]) for r in section_points(ingest.qdrant)
+    }
+    assert ("00-tema.md", "Unica") in sections
+    assert not any(f == "00-tema.md" and s != "Unica" for f, s in sections)
+    assert ("01-tema.md", "Seccion 1.0") in sections  # Other files untouched
+
+    ingest.delete_book("bio")
+    assert not ingest.qdrant.has_sections("bio")
+    assert hierarchical.qdrant.search_sections("bio", fake_embedding("x"), 4) is None
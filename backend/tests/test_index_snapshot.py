@@ -0,0 +1,97 @@
+import zipfile
+
+import pytest
+from qdrant_client import QdrantClient
+
+from app.db.qdrant import QdrantService
+from app.services.embedding_reduction import ReducerStore
+from app.services.index_snapshot import IndexSnapshots
+from app.services.ingest_service import IngestService, IngestStatus
+from tests.conftest import VECTOR_SIZE, FakeLLM
+
+
+@pytest.fixture
+def snapshots(ingest, tmp_path) -> IndexSnapshots:
+    ingest.ingest_book("bio")
+    return IndexSnapshots(ingest, tmp_path / "snapshots")
+
+
+@pytest.fixture
+def target(snapshots, tmp_path) -> IndexSnapshots:
+    """Snapshots over a fresh, empty index in another "environment"."""
+    qdrant = QdrantService(client=QdrantClient(location=":memory:"), storage_mode="per_subject")
+    qdrant.vector_size = VECTOR_SIZE
+    ingest = IngestService(
+        qdrant=qdrant, llm=FakeLLM(), reducers=ReducerStore(tmp_path / "target-projections")
+    )
+    ingest.chunk_size = snapshots.ingest.chunk_size
+    ingest.chunk_overlap = snapshots.ingest.chunk_overlap
+    return IndexSnapshots(ingest, snapshots.directory)
+
+
+def points(qdrant: QdrantService) -> dict:
+    return {
+        str(r.id): (r.payload["chunk_index"], r.payload["content"], r.vector)
+        for batch in qdrant.iter_points("bio")
+        for r in batch
+    }
+
+
+def test_export_and_restore_round_trip(snapshots, target):
+    path = snapshots.export("bio")
+    assert path.name.startswith("bio-") and path.exists()
+    with zipfile.ZipFile(path) as archive:
+        assert set(archive.namelist()) == {"manifest.json", "payloads.jsonl", "vectors.npy"}
+
+    result = target.restore("bio")
+    assert result.status == IngestStatus.READY and result.files_processed == 2
+    assert target.ingest.llm.embedded == 0  # Nothing re-embedded
+
+    source, restored = points(snapshots.qdrant), points(target.qdrant)
+    assert result.chunks_count == len(source) and source.keys() == restored.keys()
+    for point_id, (index, content, vector) in source.items():
+        assert restored[point_id][:2] == (index, content)
+        assert restored[point_id][2] == pytest.approx(vector, abs=1e-6)
+
+
+def test_export_requires_an_index_matching_the_docs(snapshots, docs_dir):
+    with pytest.raises(ValueError, match="geo is not ingested"):
+        snapshots.export("geo")
+
+    (docs_dir / "bio" / "00-tema.md").write_text("# Tema 0\n\nEditado.\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="does not match docs/bio"):
+        snapshots.export("bio")
+    assert not snapshots.has_any("bio")
+
+
+def test_restore_skips_snapshots_of_other_docs_or_settings(snapshots, target, docs_dir):
+    assert target.restore("bio") is None  # No snapshot yet
+    snapshots.export("bio")
+
+    target.ingest.chunk_size = 200
+    assert target.restore("bio") is None
+    target.ingest.chunk_size = snapshots.ingest.chunk_size
+
+    (docs_dir / "bio" / "01-tema.md").write_text("# Tema 1\n\nEditado.\n", encoding="utf-8")
+    assert target.restore("bio") is None
+    assert not target.qdrant.collection_exists("bio")
+
+
+def test_restore_keeps_an_existing_index_unless_forced(snapshots):
+    snapshots.export("bio")
+    result = snapshots.restore("bio")
+    assert "force=True" in result.error
+    assert snapshots.restore("bio", force=True).error is None
+
+
+def test_failed_restore_drops_the_partial_index(snapshots, target, monkeypatch):
+    snapshots.export("bio")
+
+    def insert(book_id, chunks, embeddings, start_index=0):
+        assert target.qdrant.get_vector_size("bio") == VECTOR_SIZE
+        raise RuntimeError("disco lleno")
+
+    monkeypatch.setattr(target.ingest, "_insert", insert)
+    with pytest.raises(RuntimeError, match="disco lleno"):
+        target.restore("bio")
+    assert target.qdrant.get_vector_size("bio") is None  # Collection created, then dropped
@@ -0,0 +1,207 @@
+import asyncio
+import threading
+from pathlib import Path
+
+from app.db.job_store import JobStore
+from app.services.ingest_jobs import IngestJobManager
+from app.services.ingest_service import IngestService, IngestStatus
+
+
+def _total_chunks(ingest: IngestService, docs_dir: Path) -> int:
+    return sum(1 for _ in ingest._iter_chunks(docs_dir / "bio"))
+
+
+async def _run_until_idle(manager: IngestJobManager) -> None:
+    await asyncio.wait_for(manager._queue.join(), timeout=30)
+
+
+def test_submit_runs_job_and_deduplicates(ingest, docs_dir, tmp_path):
+    async def main():
+        manager = IngestJobManager(ingest=ingest, store=JobStore(tmp_path / "jobs.db"))
+        await manager.start()
+        try:
+            job = await asyncio.to_thread(manager.submit, "bio")
+            assert (await asyncio.to_thread(manager.submit, "bio")).id == job.id
+            await _run_until_idle(manager)
+            return manager.get(job.id)
+        finally:
+            await manager.stop()
+
+    job = asyncio.run(main())
+    total = _total_chunks(ingest, docs_dir)
+    assert job.status == IngestStatus.READY.value
+    assert job.upserted_chunks == job.total_chunks == total
+    assert ingest.qdrant.count_chunks("bio") == total
+
+
+def test_interrupted_job_resumes_from_checkpoint(ingest, fake_llm, docs_dir, tmp_path):
+    store_path = tmp_path / "jobs.db"
+    total = _total_chunks(ingest, docs_dir)
+    assert total > 3 * ingest.batch_size
+
+    async def interrupt():
+        manager = IngestJobManager(ingest=ingest, store=JobStore(store_path))
+        calls = 0
+
+        def on_embed():
+            nonlocal calls
+            calls += 1
+            if calls == 2:  # Shut down while the second batch is embedding
+                manager._stopping.set()
+
+        fake_llm.on_embed = on_embed
+        await manager.start()
+        job = await asyncio.to_thread(manager.submit, "bio")
+        while not manager._stopping.is_set():
+            await asyncio.sleep(0.01)
+        await manager.stop()
+        fake_llm.on_embed = None
+        return manager.get(job.id)
+
+    job = asyncio.run(interrupt())
+    checkpoint = 2 * ingest.batch_size
+    assert job.status == IngestStatus.PROCESSING.value
+    assert job.upserted_chunks == checkpoint
+    assert ingest.qdrant.count_chunks("bio") == checkpoint
+
+    async def resume():
+        manager = IngestJobManager(ingest=ingest, store=JobStore(store_path))
+        await manager.start(recover=True)
+        try:
+            await _run_until_idle(manager)
+            return manager.get(job.id)
+        finally:
+            await manager.stop()
+
+    embedded_before = fake_llm.embedded
+    resumed = asyncio.run(resume())
+    assert resumed.status == IngestStatus.READY.value
+    assert resumed.resumed_from == checkpoint
+    assert resumed.attempts == 2
+    assert fake_llm.embedded - embedded_before == total - checkpoint
+    assert ingest.qdrant.count_chunks("bio") == total
+
+
+def test_job_restarts_from_zero_when_sources_changed(ingest, fake_llm, docs_dir, tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    job = store.create("bio", IngestStatus.PROCESSING.value)
+    store.update(job.id, fingerprint="stale", upserted_chunks=8, started_at=1.0)
+    ingest.ingest_book("bio")  # What the earlier run left behind
+
+    async def main():
+        manager = IngestJobManager(ingest=ingest, store=store)
+        await manager.start(recover=True)
+        try:
+            await _run_until_idle(manager)
+            return manager.get(job.id)
+        finally:
+            await manager.stop()
+
+    embedded_before = fake_llm.embedded
+    done = asyncio.run(main())
+    total = _total_chunks(ingest, docs_dir)
+    assert done.status == IngestStatus.READY.value
+    assert done.resumed_from == 0
+    assert fake_llm.embedded - embedded_before == total
+    assert ingest.qdrant.count_chunks("bio") == total
+
+
+def test_force_rebuilds_existing_collection(ingest, fake_llm, docs_dir, tmp_path):
+    ingest.ingest_book("bio")
+    total = _total_chunks(ingest, docs_dir)
+
+    async def run(force: bool):
+        manager = IngestJobManager(ingest=ingest, store=JobStore(tmp_path / "jobs.db"))
+        await manager.start()
+        try:
+            job = await asyncio.to_thread(manager.submit, "bio", force)
+            await _run_until_idle(manager)
+            return manager.get(job.id)
+        finally:
+            await manager.stop()
+
+    embedded_before = fake_llm.embedded
+    kept = asyncio.run(run(force=False))
+    assert kept.status == IngestStatus.READY.value
+    assert "already exists" in kept.error
+    assert fake_llm.embedded == embedded_before
+
+    rebuilt = asyncio.run(run(force=True))
+    assert rebuilt.status == IngestStatus.READY.value
+    assert rebuilt.error is None
+    assert fake_llm.embedded - embedded_before == total
+    assert ingest.qdrant.count_chunks("bio") == total
+
+
+def test_stop_waits_for_running_job_thread(ingest, fake_llm, docs_dir, tmp_path):
+    entered, release = threading.Event(), threading.Event()
+
+    def on_embed():
+        entered.set()
+        release.wait(timeout=10)
+
+    fake_llm.on_embed = on_embed
+
+    async def main():
+        manager = IngestJobManager(ingest=ingest, store=JobStore(tmp_path / "jobs.db"))
+        await manager.start()
+        job = await asyncio.to_thread(manager.submit, "bio")
+        await asyncio.to_thread(entered.wait, 10)
+
+        stopping = asyncio.create_task(manager.stop())
+        await asyncio.sleep(0.1)
+        assert not stopping.done()  # The job thread is still inside a batch
+        release.set()
+        await asyncio.wait_for(stopping, timeout=10)
+        count = ingest.qdrant.count_chunks("bio")
+        await asyncio.sleep(0.1)
+        return manager.get(job.id), count
+
+    job, count = asyncio.run(main())
+    assert job.status == IngestStatus.PROCESSING.value
+    assert count == job.upserted_chunks == ingest.batch_size
+    assert ingest.qdrant.count_chunks("bio") == count
+
+
+def test_job_endpoints_require_admin_token(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.main import app
+
+    client = TestClient(app)  # No lifespan: auth fails before any service is built
+    body = {"book_id": "bio", "force": True}
+
+    monkeypatch.setattr(settings, "admin_token", None)
+    assert client.post("/api/v1/ingest/jobs", json=body).status_code == 404
+
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    assert client.post("/api/v1/ingest/jobs", json=body).status_code == 403
+    assert client.get("/api/v1/ingest/jobs", headers={"X-Admin-Token": "nope"}).status_code == 403
+
+
+def test_list_jobs_query_parameters(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.api.deps import get_ingest_job_manager
+    from app.core.config import settings
+    from app.main import app
+
+    calls = []
+
+    class Manager:
+        def list(self, status=None, book_id=None, limit=50):
+            calls.append((status, book_id, limit))
+            return []
+
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    app.dependency_overrides[get_ingest_job_manager] = Manager
+    try:
+        client = TestClient(app, headers={"X-Admin-Token": "secret"})
+        assert client.get("/api/v1/ingest/jobs").json() == []
+        assert client.get("/api/v1/ingest/jobs?status=ready&book_id=bio&limit=5").status_code == 200
+        assert client.get("/api/v1/ingest/jobs?limit=0").status_code == 422
+        assert client.get("/api/v1/ingest/jobs?status=bogus").status_code == 422
+    finally:
+        app.dependency_overrides.clear()
+    assert calls == [(None, None, 50), (IngestStatus.READY, "bio", 5)]
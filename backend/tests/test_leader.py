@@ -0,0 +1,57 @@
+import pytest
+
+from app.services.leader import FileLeaderElection
+
+
+def test_file_lock_is_exclusive_until_released(tmp_path):
+    path = tmp_path / "leader.lock"
+    first, second = FileLeaderElection(path), FileLeaderElection(path)
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert second._file is None
+    assert first.read_state()["owner"] == first.owner
+
+    first.release()
+    assert not first.is_leader
+    assert second.try_acquire()
+    second.release()
+
+
+def test_failed_acquire_releases_the_lock_file(tmp_path, monkeypatch):
+    path = tmp_path / "leader.lock"
+    election = FileLeaderElection(path)
+
+    def broken_write(state):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(election, "_write_state", broken_write)
+    with pytest.raises(OSError):
+        election.try_acquire()
+    assert not election.is_leader
+    assert election._file is None
+
+    other = FileLeaderElection(path)
+    assert other.try_acquire()
+    other.release()
+
+
+def test_qdrant_lease_is_best_effort(monkeypatch, caplog):
+    from qdrant_client import QdrantClient
+
+    from app.services.leader import QdrantLeaderElection, get_leader_election
+
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(QdrantLeaderElection, "client", property(lambda self: client))
+    first = QdrantLeaderElection(lease_seconds=60, settle_seconds=0)
+    second = QdrantLeaderElection(lease_seconds=60, settle_seconds=0)
+
+    assert first.try_acquire()
+    assert not second.try_acquire()  # Live lease held by someone else
+    first.release()
+    assert second.try_acquire()
+    second.release()
+
+    with caplog.at_level("WARNING"):
+        assert isinstance(get_leader_election("qdrant"), QdrantLeaderElection)
+    assert "best-effort" in caplog.text
@@ -0,0 +1,35 @@
+import pytest
+
+from app.core.container import Container
+from app.db.local_qdrant import ReplicaClient, check_client_version, open_local_client
+
+
+def test_client_version_check():
+    check_client_version()  # The installed, pinned one
+    check_client_version("1.7.0")
+    for version in ("1.6.4", "1.8.0", "2.0.0"):
+        with pytest.raises(RuntimeError, match="qdrant-client"):
+            check_client_version(version)
+
+
+def test_replace_client_closes_old_one_and_drops_dependents(tmp_path):
+    from qdrant_client.http import models
+
+    container = Container()
+    path = tmp_path / "qdrant"
+    container.replace_qdrant_client(lambda: open_local_client(path))  # Resolved too early
+    container.override(qdrant="stale", rag="stale", llm="kept")
+
+    # The storage lock was released, so the leader can open it for writing
+    container.replace_qdrant_client(lambda: open_local_client(path, writer=True))
+    assert not isinstance(container.qdrant_client, ReplicaClient)
+    assert "qdrant" not in container._instances and "rag" not in container._instances
+    assert container._instances["llm"] == "kept"
+
+    client = container.qdrant_client
+    client.create_collection("c", vectors_config=models.VectorParams(size=2, distance="Cosine"))
+    client.upsert("c", points=[models.PointStruct(id=1, vector=[1.0, 0.0])])
+    replica = ReplicaClient(path)
+    assert replica.count("c").count == 1
+    replica.close()
+    client.close()
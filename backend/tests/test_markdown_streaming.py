@@ -0,0 +1,85 @@
+import pytest
+
+from app.services.ingest_service import IngestStatus, iter_markdown_sections
+
+DOC = """Preambulo sin titulo.
+
+# Tema 1
+
+Intro del tema.
+
+## **Celula**
+
+Texto de la celula. """ + "Relleno de la seccion. " * 20 + """
+
+```python
+# Esto no es un titulo
+## Ni esto
+x = 1
+```
+
+### Membrana
+
+Mas texto.
+
+~~~
+## Dentro de tildes
+~~~
+
+## Tejidos
+
+- uno
+- dos
+
+# Tema 2
+
+Final.
+"""
+
+
+@pytest.fixture
+def chunker(ingest):
+    ingest.chunk_size = 120
+    ingest.chunk_overlap = 20
+    return ingest
+
+
+def test_sections_split_at_level_1_and_2_headings_outside_fences(tmp_path):
+    path = tmp_path / "tema.md"
+    path.write_text(DOC, encoding="utf-8")
+    firsts = [section[0] for section in iter_markdown_sections(path)]
+    assert firsts == ["Preambulo sin titulo.", "# Tema 1", "## **Celula**", "## Tejidos", "# Tema 2"]
+    assert "\n".join(line for s in iter_markdown_sections(path) for line in s) == DOC.rstrip("\n")
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_streamed_chunks_match_in_memory_chunks(chunker, tmp_path, newline):
+    path = tmp_path / "tema.md"
+    path.write_bytes(DOC.replace("\n", newline).encode("utf-8"))
+    in_memory = chunker._chunk_markdown(path.read_text(encoding="utf-8"), path.name)
+    assert list(chunker._chunk_file(path)) == in_memory
+    assert len(in_memory) > 4
+    assert not any("Esto no es un titulo" in (c.seccion or "") for c in in_memory)
+
+
+def test_docs_shrinking_mid_ingest_stop_the_run_cleanly(ingest, fake_llm, docs_dir):
+    # The count pass saw both files; the second one shrinks before it is read
+    def shrink():
+        (docs_dir / "bio" / "01-tema.md").write_text("# Tema 1\n\nCorto.\n", encoding="utf-8")
+
+    fake_llm.on_embed = shrink
+    totals = set()
+    result = ingest.ingest_book("bio", on_progress=lambda done, inserted, total: totals.add(total))
+    assert result.status == IngestStatus.READY
+    assert result.chunks_count < totals.pop()  # Fewer than counted, none missing
+    assert result.chunks_count == ingest.qdrant.count_chunks("bio")
+    assert ingest.qdrant.chunk_index_range("bio") == range(result.chunks_count)
+
+
+def test_undecodable_file_fails_the_ingest_before_indexing(ingest, fake_llm, docs_dir):
+    (docs_dir / "bio" / "02-roto.md").write_bytes(b"# Roto\n\n\xff\xfe texto\n")
+    result = ingest.ingest_book("bio")
+    assert result.status == IngestStatus.ERROR
+    assert "utf-8" in result.error
+    assert not ingest.qdrant.collection_exists("bio")
+    assert fake_llm.embedded == 0  # Caught by the counting pass
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.services.rag_service import RAGService
+
+
+class Qdrant:
+    is_shared = False
+
+    def __init__(self, scores: dict[str, list[float]]):
+        self.scores = scores
+
+    def collection_exists(self, book_id):
+        return book_id in self.scores
+
+    def search(self, book_id, query_vector, limit, score_threshold=None, section_ids=None):
+        return [
+            {"id": f"{book_id}-{i}", "book_id": book_id, "score": score, "content": f"{book_id} {i}"}
+            for i, score in enumerate(self.scores[book_id][:limit])
+        ]
+
+    def load_content(self, results):
+        return results
+
+
+class Projection:
+    def __init__(self, signature):
+        self.signature = signature
+
+    def transform(self, vectors):
+        return vectors
+
+
+class Reducers:
+    def __init__(self, signatures: dict[str, str | None]):
+        self.signatures = signatures
+
+    def load(self, book_id):
+        signature = self.signatures.get(book_id)
+        return Projection(signature) if signature else None
+
+
+def retrieve(fake_llm, scores, signatures):
+    rag = RAGService(qdrant=Qdrant(scores), llm=fake_llm, reducers=Reducers(signatures))
+    rag.retriever_k = 4
+    rag.adaptive = False
+    return asyncio.run(rag._aretrieve_multi(list(scores), "pregunta?"))
+
+
+def test_same_space_merges_raw_scores(fake_llm):
+    scores = {"bio": [0.9, 0.85, 0.8], "geo": [0.7, 0.6]}
+    results = retrieve(fake_llm, scores, {})
+    assert [r["id"] for r in results] == ["bio-0", "bio-1", "bio-2", "geo-0"]
+
+
+def test_separate_projections_merge_by_normalized_score(fake_llm):
+    # geo's PCA basis yields lower cosines across the board; raw merging
+    # would keep only bio
+    scores = {"bio": [0.9, 0.88, 0.87, 0.86], "geo": [0.5, 0.3, 0.1]}
+    results = retrieve(fake_llm, scores, {"bio": "pca:a", "geo": "pca:b"})
+    assert {r["id"] for r in results} == {"bio-0", "geo-0", "bio-1", "geo-1"}
+    for r in results:  # Attribution and raw score are kept
+        assert r["book_id"] == r["id"].split("-")[0]
+        assert r["score"] == scores[r["book_id"]][int(r["id"].split("-")[1])]
+
+    sources = RAGService._build_context(None, results)[1]
+    assert {s.book_id for s in sources} == {"bio", "geo"}
+
+
+def test_missing_book_is_reported(fake_llm):
+    rag = RAGService(qdrant=Qdrant({"bio": [0.9]}), llm=fake_llm, reducers=Reducers({}))
+    with pytest.raises(ValueError, match="geo"):
+        asyncio.run(rag._aretrieve_multi(["bio", "geo"], "pregunta?"))
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.deps import RateLimit
+from app.core.config import settings
+from app.core.rate_limit import client_key, rate_limits
+
+
+def request(ip: str = "10.0.0.1", session: str | None = None) -> Request:
+    headers = [(b"x-session-id", session.encode())] if session else []
+    return Request({"type": "http", "headers": headers, "client": (ip, 1234)})
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_ask_per_minute", 0.001)
+    monkeypatch.setattr(settings, "rate_limit_ask_burst", 2)
+    monkeypatch.setattr(settings, "rate_limit_ip_factor", 2.0)
+    rate_limits.reset()
+    yield
+    rate_limits.reset()
+
+
+def allowed(req: Request) -> bool:
+    try:
+        asyncio.run(RateLimit("ask")(req))
+    except HTTPException as e:
+        assert e.status_code == 429
+        return False
+    return True
+
+
+def test_client_key_is_the_ip_without_session_header():
+    assert client_key(request(session="abc")) == "10.0.0.1"
+
+
+def test_client_key_scopes_session_to_ip(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_session_header", "X-Session-Id")
+    assert client_key(request()) == "10.0.0.1"
+    assert client_key(request(session="abc")) == "10.0.0.1|session:abc"
+    assert client_key(request("10.0.0.2", "abc")) != client_key(request(session="abc"))
+    assert len(client_key(request(session="x" * 1000))) < 200
+
+
+def test_bucket_per_client(limits):
+    assert [allowed(request()) for _ in range(3)] == [True, True, False]
+    assert allowed(request("10.0.0.2"))
+
+
+def test_rotating_sessions_hit_the_ip_ceiling(limits, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_session_header", "X-Session-Id")
+    results = [allowed(request(session=f"s{i}")) for i in range(6)]
+    assert results == [True] * 4 + [False] * 2  # burst 2 x factor 2
+    assert allowed(request("10.0.0.2", "s0"))
+
+
+def test_rejected_by_ceiling_keeps_client_tokens(limits, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_session_header", "X-Session-Id")
+    for i in range(4):
+        assert allowed(request(session=f"other{i}"))
+    assert not allowed(request(session="me"))
+    assert rate_limits.limiter("ask")._buckets["10.0.0.1|session:me"].tokens == pytest.approx(2)
+
+
+def test_large_cost_needs_a_full_bucket_and_leaves_debt(limits):
+    limiter = rate_limits.limiter("ask")
+    assert limiter.check("a", cost=5) == 0  # Full bucket: accepted, 3 tokens owed
+    assert limiter.check("a") > 0
+    assert limiter.check("b") == 0
+    assert limiter.check("b", cost=5) > 0  # Only 1 token left
+
+
+def test_batch_is_charged_per_question(limits):
+    from fastapi.testclient import TestClient
+
+    from app.api.deps import get_rag_service
+    from app.main import app
+
+    class Rag:
+        async def aask_batch(self, slug, questions):
+            async def results():
+                return
+                yield
+
+            return results()
+
+    app.dependency_overrides[get_rag_service] = Rag
+    try:
+        client = TestClient(app)
+        batch = {"questions": ["uno?", "dos?", "tres?"]}
+        assert client.post("/api/v1/chat/bio/ask-batch", json=batch).status_code == 200
+        response = client.post("/api/v1/chat/bio/ask-batch", json={"questions": ["uno?"]})
+        assert response.status_code == 429  # The first batch overdrew the bucket
+        assert int(response.headers["Retry-After"]) > 0
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_batch_larger_than_remaining_budget_is_rejected(limits):
+    from fastapi.testclient import TestClient
+
+    from app.api.deps import get_rag_service
+    from app.main import app
+
+    app.dependency_overrides[get_rag_service] = object
+    try:
+        client = TestClient(app)
+        rate_limits.check("ask", "testclient")  # One of the two tokens spent
+        batch = {"questions": ["uno?", "dos?"]}
+        assert client.post("/api/v1/chat/bio/ask-batch", json=batch).status_code == 429
+        assert rate_limits.limiter("ask")._buckets["testclient"].tokens == pytest.approx(1)
+    finally:
+        app.dependency_overrides.clear()
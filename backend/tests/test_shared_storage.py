@@ -0,0 +1,70 @@
+import pytest
+from qdrant_client import QdrantClient
+
+from app.db.qdrant import QdrantService
+from app.services.embedding_reduction import ReducerStore
+from app.services.ingest_service import IngestService
+from tests.conftest import VECTOR_SIZE, fake_embedding, write_book
+
+
+@pytest.fixture
+def shared(docs_dir, fake_llm, tmp_path) -> QdrantService:
+    """Shared-mode Qdrant holding the "bio" and "geo" books."""
+    write_book(docs_dir / "geo", sections=3, files=1)
+    service = QdrantService(client=QdrantClient(location=":memory:"), storage_mode="shared")
+    service.vector_size = VECTOR_SIZE
+    ingest = IngestService(
+        qdrant=service, llm=fake_llm, reducers=ReducerStore(tmp_path / "projections")
+    )
+    ingest.chunk_size = 300
+    ingest.chunk_overlap = 30
+    for book_id in ("bio", "geo"):
+        ingest.ingest_book(book_id)
+    return service
+
+
+def test_books_are_partitions_of_one_collection(shared):
+    names = [c.name for c in shared.client.get_collections().collections]
+    assert names == [shared.shared_collection]
+    assert shared.list_collections() == ["bio", "geo"]
+    assert shared.collection_exists("bio") and not shared.collection_exists("quimica")
+
+    bio, geo = shared.count_chunks("bio"), shared.count_chunks("geo")
+    assert bio > geo > 0
+    assert shared.client.count(shared.shared_collection).count == bio + geo
+    assert shared.count_chunks("quimica") == 0
+
+
+def test_search_stays_inside_the_book(shared):
+    # The query is the exact text of a geo chunk; bio must not see it
+    geo = next(iter(shared.iter_points("geo")))[0].payload["content"]
+    results = shared.search("bio", fake_embedding(geo), limit=50)
+    assert results and {r["book_id"] for r in results} == {"bio"}
+    assert shared.search("geo", fake_embedding(geo), limit=1)[0]["content"] == geo
+
+    both = shared.search_many(["bio", "geo"], fake_embedding(geo), limit=50)
+    assert {r["book_id"] for r in both} == {"bio", "geo"}
+
+
+def test_delete_removes_only_that_book(shared):
+    geo = shared.count_chunks("geo")
+    assert shared.delete_collection("bio")
+    assert shared.list_collections() == ["geo"]
+    assert shared.count_chunks("geo") == geo
+    assert not shared.delete_collection("bio")  # Already gone
+
+
+def test_vector_size_mismatch_is_rejected(shared):
+    with pytest.raises(ValueError, match="stores 16-dim vectors, not 8"):
+        shared.create_collection("quimica", vector_size=8)
+
+
+def test_empty_store_lists_no_books():
+    service = QdrantService(client=QdrantClient(location=":memory:"), storage_mode="shared")
+    assert service.list_collections() == []
+    assert not service.collection_exists("bio")
+
+
+def test_search_many_needs_shared_mode(qdrant):
+    with pytest.raises(ValueError, match="shared storage mode"):
+        qdrant.search_many(["bio"], fake_embedding("x"))
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import streaming
+from app.api.deps import get_rag_service
+from app.api.streaming import (
+    StreamCompressor,
+    coalesce,
+    negotiate_encoding,
+    sse_event,
+    sse_token,
+)
+from app.core.config import settings
+
+
+async def tokens(items, delay=0.0, error=None, closed=None):
+    try:
+        for item in items:
+            if delay:
+                await asyncio.sleep(delay)
+            yield item
+        if error is not None:
+            raise error
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+def test_sse_token_matches_generic_event():
+    for text in ("hola", 'comillas "y" \\ barras', "línea\nnueva", ""):
+        assert sse_token(text) == sse_event("token", {"token": text})
+
+
+def test_negotiate_encoding(monkeypatch):
+    assert negotiate_encoding("") == "identity"
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("GZIP;q=0.5") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") == "identity"
+    assert negotiate_encoding("gzip; q=0.0") == "identity"
+    monkeypatch.setattr(streaming, "brotli", None)
+    assert negotiate_encoding("br, gzip") == "gzip"  # br needs the optional package
+
+
+def test_compressor_chunks_decode_as_they_arrive():
+    compressor = StreamCompressor("gzip")
+    decoder = zlib.decompressobj(31)
+    frames = [sse_token(f"token {i} ") for i in range(5)]
+    for frame in frames:
+        assert decoder.decompress(compressor.compress(frame)) == frame  # Flushed per chunk
+    assert decoder.decompress(compressor.finish()) == b""
+    assert decoder.eof
+
+    identity = StreamCompressor("identity")
+    assert identity.compress(b"x") == b"x" and identity.finish() == b""
+    with pytest.raises(ValueError, match="Unsupported encoding"):
+        StreamCompressor("deflate")
+
+
+def test_coalesce_disabled_passes_tokens_through():
+    items = ["a", "b", "c"]
+    assert asyncio.run(collect(coalesce(tokens(items), 0, 64))) == items
+
+
+def test_coalesce_sends_first_token_then_merges():
+    items = ["Hola"] + [" x"] * 20
+    pieces = asyncio.run(collect(coalesce(tokens(items), window_ms=1000, max_chars=10)))
+    assert pieces[0] == "Hola"
+    assert "".join(pieces) == "".join(items)
+    assert len(pieces) < len(items)
+    assert all(len(piece) <= 10 for piece in pieces[1:])
+
+
+def test_coalesce_flushes_when_the_window_elapses():
+    pieces = asyncio.run(collect(coalesce(tokens(["a", "b", "c"], delay=0.03), 10, 1000)))
+    assert pieces == ["a", "b", "c"]  # Tokens 30 ms apart never share a 10 ms window
+
+
+def test_coalesce_propagates_upstream_errors():
+    async def main():
+        return await collect(coalesce(tokens(["a", "b"], error=RuntimeError("boom")), 50, 64))
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(main())
+
+
+def test_coalesce_closes_upstream_on_early_stop():
+    closed = []
+
+    async def main():
+        stream = coalesce(tokens(["a"] * 100, delay=0.001, closed=closed), 5, 64)
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+
+    asyncio.run(main())
+    assert closed == [True]
+
+
+def events(body: bytes) -> list[tuple[str, object]]:
+    parsed = []
+    for frame in body.decode().strip().split("\n\n"):
+        event, data = frame.split("\n")
+        parsed.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return parsed
+
+
+@pytest.fixture
+def client(rag):
+    from app.main import app
+
+    app.dependency_overrides[get_rag_service] = lambda: rag
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_stream_endpoint_sends_sources_tokens_done(client):
+    response = client.post("/api/v1/chat/bio/stream", json={"question": "¿Qué es el tema 0?"})
+    assert response.status_code == 200
+    names = [name for name, _ in events(response.content)]
+    assert names[0] == "sources" and names[-1] == "done"
+    assert "token" in names
+
+
+def test_stream_endpoint_compresses_when_enabled(client, monkeypatch):
+    monkeypatch.setattr(settings, "stream_compression", True)
+    response = client.post(
+        "/api/v1/chat/bio/stream",
+        json={"question": "¿Qué es el tema 0?"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert events(response.content)[-1] == ("done", {"status": "complete"})  # httpx decodes it
+
+
+def test_stream_endpoint_reports_unknown_book_as_error_event(client):
+    response = client.post("/api/v1/chat/quimica/stream", json={"question": "¿Qué es?"})
+    assert events(response.content) == [("error", {"error": "Book 'quimica' not found"})]